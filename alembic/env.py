@@ -13,6 +13,8 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
 from newsletter.database import Base
 from newsletter.models import (  # noqa: F401 — ensure all models registered
     Post, PostAnalysis, Newsletter, NewsletterItem, ScrapeRun, Subscriber,
+    CategorizationCache, CategorizationBatch, PostMetric, PostSignature, PipelineRun,
+    EmailDelivery,
 )
 
 config = context.config
@@ -22,11 +24,20 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_object(obj, name, type_, reflected, compare_to):
+    # The search index (FTS5 table and its shadow tables, or the tsvector table)
+    # is managed by raw SQL in its migration, not by the ORM models
+    if type_ == "table" and reflected and name.startswith("post_search"):
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -41,7 +52,11 @@ def run_migrations_online() -> None:
         poolclass=pool.NullPool,
     )
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
         with context.begin_transaction():
             context.run_migrations()
 
@@ -0,0 +1,162 @@
+"""post search index
+
+Revision ID: 9e4b2c8d1a67
+Revises: 5c1e9a7b3f20
+Create Date: 2026-10-17 08:41:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b2c8d1a67'
+down_revision: Union[str, None] = '5c1e9a7b3f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE post_search USING fts5(
+        title, body, summary, key_insight, tokenize = 'porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER post_search_post_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO post_search (rowid, title, body, summary, key_insight)
+        VALUES (new.id, new.title, coalesce(new.body, ''), '', '');
+    END
+    """,
+    """
+    CREATE TRIGGER post_search_post_update AFTER UPDATE OF title, body ON posts BEGIN
+        UPDATE post_search SET title = new.title, body = coalesce(new.body, '')
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER post_search_post_delete AFTER DELETE ON posts BEGIN
+        DELETE FROM post_search WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER post_search_analysis_insert AFTER INSERT ON post_analyses BEGIN
+        UPDATE post_search
+        SET summary = coalesce(new.summary, ''), key_insight = coalesce(new.key_insight, '')
+        WHERE rowid = new.post_id;
+    END
+    """,
+    """
+    CREATE TRIGGER post_search_analysis_update
+    AFTER UPDATE OF summary, key_insight ON post_analyses BEGIN
+        UPDATE post_search
+        SET summary = coalesce(new.summary, ''), key_insight = coalesce(new.key_insight, '')
+        WHERE rowid = new.post_id;
+    END
+    """,
+    """
+    CREATE TRIGGER post_search_analysis_delete AFTER DELETE ON post_analyses BEGIN
+        UPDATE post_search SET summary = '', key_insight = '' WHERE rowid = old.post_id;
+    END
+    """,
+    """
+    INSERT INTO post_search (rowid, title, body, summary, key_insight)
+    SELECT posts.id, posts.title, coalesce(posts.body, ''),
+           coalesce(post_analyses.summary, ''), coalesce(post_analyses.key_insight, '')
+    FROM posts LEFT JOIN post_analyses ON post_analyses.post_id = posts.id
+    """,
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS post_search_analysis_delete",
+    "DROP TRIGGER IF EXISTS post_search_analysis_update",
+    "DROP TRIGGER IF EXISTS post_search_analysis_insert",
+    "DROP TRIGGER IF EXISTS post_search_post_delete",
+    "DROP TRIGGER IF EXISTS post_search_post_update",
+    "DROP TRIGGER IF EXISTS post_search_post_insert",
+    "DROP TABLE IF EXISTS post_search",
+]
+
+POSTGRES_UPGRADE = [
+    """
+    CREATE TABLE post_search (
+        post_id INTEGER PRIMARY KEY REFERENCES posts (id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL
+    )
+    """,
+    "CREATE INDEX ix_post_search_document ON post_search USING GIN (document)",
+    """
+    CREATE FUNCTION post_search_refresh(target_id INTEGER) RETURNS VOID AS $$
+        INSERT INTO post_search (post_id, document)
+        SELECT posts.id,
+               setweight(to_tsvector('english', coalesce(posts.title, '')), 'A')
+               || setweight(to_tsvector('english', coalesce(post_analyses.summary, '')
+                            || ' ' || coalesce(post_analyses.key_insight, '')), 'B')
+               || setweight(to_tsvector('english', coalesce(posts.body, '')), 'C')
+        FROM posts LEFT JOIN post_analyses ON post_analyses.post_id = posts.id
+        WHERE posts.id = target_id
+        ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document;
+    $$ LANGUAGE sql
+    """,
+    """
+    CREATE FUNCTION post_search_post_changed() RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM post_search_refresh(NEW.id);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION post_search_analysis_changed() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            PERFORM post_search_refresh(OLD.post_id);
+        ELSE
+            PERFORM post_search_refresh(NEW.post_id);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER post_search_post_changed
+    AFTER INSERT OR UPDATE OF title, body ON posts
+    FOR EACH ROW EXECUTE FUNCTION post_search_post_changed()
+    """,
+    """
+    CREATE TRIGGER post_search_analysis_changed
+    AFTER INSERT OR UPDATE OF summary, key_insight OR DELETE ON post_analyses
+    FOR EACH ROW EXECUTE FUNCTION post_search_analysis_changed()
+    """,
+    "SELECT post_search_refresh(id) FROM posts",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS post_search_analysis_changed ON post_analyses",
+    "DROP TRIGGER IF EXISTS post_search_post_changed ON posts",
+    "DROP FUNCTION IF EXISTS post_search_analysis_changed()",
+    "DROP FUNCTION IF EXISTS post_search_post_changed()",
+    "DROP FUNCTION IF EXISTS post_search_refresh(INTEGER)",
+    "DROP TABLE IF EXISTS post_search",
+]
+
+
+def _statements(sqlite, postgres):
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite
+    if dialect == "postgresql":
+        return postgres
+    # Other backends search with a LIKE scan (see newsletter.search)
+    return []
+
+
+def upgrade() -> None:
+    for statement in _statements(SQLITE_UPGRADE, POSTGRES_UPGRADE):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in _statements(SQLITE_DOWNGRADE, POSTGRES_DOWNGRADE):
+        op.execute(statement)
@@ -0,0 +1,307 @@
+"""Local stand-ins for the Reddit and Anthropic clients.
+
+Both fakes implement only the surface the pipeline touches. Each one has a
+per-request latency, an error rate and a response size, so a benchmark can
+model a slow API, a flaky API, or large posts and responses without credentials
+or network access. Generated text is deterministic per post, and varied enough
+that near-duplicate detection does not collapse the whole corpus.
+"""
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import anthropic
+import httpx
+
+from newsletter.analyzer.prompts import (
+    CATEGORIZATION_SYSTEM,
+    MIN_CACHEABLE_PREFIX_TOKENS,
+    SYNTHESIS_SECTION_USER,
+    SYNTHESIS_TITLE_USER,
+    SYNTHESIS_USER,
+)
+
+_WORDS = [
+    "agent", "prompt", "context", "token", "model", "cursor", "copilot", "claude", "mcp",
+    "server", "refactor", "test", "review", "diff", "commit", "editor", "plugin", "local",
+    "llama", "latency", "cache", "workflow", "config", "rules", "memory", "subagent",
+    "benchmark", "release", "pricing", "limit", "bug", "fix", "feature", "tool", "shell",
+    "python", "rust", "typescript", "repo", "branch", "terminal", "vision", "reasoning",
+    "planning", "hooks", "skills", "sandbox", "docs", "api", "schema", "migration",
+]
+_CATEGORIES = ["news", "best_practices", "prompts_techniques", "tools_integrations", "community"]
+_TOOL_TAGS = ["claude_code", "copilot", "cursor", "chatgpt", "local_llm", "mcp", "general"]
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    words: List[str] = []
+    length = 0
+    while length < chars:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+@dataclass
+class Profile:
+    """Latency (seconds), failure probability and payload size of one fake backend."""
+
+    latency: float = 0.0
+    error_rate: float = 0.0
+    size: int = 500  # Reddit: body characters per post; Claude: summary characters per item
+    seed: int = 0
+
+    def wait(self, rng: random.Random) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and rng.random() < self.error_rate:
+            raise FakeBackendError("injected failure")
+
+
+class FakeBackendError(Exception):
+    """Raised by a fake backend to simulate a failed request."""
+
+
+# --- Reddit ----------------------------------------------------------------
+
+
+class _FakeComments(list):
+    def replace_more(self, limit: int = 0) -> None:
+        pass
+
+
+class _FakeSubmission:
+    def __init__(self, reddit: "FakeReddit", subreddit: str, index: int) -> None:
+        rng = random.Random(f"{reddit.profile.seed}:{subreddit}:{index}")
+        self._reddit = reddit
+        self.id = f"{subreddit.lower()[:12]}x{index:x}"
+        self.stickied = False
+        self.title = _text(rng, 60).capitalize()
+        self.selftext = _text(rng, reddit.profile.size)
+        self.url = f"https://example.com/{subreddit}/{index}"
+        self.permalink = f"/r/{subreddit}/comments/{self.id}/"
+        self.author = f"user{rng.randrange(10_000)}"
+        self.score = rng.randrange(1, 5_000)
+        self.num_comments = rng.randrange(0, 400)
+        self.created_utc = time.time() - rng.randrange(0, 20 * 3600)
+        self._rng = rng
+
+    @property
+    def comments(self) -> _FakeComments:
+        # PRAW fetches the comment tree on first access
+        self._reddit.request()
+        return _FakeComments(
+            SimpleNamespace(body=_text(self._rng, 240), author="commenter", score=10 - i)
+            for i in range(5)
+        )
+
+
+class _FakeSubreddit:
+    def __init__(self, reddit: "FakeReddit", name: str) -> None:
+        self._reddit = reddit
+        self._name = name
+
+    def hot(self, limit: int) -> List[_FakeSubmission]:
+        self._reddit.request()
+        count = min(limit, self._reddit.posts_per_subreddit)
+        return [_FakeSubmission(self._reddit, self._name, i) for i in range(count)]
+
+    def top(self, time_filter: str, limit: int) -> List[_FakeSubmission]:
+        return self.hot(limit)
+
+
+class FakeReddit:
+    """Stands in for ``praw.Reddit``: listings, lazily fetched comments and ``info``."""
+
+    def __init__(self, profile: Profile, posts_per_subreddit: int) -> None:
+        self.profile = profile
+        self.posts_per_subreddit = posts_per_subreddit
+        self._rng = random.Random(profile.seed)
+        self._lock = threading.Lock()
+
+    def request(self) -> random.Random:
+        with self._lock:
+            rng = random.Random(self._rng.random())
+        self.profile.wait(rng)
+        return rng
+
+    def subreddit(self, name: str) -> _FakeSubreddit:
+        return _FakeSubreddit(self, name)
+
+    def info(self, fullnames: List[str]) -> List[SimpleNamespace]:
+        rng = self.request()
+        return [
+            SimpleNamespace(id=name[3:], score=rng.randrange(1, 5_000), num_comments=10)
+            for name in fullnames
+        ]
+
+
+# --- Anthropic -------------------------------------------------------------
+
+
+def _flatten(content: Any) -> str:
+    if isinstance(content, list):
+        return "".join(block.get("text", "") for block in content)
+    return content or ""
+
+
+def _cached_prefix(system: Any) -> str:
+    """System text up to the last block marked with ``cache_control``."""
+    if not isinstance(system, list):
+        return ""
+    marked = [i for i, block in enumerate(system) if "cache_control" in block]
+    return _flatten(system[: marked[-1] + 1]) if marked else ""
+
+
+def _trailing_json(message: str, template: str) -> Any:
+    """The JSON payload a prompt template ends with, located by the line before it."""
+    marker = template.splitlines()[-2] + "\n"
+    return json.loads(message.rsplit(marker, 1)[1])
+
+
+def _starts_like(message: str, template: str) -> bool:
+    return message.startswith(template.split("\n", 1)[0].split("{", 1)[0])
+
+
+class _FakeMessages:
+    def __init__(self, client: "FakeAnthropic") -> None:
+        self._client = client
+
+    def create(self, **params: Any) -> SimpleNamespace:
+        return self._client.respond(params)
+
+    def stream(self, **params: Any) -> "_FakeStream":
+        return _FakeStream(self._client.respond(params))
+
+
+class _FakeStream:
+    CHUNK = 64
+
+    def __init__(self, message: SimpleNamespace) -> None:
+        self._message = message
+
+    def __enter__(self) -> "_FakeStream":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+    @property
+    def text_stream(self):
+        text = self._message.content[0].text
+        for i in range(0, len(text), self.CHUNK):
+            yield text[i : i + self.CHUNK]
+
+    def get_final_message(self) -> SimpleNamespace:
+        return self._message
+
+    def get_final_text(self) -> str:
+        return self._message.content[0].text
+
+
+class FakeAnthropic:
+    """Stands in for ``anthropic.Anthropic``; answers every prompt the pipeline sends.
+
+    ``profile`` is class-level because the pipeline constructs its own clients.
+    """
+
+    profile = Profile()
+    _rng = random.Random(0)
+    _lock = threading.Lock()
+    _prompt_cache: set = set()
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.messages = _FakeMessages(self)
+
+    @classmethod
+    def configure(cls, profile: Profile) -> None:
+        cls.profile = profile
+        cls._rng = random.Random(profile.seed)
+        cls._prompt_cache = set()
+
+    def respond(self, params: Dict[str, Any]) -> SimpleNamespace:
+        with self._lock:
+            rng = random.Random(self._rng.random())
+        try:
+            self.profile.wait(rng)
+        except FakeBackendError:
+            request = httpx.Request("POST", "https://fake.anthropic.invalid/v1/messages")
+            raise anthropic.APIConnectionError(request=request) from None
+
+        system = _flatten(params.get("system"))
+        message = _flatten(params["messages"][0]["content"])
+        if CATEGORIZATION_SYSTEM in system:
+            text = self._categorize(message, rng)
+        elif _starts_like(message, SYNTHESIS_SECTION_USER):
+            text = json.dumps(self._section(_trailing_json(message, SYNTHESIS_SECTION_USER), rng))
+        elif _starts_like(message, SYNTHESIS_TITLE_USER):
+            text = json.dumps({"edition_title": _text(rng, 40).title()})
+        elif _starts_like(message, SYNTHESIS_USER):
+            grouped = _trailing_json(message, SYNTHESIS_USER)
+            text = json.dumps({
+                "edition_title": _text(rng, 40).title(),
+                "sections": {key: self._section(posts, rng) for key, posts in grouped.items()},
+            })
+        else:
+            text = "{}"
+
+        # Mirror the API's prompt cache: a marked prefix at or above the minimum
+        # is written on first use and read afterwards, and is not billed as input.
+        prefix = _cached_prefix(params.get("system"))
+        cached = len(prefix) // 4 if len(prefix) // 4 >= MIN_CACHEABLE_PREFIX_TOKENS else 0
+        with self._lock:
+            hit = cached and prefix in self._prompt_cache
+            if cached:
+                self._prompt_cache.add(prefix)
+
+        text, stop_reason = self._truncate(text, params.get("max_tokens", 4096))
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=text)],
+            stop_reason=stop_reason,
+            usage=SimpleNamespace(
+                input_tokens=(len(system) + len(message)) // 4 - cached,
+                output_tokens=len(text) // 4,
+                cache_read_input_tokens=cached if hit else 0,
+                cache_creation_input_tokens=0 if hit else cached,
+            ),
+        )
+
+    def _categorize(self, message: str, rng: random.Random) -> str:
+        posts = json.loads(message.split("Posts:\n", 1)[1])
+        return json.dumps([
+            {
+                "reddit_id": post["id"],
+                "category": rng.choice(_CATEGORIES),
+                "relevance_score": round(rng.random(), 2),
+                "quality_score": round(rng.random(), 2),
+                "tool_tags": rng.sample(_TOOL_TAGS, 2),
+                "summary": _text(rng, self.profile.size),
+                "key_insight": _text(rng, self.profile.size // 3),
+            }
+            for post in posts
+        ])
+
+    def _section(self, posts: List[Dict[str, Any]], rng: random.Random) -> Dict[str, Any]:
+        return {
+            "intro": _text(rng, 120),
+            "items": [
+                {
+                    "reddit_id": post["reddit_id"],
+                    "headline": _text(rng, 60).capitalize(),
+                    "blurb": _text(rng, self.profile.size),
+                }
+                for post in posts
+            ],
+        }
+
+    @staticmethod
+    def _truncate(text: str, max_tokens: int) -> Tuple[str, Optional[str]]:
+        # Same 4-characters-per-token estimate as the usage numbers above
+        if len(text) > max_tokens * 4:
+            return text[: max_tokens * 4], "max_tokens"
+        return text, "end_turn"
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""Offline pipeline benchmarks against fake Reddit and Anthropic backends.
+
+Each (scenario, size) case runs in fresh processes against its own SQLite
+database, migrated with Alembic so the search triggers are in place. Input data
+is seeded in one process and the timed step runs in another, so peak RSS
+belongs to the step alone. Results are written as JSON; pass an earlier file
+to ``--compare`` to print the change per case.
+
+    python benchmarks/run.py --sizes 100,1000 --output before.json
+    python benchmarks/run.py --sizes 100,1000 --output after.json --compare before.json
+"""
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+SCENARIOS = ("scrape", "categorize", "synthesize", "pipeline")
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+SUBREDDITS = 10  # fake subreddits the posts are spread over
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _in_fresh_process(fn: Callable[..., Any], *args: Any) -> Any:
+    # spawn, not fork: no engine, cache or allocator state carries over between cases
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def _setup(database: Path, posts: int, options: Dict[str, Any]) -> None:
+    """Point the app at ``database`` and swap both API clients for fakes."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    logging.basicConfig()
+    logging.getLogger().setLevel(logging.INFO if options["verbose"] else logging.WARNING)
+
+    import anthropic
+    from fakes import FakeAnthropic, FakeReddit, Profile
+    from newsletter import config
+    from newsletter.scraper import metrics, reddit
+
+    per_subreddit = math.ceil(posts / SUBREDDITS)
+    sub_config = config.get_subreddit_config()
+    sub_config["subreddits"] = [
+        {"name": f"bench{i}", "fetch_limit": per_subreddit, "sort": "hot"}
+        for i in range(SUBREDDITS)
+    ]
+    # Measure the pipeline, not the politeness delay
+    sub_config.setdefault("scrape", {})["requests_per_minute"] = 0
+    config.get_newsletter_config().setdefault("pipeline", {})["mode"] = options["mode"]
+
+    reddit_profile = Profile(
+        latency=options["reddit_latency"],
+        error_rate=options["reddit_error_rate"],
+        size=options["body_chars"],
+    )
+
+    def _fake_client() -> FakeReddit:
+        return FakeReddit(reddit_profile, per_subreddit)
+
+    reddit._get_reddit_client = _fake_client
+    metrics._get_reddit_client = _fake_client
+    FakeAnthropic.configure(Profile(
+        latency=options["claude_latency"],
+        error_rate=options["claude_error_rate"],
+        size=options["summary_chars"],
+    ))
+    anthropic.Anthropic = FakeAnthropic
+
+
+def _migrate(database: Path) -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    # No ini file, so env.py leaves logging alone
+    alembic_config = Config()
+    alembic_config.set_main_option("script_location", str(ROOT / "alembic"))
+    alembic_config.set_main_option("sqlalchemy.url", f"sqlite:///{database}")
+    command.upgrade(alembic_config, "head")
+
+
+def _seed_analyses(session: Any) -> None:
+    """Analyses for every scraped post, written directly instead of through Claude."""
+    import random
+
+    from sqlalchemy import insert
+
+    from fakes import _CATEGORIES, _TOOL_TAGS
+    from newsletter.models import Post, PostAnalysis
+
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    post_ids = [post_id for (post_id,) in session.query(Post.id)]
+    for start in range(0, len(post_ids), 5_000):
+        session.execute(insert(PostAnalysis), [
+            {
+                "post_id": post_id,
+                "category": rng.choice(_CATEGORIES),
+                "relevance_score": rng.random(),
+                "quality_score": rng.random(),
+                "tool_tags": rng.sample(_TOOL_TAGS, 2),
+                "summary": "seeded summary",
+                "key_insight": "seeded insight",
+                "analyzed_at": now - timedelta(minutes=1),
+            }
+            for post_id in post_ids[start : start + 5_000]
+        ])
+    session.commit()
+
+
+def _seed(scenario: str, database: Path, posts: int, options: Dict[str, Any]) -> None:
+    """Build the database a scenario starts from (runs in its own process)."""
+    _migrate(database)
+    if scenario in ("scrape", "pipeline"):
+        return
+
+    # Seeding uses instant, reliable backends whatever the timed step uses
+    _setup(database, posts, {**options, "reddit_latency": 0.0, "reddit_error_rate": 0.0})
+    from newsletter.database import get_session_factory
+    from newsletter.scraper.reddit import run_scrape
+
+    session = get_session_factory()()
+    try:
+        run_scrape(session)
+        if scenario == "synthesize":
+            _seed_analyses(session)
+    finally:
+        session.close()
+
+
+def _measure(scenario: str, database: Path, posts: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the timed step and report wall time, SQL round trips and peak RSS."""
+    _setup(database, posts, options)
+    from sqlalchemy import event
+
+    from newsletter.analyzer.categorizer import categorize_unanalyzed_posts
+    from newsletter.analyzer.synthesizer import synthesize_newsletter
+    from newsletter.database import get_engine, get_session_factory
+    from newsletter.pipeline.orchestrator import run_pipeline
+    from newsletter.scraper.reddit import run_scrape
+
+    sql = {"statements": 0, "seconds": 0.0}
+
+    @event.listens_for(get_engine(), "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("bench_started", []).append(time.perf_counter())
+
+    @event.listens_for(get_engine(), "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        sql["statements"] += 1
+        sql["seconds"] += time.perf_counter() - conn.info["bench_started"].pop()
+
+    session = get_session_factory()()
+    start = time.perf_counter()
+    try:
+        if scenario == "scrape":
+            run = run_scrape(session)
+            details = {"total_posts": run.total_posts, "new_posts": run.new_posts}
+        elif scenario == "categorize":
+            details = {"analyzed": categorize_unanalyzed_posts(session)}
+        elif scenario == "synthesize":
+            newsletter = synthesize_newsletter(session)
+            details = {"newsletter_posts": newsletter.post_count}
+        else:
+            newsletter = run_pipeline(session)
+            details = {"newsletter_posts": newsletter.post_count if newsletter else 0}
+        error = None
+    except Exception as e:
+        details, error = {}, f"{type(e).__name__}: {e}"
+    finally:
+        wall = time.perf_counter() - start
+        session.close()
+
+    return {
+        "scenario": scenario,
+        "posts": posts,
+        "wall_seconds": round(wall, 3),
+        "db_round_trips": sql["statements"],
+        "db_seconds": round(sql["seconds"], 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "details": details,
+        "error": error,
+    }
+
+
+def run_case(scenario: str, posts: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="newsletter-bench-") as tmp:
+        database = Path(tmp) / "bench.db"
+        _in_fresh_process(_seed, scenario, database, posts, options)
+        return _in_fresh_process(_measure, scenario, database, posts, options)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_result(result: Dict[str, Any]) -> None:
+    status = f"  ERROR {result['error']}" if result["error"] else ""
+    print(
+        f"{result['scenario']:<11} {result['posts']:>7} posts  "
+        f"{result['wall_seconds']:>9.2f}s  {result['db_round_trips']:>8} SQL  "
+        f"{result['peak_rss_mb']:>8.1f} MB{status}",
+        flush=True,
+    )
+
+
+def _print_comparison(baseline: Dict[str, Any], results: List[Dict[str, Any]]) -> None:
+    before = {(r["scenario"], r["posts"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline.get('git_revision') or 'baseline'}:")
+    for result in results:
+        old = before.get((result["scenario"], result["posts"]))
+        if old is None:
+            continue
+        changes = []
+        for key, label in (
+            ("wall_seconds", "time"), ("db_round_trips", "SQL"), ("peak_rss_mb", "RSS")
+        ):
+            if old[key]:
+                changes.append(f"{label} {(result[key] - old[key]) / old[key]:+.0%}")
+        print(f"{result['scenario']:<11} {result['posts']:>7} posts  {'  '.join(changes)}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="comma-separated post counts",
+    )
+    parser.add_argument(
+        "--scenarios", default=",".join(SCENARIOS), help=f"subset of {','.join(SCENARIOS)}"
+    )
+    parser.add_argument("--reddit-latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--claude-latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument(
+        "--reddit-error-rate", type=float, default=0.0, help="fraction of Reddit requests that fail"
+    )
+    parser.add_argument(
+        "--claude-error-rate", type=float, default=0.0, help="fraction of Claude requests that fail"
+    )
+    parser.add_argument("--body-chars", type=int, default=500, help="fake post body size")
+    parser.add_argument("--summary-chars", type=int, default=200, help="fake summary size")
+    parser.add_argument("--mode", choices=("sequential", "streaming"), default="sequential")
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    parser.add_argument("--compare", type=Path, help="earlier results file to diff against")
+    parser.add_argument("--verbose", action="store_true", help="show pipeline logs")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    options = {
+        "reddit_latency": args.reddit_latency,
+        "claude_latency": args.claude_latency,
+        "reddit_error_rate": args.reddit_error_rate,
+        "claude_error_rate": args.claude_error_rate,
+        "body_chars": args.body_chars,
+        "summary_chars": args.summary_chars,
+        "mode": args.mode,
+        "verbose": args.verbose,
+    }
+
+    results = []
+    for posts in sizes:
+        for scenario in scenarios:
+            result = run_case(scenario, posts, options)
+            _print_result(result)
+            results.append(result)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": options,
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        _print_comparison(json.loads(args.compare.read_text()), results)
+
+
+if __name__ == "__main__":
+    main()
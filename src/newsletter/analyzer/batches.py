@@ -0,0 +1,212 @@
+"""Offline categorization through Anthropic's Message Batches API.
+
+``submit_categorization_batches`` sends every pending batch in one Message Batch
+and returns immediately; ``collect_categorization_batches`` later polls for ended
+batches and stores their results. Each request is tracked in
+``categorization_batches`` so collection is idempotent and submitted posts are
+not picked up again by the synchronous categorizer.
+"""
+import json
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Set
+
+from sqlalchemy.orm import Session
+
+from newsletter.config import get_newsletter_config
+from newsletter.models import CategorizationBatch, Post, PostAnalysis
+from newsletter.analyzer.cache import post_fingerprint
+from newsletter.analyzer.categorizer import (
+    OUTPUT_HEADROOM,
+    _BatchResults,
+    _build_categorize_params,
+    _cluster_duplicates,
+    _dedupe_with_cache,
+    _extract_json_text,
+    _find_unanalyzed_posts,
+    _plan_batches,
+    _posts_to_json,
+)
+from newsletter.analyzer.client import get_anthropic_client
+from newsletter.analyzer.streaming import JsonArrayStreamParser
+from newsletter.telemetry import record_usage
+
+logger = logging.getLogger(__name__)
+
+
+def submit_categorization_batches(session: Session) -> int:
+    """Submit all unanalyzed posts as one Message Batch; returns the number of posts submitted."""
+    nl_config = get_newsletter_config()
+    claude_config = nl_config.get("claude", {})
+    model = claude_config.get("categorization_model", "claude-sonnet-4-20250514")
+    max_tokens = claude_config.get("max_tokens_categorization", 4096)
+    comment_token_budget = claude_config.get("comment_token_budget", 100)
+
+    _cluster_duplicates(session, nl_config.get("dedup", {}))
+    unanalyzed = _find_unanalyzed_posts(session)
+    if not unanalyzed:
+        logger.info("No unanalyzed posts found")
+        return 0
+
+    unanalyzed, _, copies, _ = _dedupe_with_cache(
+        session, unanalyzed, nl_config.get("categorization_cache", {})
+    )
+    if not unanalyzed:
+        return 0
+
+    batches = _plan_batches(
+        unanalyzed,
+        input_token_budget=claude_config.get("categorization_input_token_budget", 30000),
+        output_token_budget=int(max_tokens * OUTPUT_HEADROOM),
+        output_tokens_per_post=claude_config.get("categorization_output_tokens_per_post", 150),
+        comment_token_budget=comment_token_budget,
+    )
+
+    requests = []
+    rows = []
+    for batch in batches:
+        custom_id = f"cat-{uuid.uuid4().hex}"
+        requests.append({
+            "custom_id": custom_id,
+            "params": _build_categorize_params(
+                _posts_to_json(batch, comment_token_budget), model, max_tokens
+            ),
+        })
+        rows.append(CategorizationBatch(
+            custom_id=custom_id,
+            post_ids=[post.id for post in batch],
+            copies={
+                str(post.id): [copy.id for copy in copies[post.id]]
+                for post in batch
+                if copies.get(post.id)
+            },
+        ))
+
+    message_batch = get_anthropic_client().messages.batches.create(requests=requests)
+    for row in rows:
+        row.anthropic_batch_id = message_batch.id
+    session.add_all(rows)
+    session.commit()
+
+    submitted = sum(len(row.post_ids) for row in rows)
+    logger.info(
+        f"Submitted {submitted} posts in {len(requests)} requests "
+        f"as message batch {message_batch.id}"
+    )
+    return submitted
+
+
+def _message_results(message: Any) -> List[Dict[str, Any]]:
+    text = "".join(block.text for block in message.content if block.type == "text")
+    if message.stop_reason == "max_tokens":
+        # Keep the complete items; the rest stay unanalyzed for the next run
+        return JsonArrayStreamParser().feed(text)
+    return json.loads(_extract_json_text(text))
+
+
+def collect_categorization_batches(session: Session) -> int:
+    """Store results from every ended Message Batch; returns the number of analyses saved."""
+    pending: Dict[str, Dict[str, CategorizationBatch]] = defaultdict(dict)
+    for row in session.query(CategorizationBatch).filter(
+        CategorizationBatch.status == "submitted"
+    ):
+        pending[row.anthropic_batch_id][row.custom_id] = row
+
+    if not pending:
+        logger.info("No submitted categorization batches to collect")
+        return 0
+
+    client = get_anthropic_client()
+    cache_enabled = get_newsletter_config().get("categorization_cache", {}).get("enabled", True)
+    total_saved = 0
+
+    for batch_id, rows in pending.items():
+        message_batch = client.messages.batches.retrieve(batch_id)
+        if message_batch.processing_status != "ended":
+            logger.info(f"Message batch {batch_id} is still {message_batch.processing_status}")
+            continue
+
+        for entry in client.messages.batches.results(batch_id):
+            row = rows.get(entry.custom_id)
+            if row is None or row.status != "submitted":
+                continue
+
+            if entry.result.type != "succeeded":
+                row.status = "failed"
+                row.error = entry.result.type
+                row.collected_at = datetime.now(timezone.utc)
+                session.commit()
+                logger.warning(f"Request {entry.custom_id} in {batch_id}: {entry.result.type}")
+                continue
+
+            # Batch latency isn't observable per request; count tokens only
+            record_usage("categorize_batch", entry.result.message)
+            try:
+                results = _message_results(entry.result.message)
+            except Exception as e:
+                row.status = "failed"
+                row.error = str(e)
+                row.collected_at = datetime.now(timezone.utc)
+                session.commit()
+                logger.error(f"Could not parse request {entry.custom_id} in {batch_id}: {e}")
+                continue
+
+            total_saved += _save_row_results(session, row, results, cache_enabled)
+            row.status = "collected"
+            row.collected_at = datetime.now(timezone.utc)
+            session.commit()
+
+        # Requests missing from the results file will never arrive
+        for row in rows.values():
+            if row.status == "submitted":
+                row.status = "failed"
+                row.error = "missing from batch results"
+                row.collected_at = datetime.now(timezone.utc)
+        session.commit()
+        logger.info(f"Collected message batch {batch_id}")
+
+    # Duplicates of the posts just analyzed
+    total_saved += _cluster_duplicates(session, get_newsletter_config().get("dedup", {}))
+    return total_saved
+
+
+def _save_row_results(
+    session: Session,
+    row: CategorizationBatch,
+    results: List[Dict[str, Any]],
+    cache_enabled: bool,
+) -> int:
+    copy_ids = {int(rep_id): ids for rep_id, ids in (row.copies or {}).items()}
+    wanted_ids = set(row.post_ids) | {i for ids in copy_ids.values() for i in ids}
+    posts = {post.id: post for post in session.query(Post).filter(Post.id.in_(wanted_ids))}
+
+    # Posts analyzed since submission (e.g. by a synchronous run) are left alone
+    analyzed_ids: Set[int] = {
+        post_id
+        for (post_id,) in session.query(PostAnalysis.post_id).filter(
+            PostAnalysis.post_id.in_(wanted_ids)
+        )
+    }
+
+    batch = [posts[i] for i in row.post_ids if i in posts and i not in analyzed_ids]
+    copies = {
+        rep_id: [posts[i] for i in ids if i in posts and i not in analyzed_ids]
+        for rep_id, ids in copy_ids.items()
+    }
+    fingerprints = {post.id: post_fingerprint(post) for post in batch} if cache_enabled else {}
+    batch_results = _BatchResults(batch, copies)
+    written = batch_results.add(results)
+    batch_results.commit(session, fingerprints)
+
+    # Truncated or incomplete responses: once the row stops being "submitted"
+    # these posts are unanalyzed again and the next run picks them up
+    missing = batch_results.missing()
+    if missing:
+        row.error = f"{len(missing)} posts missing from results"
+        logger.warning(
+            f"Request {row.custom_id}: no result for {len(missing)} posts "
+            f"({', '.join(post.reddit_id for post in missing)}); returning them to the queue"
+        )
+    return written
@@ -0,0 +1,164 @@
+"""Content-fingerprint cache for categorization results.
+
+Crossposts and reposts of the same link share a fingerprint, so only the first
+copy is sent to Claude; later copies reuse the stored result.
+"""
+import hashlib
+import logging
+import re
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from newsletter.models import CategorizationCache, Post
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_CHUNK_SIZE = 500  # fingerprints per IN query
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "ref", "ref_src", "ref_source", "si", "share_id"}
+_HOST_PREFIXES = ("www.", "old.", "new.", "m.", "np.")
+_REDDIT_POST_RE = re.compile(r"^(?:/r/[^/]+)?/comments/([a-z0-9]+)")
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def canonicalize_url(url: str) -> str:
+    """Reduce a URL to a stable form: no scheme, tracking params, fragment or trailing slash."""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+
+    path = parts.path.rstrip("/")
+    # Self posts and crossposts point at a comments page; key those on the post id
+    if host in ("reddit.com", "redd.it"):
+        match = _REDDIT_POST_RE.match(path.lower())
+        if match:
+            return f"reddit:{match.group(1)}"
+
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    canonical = host + path
+    if query:
+        canonical += "?" + urlencode(query)
+    return canonical
+
+
+def normalize_text(text: str) -> str:
+    """Casefolded, NFKC-normalized words of ``text`` with punctuation removed."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
+
+
+def post_fingerprint(post: Post) -> str:
+    """SHA-256 over the canonical URL plus normalized title and body."""
+    material = "\n".join([
+        canonicalize_url(post.url),
+        normalize_text(post.title),
+        normalize_text(post.body),
+    ])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def get_cached_results(
+    session: Session, fingerprints: Iterable[str], ttl_days: int
+) -> Dict[str, Dict[str, Any]]:
+    """Return unexpired cached results by fingerprint and record the hits."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=ttl_days)
+    wanted = list(set(fingerprints))
+    found: Dict[str, Dict[str, Any]] = {}
+
+    for i in range(0, len(wanted), LOOKUP_CHUNK_SIZE):
+        chunk = wanted[i : i + LOOKUP_CHUNK_SIZE]
+        rows = (
+            session.query(CategorizationCache.fingerprint, CategorizationCache.result)
+            .filter(
+                CategorizationCache.fingerprint.in_(chunk),
+                CategorizationCache.created_at >= cutoff,
+            )
+            .all()
+        )
+        found.update(dict(rows))
+
+    hits = list(found)
+    now = datetime.now(timezone.utc)
+    for i in range(0, len(hits), LOOKUP_CHUNK_SIZE):
+        (
+            session.query(CategorizationCache)
+            .filter(CategorizationCache.fingerprint.in_(hits[i : i + LOOKUP_CHUNK_SIZE]))
+            .update(
+                {
+                    CategorizationCache.hit_count: CategorizationCache.hit_count + 1,
+                    CategorizationCache.last_hit_at: now,
+                },
+                synchronize_session=False,
+            )
+        )
+    return found
+
+
+def store_results(session: Session, results: Dict[str, Dict[str, Any]]) -> None:
+    """Insert or refresh cached results keyed by fingerprint (caller commits)."""
+    now = datetime.now(timezone.utc)
+    fingerprints = list(results)
+    for i in range(0, len(fingerprints), LOOKUP_CHUNK_SIZE):
+        chunk = fingerprints[i : i + LOOKUP_CHUNK_SIZE]
+        existing = {
+            entry.fingerprint: entry
+            for entry in session.query(CategorizationCache).filter(
+                CategorizationCache.fingerprint.in_(chunk)
+            )
+        }
+        new_rows = []
+        for fingerprint in chunk:
+            result = {k: v for k, v in results[fingerprint].items() if k != "reddit_id"}
+            entry = existing.get(fingerprint)
+            if entry is None:
+                new_rows.append({"fingerprint": fingerprint, "result": result})
+            else:
+                entry.result = result
+                entry.created_at = now
+        if new_rows:
+            session.execute(insert(CategorizationCache), new_rows)
+
+
+def evict_stale_entries(session: Session, ttl_days: int, max_entries: int) -> int:
+    """Drop expired entries, then the least recently used beyond max_entries."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=ttl_days)
+    evicted = (
+        session.query(CategorizationCache)
+        .filter(CategorizationCache.created_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+
+    overflow = session.query(func.count(CategorizationCache.id)).scalar() - max_entries
+    if overflow > 0:
+        last_used = func.coalesce(CategorizationCache.last_hit_at, CategorizationCache.created_at)
+        stale_ids: List[int] = [
+            entry_id
+            for (entry_id,) in session.query(CategorizationCache.id)
+            .order_by(last_used.asc())
+            .limit(overflow)
+        ]
+        for i in range(0, len(stale_ids), LOOKUP_CHUNK_SIZE):
+            evicted += (
+                session.query(CategorizationCache)
+                .filter(CategorizationCache.id.in_(stale_ids[i : i + LOOKUP_CHUNK_SIZE]))
+                .delete(synchronize_session=False)
+            )
+
+    session.commit()
+    if evicted:
+        logger.info(f"Evicted {evicted} categorization cache entries")
+    return evicted
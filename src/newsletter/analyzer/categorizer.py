@@ -1,113 +1,581 @@
 import json
 import logging
-from typing import Any, Dict, List
+import queue
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import anthropic
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from newsletter.config import get_settings, get_newsletter_config
-from newsletter.models import Post, PostAnalysis
-from newsletter.analyzer.prompts import CATEGORIZATION_SYSTEM, CATEGORIZATION_USER
+from newsletter.config import get_newsletter_config
+from newsletter.models import CategorizationBatch, Post, PostAnalysis
+from newsletter.analyzer.cache import (
+    evict_stale_entries,
+    get_cached_results,
+    post_fingerprint,
+    store_results,
+)
+from newsletter.analyzer.client import get_anthropic_client
+from newsletter.analyzer.dedup import assign_duplicate_clusters, inherit_cluster_analyses
+from newsletter.analyzer.prompts import (
+    CATEGORIZATION_INSTRUCTIONS,
+    CATEGORIZATION_SYSTEM,
+    CATEGORIZATION_USER,
+    MIN_CACHEABLE_PREFIX_TOKENS,
+)
+from newsletter.analyzer.streaming import JsonArrayStreamParser
+from newsletter.telemetry import observe_claude, record_retry, submit_in_context
 
 logger = logging.getLogger(__name__)
 
-BATCH_SIZE = 50  # posts per Claude call
+BATCH_SIZE = 50  # upper bound on posts per Claude call
+CHARS_PER_TOKEN = 4  # rough local estimate for English text and JSON
+OUTPUT_HEADROOM = 0.85  # fraction of max_tokens a planned batch may fill
+CATEGORIES = {
+    "news",
+    "best_practices",
+    "prompts_techniques",
+    "tools_integrations",
+    "community",
+    "quick_links",
+    "skip",
+}
 
 
-def _posts_to_json(posts: List[Post]) -> str:
-    items = []
-    for p in posts:
-        items.append({
-            "reddit_id": p.reddit_id,
-            "subreddit": p.subreddit,
-            "title": p.title,
-            "body": p.body,
-            "score": p.score,
-            "num_comments": p.num_comments,
-            "top_comments": p.top_comments,
-        })
-    return json.dumps(items, indent=2)
+class TruncatedResponseError(Exception):
+    """Claude stopped at max_tokens; carries whichever items were complete."""
 
+    def __init__(self, partial_results: List[Dict[str, Any]]) -> None:
+        super().__init__(f"response truncated after {len(partial_results)} complete items")
+        self.partial_results = partial_results
 
-def _call_claude_categorize(
-    client: anthropic.Anthropic, posts_json: str, model: str, max_tokens: int
-) -> List[Dict[str, Any]]:
-    user_prompt = CATEGORIZATION_USER.format(posts_json=posts_json)
 
-    response = client.messages.create(
-        model=model,
-        max_tokens=max_tokens,
-        system=CATEGORIZATION_SYSTEM,
-        messages=[{"role": "user", "content": user_prompt}],
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _compact_payload(p: Post, comment_token_budget: int) -> Dict[str, Any]:
+    """Minified-key payload; comments are kept in order until the token budget runs out."""
+    payload: Dict[str, Any] = {
+        "id": p.reddit_id,
+        "sr": p.subreddit,
+        "t": p.title,
+        "s": p.score,
+        "nc": p.num_comments,
+    }
+    if p.body:
+        payload["b"] = p.body
+
+    comments = []
+    remaining = comment_token_budget * CHARS_PER_TOKEN
+    for comment in p.top_comments or []:
+        if remaining <= 0:
+            break
+        text = comment.get("body", "")[:remaining]
+        remaining -= len(text)
+        comments.append([comment.get("score", 0), text])
+    if comments:
+        payload["c"] = comments
+    return payload
+
+
+def _posts_to_json(posts: List[Post], comment_token_budget: int) -> str:
+    return json.dumps(
+        [_compact_payload(p, comment_token_budget) for p in posts],
+        separators=(",", ":"),
+        ensure_ascii=False,
     )
 
-    text = response.content[0].text
+
+def _plan_batches(
+    posts: List[Post],
+    input_token_budget: int,
+    output_token_budget: int,
+    output_tokens_per_post: int,
+    comment_token_budget: int,
+) -> List[List[Post]]:
+    """Greedily pack posts into batches that fit both the input and output budgets."""
+    max_posts = max(1, min(BATCH_SIZE, output_token_budget // output_tokens_per_post))
+
+    batches: List[List[Post]] = []
+    batch: List[Post] = []
+    batch_tokens = 0
+    for post in posts:
+        post_tokens = _estimate_tokens(_posts_to_json([post], comment_token_budget))
+        if batch and (
+            len(batch) >= max_posts or batch_tokens + post_tokens > input_token_budget
+        ):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(post)
+        batch_tokens += post_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _extract_json_text(text: str) -> str:
     # Extract JSON from markdown code block if present
     if "```json" in text:
         text = text.split("```json")[1].split("```")[0]
     elif "```" in text:
         text = text.split("```")[1].split("```")[0]
+    return text.strip()
+
+
+# A prefix below the model's minimum is never cached, so only mark it when it qualifies
+_PREFIX_CACHEABLE = (
+    _estimate_tokens(CATEGORIZATION_SYSTEM + CATEGORIZATION_INSTRUCTIONS)
+    >= MIN_CACHEABLE_PREFIX_TOKENS
+)
+
+
+def _build_categorize_params(posts_json: str, model: str, max_tokens: int) -> Dict[str, Any]:
+    """Request parameters for one batch; the static prefix is marked for prompt caching."""
+    instructions: Dict[str, Any] = {"type": "text", "text": CATEGORIZATION_INSTRUCTIONS}
+    if _PREFIX_CACHEABLE:
+        instructions["cache_control"] = {"type": "ephemeral"}
+    return {
+        "model": model,
+        "max_tokens": max_tokens,
+        "system": [{"type": "text", "text": CATEGORIZATION_SYSTEM}, instructions],
+        "messages": [
+            {"role": "user", "content": CATEGORIZATION_USER.format(posts_json=posts_json)}
+        ],
+    }
+
+
+def _log_usage(response: Any) -> None:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    logger.info(
+        f"  Claude usage: {usage.input_tokens} input "
+        f"({getattr(usage, 'cache_read_input_tokens', 0) or 0} cache read, "
+        f"{getattr(usage, 'cache_creation_input_tokens', 0) or 0} cache write), "
+        f"{usage.output_tokens} output"
+    )
+
+
+def _call_claude_categorize(
+    client: anthropic.Anthropic,
+    posts_json: str,
+    model: str,
+    max_tokens: int,
+    on_item: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """Categorize one batch of posts.
 
-    return json.loads(text.strip())
+    When ``on_item`` is given the response is streamed and each result object is
+    handed to it as soon as it is complete, before the rest of the array arrives.
+    """
+    params = _build_categorize_params(posts_json, model, max_tokens)
 
+    with observe_claude("categorize") as call:
+        if on_item is None:
+            response = client.messages.create(**params)
+            _log_usage(response)
+            call.record_usage(response)
+            text = response.content[0].text
+            if response.stop_reason == "max_tokens":
+                call.outcome = "truncated"
+                raise TruncatedResponseError(JsonArrayStreamParser().feed(text))
+            return json.loads(_extract_json_text(text))
 
-def categorize_unanalyzed_posts(session: Session) -> int:
-    settings = get_settings()
-    nl_config = get_newsletter_config()
-    claude_config = nl_config.get("claude", {})
+        parser = JsonArrayStreamParser()
+        items: List[Dict[str, Any]] = []
+        with client.messages.stream(**params) as stream:
+            for text in stream.text_stream:
+                for item in parser.feed(text):
+                    items.append(item)
+                    on_item(item)
+            response = stream.get_final_message()
+
+        _log_usage(response)
+        call.record_usage(response)
+        if response.stop_reason == "max_tokens":
+            call.outcome = "truncated"
+            raise TruncatedResponseError(items)
+        return items
+
+
+def _is_valid_result(result: Dict[str, Any]) -> bool:
+    if result.get("category") not in CATEGORIES:
+        return False
+    try:
+        float(result.get("relevance_score", 0))
+        float(result.get("quality_score", 0))
+    except (TypeError, ValueError):
+        return False
+    return isinstance(result.get("tool_tags", []), list)
+
+
+def _analysis_row(post: Post, result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "post_id": post.id,
+        "category": result.get("category", "skip"),
+        "relevance_score": float(result.get("relevance_score", 0)),
+        "quality_score": float(result.get("quality_score", 0)),
+        "tool_tags": result.get("tool_tags", []),
+        "summary": result.get("summary", ""),
+        "key_insight": result.get("key_insight", ""),
+    }
+
+
+def _apply_cache(
+    session: Session, posts: List[Post], ttl_days: int
+) -> Tuple[List[Post], Dict[int, str], Dict[int, List[Post]], int]:
+    """Resolve cache hits and collapse same-fingerprint posts within this run.
+
+    Returns the posts still to send to Claude, each post's fingerprint, the
+    copies to fill in from each sent post's result, and the number of cache hits.
+    """
+    fingerprints = {post.id: post_fingerprint(post) for post in posts}
+    cached = get_cached_results(session, fingerprints.values(), ttl_days)
+
+    rows = []
+    representatives: Dict[str, Post] = {}
+    copies: Dict[int, List[Post]] = defaultdict(list)
+    for post in posts:
+        fingerprint = fingerprints[post.id]
+        if fingerprint in cached:
+            rows.append(_analysis_row(post, cached[fingerprint]))
+        elif fingerprint in representatives:
+            copies[representatives[fingerprint].id].append(post)
+        else:
+            representatives[fingerprint] = post
+    if rows:
+        session.execute(insert(PostAnalysis), rows)
+    session.commit()
+
+    return list(representatives.values()), fingerprints, copies, len(rows)
+
+
+class _BatchResults:
+    """Accepted results for one batch of posts, written with one INSERT and commit.
+
+    Results can be added as they stream in; nothing reaches the database until
+    ``commit``. ``copies`` are same-fingerprint posts that receive their
+    representative's result.
+    """
+
+    def __init__(self, batch: List[Post], copies: Optional[Dict[int, List[Post]]] = None) -> None:
+        self.batch = batch
+        self.saved: Dict[str, Dict[str, Any]] = {}  # reddit_id -> accepted result
+        self._copies = copies or {}
+        self._posts_by_reddit_id = {post.reddit_id: post for post in batch}
+        self._rows: List[Dict[str, Any]] = []
+
+    def add(self, results: List[Dict[str, Any]]) -> int:
+        """Accept valid results for posts not seen yet; returns the analyses added."""
+        written = 0
+        for result in results:
+            reddit_id = result.get("reddit_id")
+            post = self._posts_by_reddit_id.get(reddit_id)
+            if post is None or reddit_id in self.saved:
+                continue
+            if not _is_valid_result(result):
+                logger.warning(f"Invalid result for post {reddit_id}: {result}")
+                continue
+
+            self.saved[reddit_id] = result
+            self._rows.append(_analysis_row(post, result))
+            for copy in self._copies.get(post.id, []):
+                self._rows.append(_analysis_row(copy, result))
+            written += 1 + len(self._copies.get(post.id, []))
+        return written
+
+    def missing(self) -> List[Post]:
+        return [post for post in self.batch if post.reddit_id not in self.saved]
+
+    def commit(self, session: Session, fingerprints: Optional[Dict[int, str]] = None) -> None:
+        """Insert the accepted analyses, cache their results and commit."""
+        if self._rows:
+            session.execute(insert(PostAnalysis), self._rows)
+            self._rows = []
+        if fingerprints:
+            store_results(session, {
+                fingerprints[self._posts_by_reddit_id[reddit_id].id]: result
+                for reddit_id, result in self.saved.items()
+            })
+        session.commit()
 
-    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
-    model = claude_config.get("categorization_model", "claude-sonnet-4-20250514")
-    max_tokens = claude_config.get("max_tokens_categorization", 4096)
 
-    # Find posts without analysis
-    unanalyzed = (
+def _submitted_post_ids(session: Session) -> Set[int]:
+    """Posts, and their in-run copies, waiting in a submitted Message Batch."""
+    pending_ids: Set[int] = set()
+    for batch_post_ids, copies in session.query(
+        CategorizationBatch.post_ids, CategorizationBatch.copies
+    ).filter(CategorizationBatch.status == "submitted"):
+        pending_ids.update(batch_post_ids)
+        for copy_ids in (copies or {}).values():
+            pending_ids.update(copy_ids)
+    return pending_ids
+
+
+def _find_unanalyzed_posts(
+    session: Session,
+    post_ids: Optional[List[int]] = None,
+    pending_ids: Optional[Set[int]] = None,
+) -> List[Post]:
+    """Posts without an analysis that aren't already waiting in a submitted batch.
+
+    Near-duplicates are left out; they inherit their representative's analysis.
+    ``post_ids`` restricts the search to those posts; ``pending_ids`` reuses an
+    earlier ``_submitted_post_ids`` lookup.
+    """
+    query = (
         session.query(Post)
         .outerjoin(PostAnalysis)
-        .filter(PostAnalysis.id.is_(None))
-        .all()
+        .filter(PostAnalysis.id.is_(None), Post.duplicate_of_id.is_(None))
     )
+    if post_ids is not None:
+        query = query.filter(Post.id.in_(post_ids))
+    unanalyzed = query.all()
 
-    if not unanalyzed:
-        logger.info("No unanalyzed posts found")
+    if pending_ids is None:
+        pending_ids = _submitted_post_ids(session)
+    return [post for post in unanalyzed if post.id not in pending_ids]
+
+
+def _dedupe_with_cache(
+    session: Session, posts: List[Post], cache_config: Dict[str, Any], evict: bool = True
+) -> Tuple[List[Post], Dict[int, str], Dict[int, List[Post]], int]:
+    """Apply the categorization cache when enabled; see _apply_cache for the return value."""
+    if not cache_config.get("enabled", True):
+        return posts, {}, {}, 0
+
+    ttl_days = cache_config.get("ttl_days", 30)
+    if evict:
+        evict_stale_entries(session, ttl_days, cache_config.get("max_entries", 20000))
+    posts, fingerprints, copies, hits = _apply_cache(session, posts, ttl_days)
+    logger.info(
+        f"Categorization cache: {hits} hits, "
+        f"{sum(len(c) for c in copies.values())} in-run duplicates"
+    )
+    return posts, fingerprints, copies, hits
+
+
+def _cluster_duplicates(
+    session: Session, dedup_config: Dict[str, Any], post_ids: Optional[List[int]] = None
+) -> int:
+    """Cluster new posts and fill in members whose representative is analyzed.
+
+    Returns the number of analyses copied to members. With ``post_ids`` only
+    those posts are clustered and nothing is copied.
+    """
+    if not dedup_config.get("enabled", True):
+        return 0
+    assign_duplicate_clusters(
+        session,
+        max_distance=dedup_config.get("max_hamming_distance", 3),
+        window_days=dedup_config.get("window_days", 3),
+        post_ids=post_ids,
+    )
+    if post_ids is not None:
         return 0
+    return inherit_cluster_analyses(session)
+
+
+class _CategorizationRun:
+    """Claude requests for one categorization run, sharing one worker pool.
+
+    Posts can be added while earlier batches are still in flight, which is how
+    the streaming pipeline feeds it. Claude calls run on worker threads;
+    streamed items and batch completions come back through one queue, and
+    ``poll`` and ``finish`` write them on the calling thread, which owns
+    ``session``. Stale cache entries are evicted once, when the run starts.
+    """
+
+    def __init__(self, session: Session) -> None:
+        nl_config = get_newsletter_config()
+        claude_config = nl_config.get("claude", {})
+        self.session = session
+        self.analyzed = 0
+        self._client = get_anthropic_client()
+        self._model = claude_config.get("categorization_model", "claude-sonnet-4-20250514")
+        self._max_tokens = claude_config.get("max_tokens_categorization", 4096)
+        self._concurrency = max(1, claude_config.get("categorization_concurrency", 4))
+        self._streaming = claude_config.get("streaming", True)
+        self._comment_token_budget = claude_config.get("comment_token_budget", 100)
+        self._input_token_budget = claude_config.get("categorization_input_token_budget", 30000)
+        self._output_tokens_per_post = claude_config.get(
+            "categorization_output_tokens_per_post", 150
+        )
+        self._cache_config = nl_config.get("categorization_cache", {})
+        if self._cache_config.get("enabled", True):
+            evict_stale_entries(
+                session,
+                self._cache_config.get("ttl_days", 30),
+                self._cache_config.get("max_entries", 20000),
+            )
+
+        self._pool = ThreadPoolExecutor(max_workers=self._concurrency)
+        self._events: "queue.Queue[Tuple[int, Optional[Dict[str, Any]]]]" = queue.Queue()
+        self._in_flight: Dict[int, Tuple[Future, _BatchResults]] = {}
+        self._fingerprints: Dict[int, str] = {}
+        self._copies: Dict[int, List[Post]] = {}
+        self._held: List[Post] = []
+        self._submitted = 0
+        self._tokens_sent = 0
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._in_flight)
 
-    logger.info(f"Categorizing {len(unanalyzed)} posts")
-    total_analyzed = 0
+    def add(self, posts: List[Post], hold_partial: bool = False) -> None:
+        """Resolve cache hits among ``posts`` and queue the rest for Claude.
 
-    # Process in batches
-    for i in range(0, len(unanalyzed), BATCH_SIZE):
-        batch = unanalyzed[i : i + BATCH_SIZE]
-        posts_json = _posts_to_json(batch)
+        With ``hold_partial`` the last planned batch waits for the next ``add``
+        or ``flush``, so posts arriving in small chunks still fill whole batches.
+        """
+        posts, fingerprints, copies, hits = _dedupe_with_cache(
+            self.session, posts, self._cache_config, evict=False
+        )
+        self.analyzed += hits
+        self._fingerprints.update(fingerprints)
+        self._copies.update(copies)
+        posts = self._held + posts
+        self._held = []
+        if not posts:
+            return
 
+        batches = _plan_batches(
+            posts,
+            input_token_budget=self._input_token_budget,
+            output_token_budget=int(self._max_tokens * OUTPUT_HEADROOM),
+            output_tokens_per_post=self._output_tokens_per_post,
+            comment_token_budget=self._comment_token_budget,
+        )
+        if hold_partial:
+            self._held = batches.pop()
+        if batches:
+            logger.info(
+                f"Categorizing {sum(len(b) for b in batches)} posts in {len(batches)} batches "
+                f"({self._concurrency} in flight)"
+            )
+        for batch in batches:
+            self._submit(batch)
+
+    def flush(self) -> None:
+        """Send the batch held back by ``add(hold_partial=True)``, if any."""
+        if self._held:
+            self.add([])
+
+    def poll(self) -> None:
+        """Write whatever has come back so far without waiting."""
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                return
+            self._handle(*event)
+
+    def finish(self) -> int:
+        """Wait for every batch (and its retries); returns the analyses stored in the run."""
         try:
-            results = _call_claude_categorize(client, posts_json, model, max_tokens)
+            self.flush()
+            while self._in_flight:
+                self._handle(*self._events.get())
+        finally:
+            self._pool.shutdown()
+        logger.info(f"Categorization payload: ~{self._tokens_sent} tokens sent")
+        return self.analyzed
+
+    def _submit(self, batch: List[Post]) -> None:
+        key = self._submitted
+        self._submitted += 1
+        posts_json = _posts_to_json(batch, self._comment_token_budget)
+        payload_tokens = _estimate_tokens(posts_json)
+        self._tokens_sent += payload_tokens
+        logger.info(f"  Batch {key + 1}: {len(batch)} posts, ~{payload_tokens} payload tokens")
+
+        events = self._events
+        on_item = (lambda item: events.put((key, item))) if self._streaming else None
+        future = submit_in_context(
+            self._pool,
+            _call_claude_categorize,
+            self._client,
+            posts_json,
+            self._model,
+            self._max_tokens,
+            on_item,
+        )
+        self._in_flight[key] = (future, _BatchResults(batch, self._copies))
+        future.add_done_callback(lambda _: events.put((key, None)))
+
+    def _handle(self, key: int, item: Optional[Dict[str, Any]]) -> None:
+        if item is not None:
+            # Streamed items are accepted now and written when their batch completes
+            self.analyzed += self._in_flight[key][1].add([item])
+            return
+
+        future, batch_results = self._in_flight.pop(key)
+        batch = batch_results.batch
+        truncated = False
+        try:
+            results = future.result()
+        except TruncatedResponseError as e:
+            results = e.partial_results
+            truncated = True
         except Exception as e:
-            logger.error(f"Claude API error on batch {i // BATCH_SIZE}: {e}")
-            continue
+            logger.error(f"Claude API error on batch {key + 1}: {e}")
+            # Keep whatever streamed in before the failure
+            batch_results.commit(self.session, self._fingerprints)
+            return
 
-        # Map results by reddit_id
-        results_map = {r["reddit_id"]: r for r in results}
+        if not self._streaming:
+            self.analyzed += batch_results.add(results)
+        batch_results.commit(self.session, self._fingerprints)
+        missing = batch_results.missing()
 
-        for post in batch:
-            result = results_map.get(post.reddit_id)
-            if not result:
+        if truncated:
+            logger.warning(
+                f"Batch {key + 1} truncated at max_tokens: "
+                f"{len(batch) - len(missing)}/{len(batch)} saved, retrying {len(missing)}"
+            )
+            # Halve what's left so each retry has more output room per post
+            if len(missing) > 1 or (missing and len(batch) > 1):
+                half = (len(missing) + 1) // 2
+                self._submit(missing[:half])
+                record_retry("categorize")
+                if missing[half:]:
+                    self._submit(missing[half:])
+                    record_retry("categorize")
+            elif missing:
+                logger.error(f"Post {missing[0].reddit_id} alone exceeds max_tokens")
+        else:
+            for post in missing:
                 logger.warning(f"No result for post {post.reddit_id}")
-                continue
 
-            analysis = PostAnalysis(
-                post_id=post.id,
-                category=result.get("category", "skip"),
-                relevance_score=float(result.get("relevance_score", 0)),
-                quality_score=float(result.get("quality_score", 0)),
-                tool_tags=result.get("tool_tags", []),
-                summary=result.get("summary", ""),
-                key_insight=result.get("key_insight", ""),
-            )
-            session.add(analysis)
-            total_analyzed += 1
+        logger.info(f"  Batch {key + 1}: categorized {len(batch) - len(missing)} posts")
 
-        session.commit()
-        logger.info(f"  Batch {i // BATCH_SIZE + 1}: categorized {len(batch)} posts")
 
-    return total_analyzed
+def categorize_unanalyzed_posts(session: Session, use_batch_api: bool = False) -> int:
+    """Categorize every unanalyzed post and return how many analyses were stored.
+
+    With ``use_batch_api`` the batches are submitted through the Message Batches
+    API instead and the return value is the number of posts submitted; results
+    are stored later by ``collect_categorization_batches``.
+    """
+    if use_batch_api:
+        from newsletter.analyzer.batches import submit_categorization_batches
+
+        return submit_categorization_batches(session)
+
+    dedup_config = get_newsletter_config().get("dedup", {})
+    inherited = _cluster_duplicates(session, dedup_config)
+
+    unanalyzed = _find_unanalyzed_posts(session)
+    if not unanalyzed:
+        logger.info("No unanalyzed posts found")
+        return inherited
+
+    run = _CategorizationRun(session)
+    run.add(unanalyzed)
+    analyzed = run.finish()
+
+    # Members of clusters whose representative was just analyzed
+    return inherited + analyzed + _cluster_duplicates(session, dedup_config)
@@ -0,0 +1,12 @@
+import anthropic
+
+from newsletter.config import get_settings
+
+
+def get_anthropic_client() -> anthropic.Anthropic:
+    """Anthropic client for the configured key; ANTHROPIC_BASE_URL points it at a stand-in."""
+    settings = get_settings()
+    return anthropic.Anthropic(
+        api_key=settings.anthropic_api_key,
+        base_url=settings.anthropic_base_url or None,
+    )
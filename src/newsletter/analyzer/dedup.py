@@ -0,0 +1,294 @@
+"""Near-duplicate clustering of posts with SimHash and LSH banding.
+
+Each post gets a 64-bit SimHash over its title shingles, body words and
+canonical link. The hash is split into four 16-bit bands, so two posts within
+Hamming distance 3 always share at least one band exactly. Candidates are
+found with indexed equality lookups on the bands rather than by comparing
+against every stored post.
+
+A cluster is a star: the earliest post is the representative and every other
+member points at it through ``Post.duplicate_of_id``. When an older copy is
+scraped after its cluster formed, it takes over as representative, the
+cluster is re-pointed to it and it inherits the old representative's analysis.
+Only representatives are sent to Claude; members copy the representative's
+analysis and are left out of section selection.
+"""
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, insert, literal, or_, select, update
+from sqlalchemy.orm import Session, aliased
+
+from newsletter.models import Post, PostAnalysis, PostSignature
+from newsletter.analyzer.cache import canonicalize_url, normalize_text
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+BANDS = 4
+BAND_BITS = HASH_BITS // BANDS
+CHUNK_SIZE = 200  # new posts per candidate lookup
+
+_TITLE_WEIGHT = 3
+_URL_WEIGHT = 8
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _features(post: Post) -> Iterable[Tuple[str, int]]:
+    title = normalize_text(post.title).split()
+    for i in range(max(1, len(title) - 1)):
+        yield "t:" + " ".join(title[i : i + 2]), _TITLE_WEIGHT
+    for word in normalize_text(post.body).split():
+        yield "b:" + word, 1
+    # A self post's link is its own permalink, which says nothing about content
+    url = canonicalize_url(post.url)
+    if url and url != f"reddit:{post.reddit_id}":
+        yield "u:" + url, _URL_WEIGHT
+
+
+def simhash(post: Post) -> int:
+    """Unsigned 64-bit SimHash of the post's weighted features."""
+    totals = [0] * HASH_BITS
+    for feature, weight in _features(post):
+        h = _feature_hash(feature)
+        for bit in range(HASH_BITS):
+            totals[bit] += weight if h >> bit & 1 else -weight
+    return sum(1 << bit for bit in range(HASH_BITS) if totals[bit] > 0)
+
+
+def _bands(value: int) -> List[int]:
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (i * BAND_BITS)) & mask for i in range(BANDS)]
+
+
+def _to_signed(value: int) -> int:
+    # BIGINT columns are signed
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _band_columns() -> List[Any]:
+    return [PostSignature.band_0, PostSignature.band_1, PostSignature.band_2, PostSignature.band_3]
+
+
+def _load_candidates(
+    session: Session, bands: List[List[int]], cutoff: datetime
+) -> List[Tuple[int, int, Optional[int], datetime]]:
+    """Stored signatures sharing any band value with ``bands``, within the window."""
+    band_values = [{b[i] for b in bands} for i in range(BANDS)]
+    return (
+        session.query(
+            PostSignature.post_id, PostSignature.simhash, Post.duplicate_of_id, Post.created_utc
+        )
+        .join(Post, Post.id == PostSignature.post_id)
+        .filter(
+            or_(*[col.in_(values) for col, values in zip(_band_columns(), band_values)]),
+            Post.created_utc >= cutoff,
+        )
+        .all()
+    )
+
+
+def _carry_over_analyses(session: Session, repointed: Dict[int, int]) -> None:
+    """Copy each replaced representative's analysis to the post that took over its cluster."""
+    final: Dict[int, int] = {}  # old representative -> current one, following chains
+    for old, new in repointed.items():
+        while new in repointed:
+            new = repointed[new]
+        final[old] = new
+
+    analyzed = set(
+        session.scalars(
+            select(PostAnalysis.post_id).where(PostAnalysis.post_id.in_(set(final.values())))
+        )
+    )
+    rows = []
+    for analysis in session.scalars(
+        select(PostAnalysis).where(PostAnalysis.post_id.in_(list(final)))
+    ):
+        target = final[analysis.post_id]
+        if target in analyzed:
+            continue
+        analyzed.add(target)
+        rows.append({
+            "post_id": target,
+            "category": analysis.category,
+            "relevance_score": analysis.relevance_score,
+            "quality_score": analysis.quality_score,
+            "tool_tags": analysis.tool_tags,
+            "summary": analysis.summary,
+            "key_insight": analysis.key_insight,
+            "analyzed_at": datetime.now(timezone.utc),
+        })
+    if rows:
+        session.execute(insert(PostAnalysis), rows)
+
+
+def assign_duplicate_clusters(
+    session: Session,
+    max_distance: int = 3,
+    window_days: int = 3,
+    post_ids: Optional[List[int]] = None,
+) -> int:
+    """Sign every unsigned post and attach near-duplicates to a representative.
+
+    ``post_ids`` restricts signing to those posts. Returns the number of posts
+    marked as duplicates.
+    """
+    query = (
+        session.query(Post)
+        .outerjoin(PostSignature, PostSignature.post_id == Post.id)
+        .filter(PostSignature.post_id.is_(None))
+    )
+    if post_ids is not None:
+        query = query.filter(Post.id.in_(post_ids))
+    new_posts = query.order_by(Post.created_utc, Post.id).all()
+    if not new_posts:
+        return 0
+
+    window = timedelta(days=window_days)
+    cutoff = min(_as_utc(p.created_utc) for p in new_posts) - window
+    marked = 0
+
+    for start in range(0, len(new_posts), CHUNK_SIZE):
+        chunk = new_posts[start : start + CHUNK_SIZE]
+        hashes = {post.id: simhash(post) for post in chunk}
+        chunk_bands = {post.id: _bands(hashes[post.id]) for post in chunk}
+
+        # Band index over stored signatures plus this chunk as it is processed
+        index: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        known: Dict[int, Tuple[int, int]] = {}  # post id -> (simhash, representative)
+        created: Dict[int, datetime] = {}
+        for post_id, stored_hash, duplicate_of_id, created_utc in _load_candidates(
+            session, list(chunk_bands.values()), cutoff
+        ):
+            value = _to_unsigned(stored_hash)
+            known[post_id] = (value, duplicate_of_id or post_id)
+            created[post_id] = _as_utc(created_utc)
+            for i, band in enumerate(_bands(value)):
+                index[(i, band)].append(post_id)
+
+        # Representatives that fell out of the window still decide which post is earliest
+        outside = {representative for _, representative in known.values()} - created.keys()
+        if outside:
+            created.update(
+                (post_id, _as_utc(created_utc))
+                for post_id, created_utc in session.query(Post.id, Post.created_utc).filter(
+                    Post.id.in_(outside)
+                )
+            )
+
+        signatures = []
+        duplicates = []
+        repointed: Dict[int, int] = {}  # old representative -> new one
+        for post in chunk:
+            value = hashes[post.id]
+            bands = chunk_bands[post.id]
+            post_created = _as_utc(post.created_utc)
+            best: Optional[Tuple[int, int]] = None
+            candidates = {c for i, band in enumerate(bands) for c in index[(i, band)]}
+            for candidate in candidates:
+                other_hash, representative = known[candidate]
+                if abs(post_created - created[candidate]) > window:
+                    continue
+                distance = _hamming(value, other_hash)
+                if distance <= max_distance and (best is None or distance < best[0]):
+                    best = (distance, representative)
+
+            representative = post.id
+            if best is not None and post_created < created[best[1]]:
+                # An older copy scraped late takes over its cluster
+                repointed[best[1]] = post.id
+                for other, (other_hash, other_representative) in known.items():
+                    if other_representative == best[1]:
+                        known[other] = (other_hash, post.id)
+            elif best is not None:
+                representative = best[1]
+                duplicates.append({"id": post.id, "duplicate_of_id": representative})
+
+            known[post.id] = (value, representative)
+            created[post.id] = post_created
+            for i, band in enumerate(bands):
+                index[(i, band)].append(post.id)
+            signatures.append({
+                "post_id": post.id,
+                "simhash": _to_signed(value),
+                **{f"band_{i}": band for i, band in enumerate(bands)},
+            })
+
+        session.execute(insert(PostSignature), signatures)
+        if duplicates:
+            session.execute(update(Post), duplicates)
+        for old, new in repointed.items():
+            session.execute(
+                update(Post)
+                .where(or_(Post.id == old, Post.duplicate_of_id == old))
+                .values(duplicate_of_id=new)
+            )
+        if repointed:
+            # Otherwise the new representative would be queued for Claude again
+            _carry_over_analyses(session, repointed)
+        session.commit()
+        marked += len(duplicates) + len(repointed)
+
+    logger.info(f"Near-duplicate detection: {marked} of {len(new_posts)} new posts are duplicates")
+    return marked
+
+
+def inherit_cluster_analyses(session: Session) -> int:
+    """Copy each representative's analysis to its unanalyzed members in one statement."""
+    member = aliased(Post)
+    member_analysis = aliased(PostAnalysis)
+    source = (
+        select(
+            member.id,
+            PostAnalysis.category,
+            PostAnalysis.relevance_score,
+            PostAnalysis.quality_score,
+            PostAnalysis.tool_tags,
+            PostAnalysis.summary,
+            PostAnalysis.key_insight,
+            literal(datetime.now(timezone.utc), PostAnalysis.analyzed_at.type),
+        )
+        .join(PostAnalysis, PostAnalysis.post_id == member.duplicate_of_id)
+        .outerjoin(member_analysis, member_analysis.post_id == member.id)
+        .where(and_(member.duplicate_of_id.is_not(None), member_analysis.id.is_(None)))
+    )
+    result = session.execute(
+        insert(PostAnalysis).from_select(
+            [
+                "post_id",
+                "category",
+                "relevance_score",
+                "quality_score",
+                "tool_tags",
+                "summary",
+                "key_insight",
+                "analyzed_at",
+            ],
+            source,
+        )
+    )
+    session.commit()
+    inherited = result.rowcount or 0
+    if inherited:
+        logger.info(f"Copied representative analyses to {inherited} duplicate posts")
+    return inherited
@@ -3,8 +3,22 @@ You are an AI newsletter editor specializing in AI-assisted coding tools. \
 You categorize and score Reddit posts for a daily newsletter about AI coding tools \
 (Claude Code, Cursor, GitHub Copilot, ChatGPT, local LLMs, MCP, etc.)."""
 
-CATEGORIZATION_USER = """\
-Below is a JSON array of Reddit posts from AI-coding subreddits. For each post, provide:
+# Smallest prompt prefix the API will cache for the Sonnet models; shorter
+# prefixes marked with cache_control are silently processed uncached.
+MIN_CACHEABLE_PREFIX_TOKENS = 1024
+
+# Static instructions, sent as a cached system block so every batch after the
+# first reads them from the prompt cache instead of paying for them again.
+# Together with CATEGORIZATION_SYSTEM they must stay above
+# MIN_CACHEABLE_PREFIX_TOKENS, which is why the taxonomy and rubric are spelled
+# out in full.
+CATEGORIZATION_INSTRUCTIONS = """\
+You will receive a JSON array of Reddit posts from AI-coding subreddits. To save space \
+each post uses compact keys: `id` = reddit_id, `sr` = subreddit, `t` = title, `b` = body \
+(omitted for link posts and empty bodies), `s` = score, `nc` = comment count, \
+`c` = top comments as `[score, text]` pairs, best first.
+
+For each post, provide:
 
 1. **category** — one of: `news`, `best_practices`, `prompts_techniques`, \
 `tools_integrations`, `community`, `quick_links`, `skip`
@@ -16,27 +30,94 @@ Below is a JSON array of Reddit posts from AI-coding subreddits. For each post,
 6. **key_insight** — the single most notable takeaway (1 sentence)
 
 Category guide:
-- `news`: Model releases, feature updates, product launches, funding
-- `best_practices`: Workflow tips, configuration guides, CLAUDE.md advice
-- `prompts_techniques`: Prompt engineering, notable prompts, technique discussions
-- `tools_integrations`: MCP servers, extensions, plugins, tool comparisons
-- `community`: Highly-discussed opinion posts, debates, experience reports
-- `quick_links`: Mildly interesting but not substantial enough for a section
-- `skip`: Off-topic, low-quality, memes, support questions with no general value
-
-Respond with a JSON array (same order as input). Each element:
+- `news`: Model releases, feature updates, product launches, funding, pricing and \
+rate-limit changes, outages and official announcements. The post must report something \
+that happened; speculation about what might ship belongs in `community`.
+- `best_practices`: Workflow tips, configuration guides, CLAUDE.md advice, project \
+rules files, review and testing habits, ways to structure a codebase for an agent. \
+Prefer this when the post teaches a repeatable way of working.
+- `prompts_techniques`: Prompt engineering, notable prompts, technique discussions \
+such as planning modes, sub-agents, context management or chain-of-thought tricks. \
+Prefer this when the reusable part is the wording or structure of the prompt itself.
+- `tools_integrations`: MCP servers, extensions, plugins, tool comparisons, editor \
+integrations, CLIs and wrappers built around a model. Use this for show-and-tell posts \
+about a tool someone built, as long as others can use it.
+- `community`: Highly-discussed opinion posts, debates, experience reports, career \
+discussions and "what is everyone using" threads. A high comment count with a thin \
+body usually lands here.
+- `quick_links`: Mildly interesting but not substantial enough for a section: short \
+link posts, minor releases, small tips that fit in one line.
+- `skip`: Off-topic, low-quality, memes, support questions with no general value, \
+self-promotion without substance, duplicates of a better post, and deleted or removed \
+posts with no remaining content.
+
+When two categories fit, choose the one a reader would look for first: news over \
+tools_integrations for an official launch, tools_integrations over community for a \
+tool announcement, best_practices over prompts_techniques for a whole workflow.
+
+Tool tags (use every tag that applies; `general` only when no specific tool does):
+- `claude_code`: Anthropic's Claude Code CLI and Claude models used for coding.
+- `copilot`: GitHub Copilot in any editor, including Copilot chat and agent mode.
+- `cursor`: The Cursor editor, its agent, rules and pricing.
+- `chatgpt`: ChatGPT, OpenAI models and OpenAI coding agents such as Codex.
+- `local_llm`: Self-hosted or open-weight models (Llama, Qwen, DeepSeek, Ollama, \
+llama.cpp, LM Studio) used for coding.
+- `mcp`: The Model Context Protocol, MCP servers and clients.
+- `general`: AI-assisted coding in general, or a tool not listed above.
+
+Scoring rubric:
+- relevance_score 0.9-1.0: directly about using an AI coding tool to write, review or \
+maintain software; 0.6-0.8: about the tools or models but not their use for coding \
+(pricing, company news); 0.3-0.5: adjacent topics such as general LLM research; \
+below 0.3: unrelated to AI-assisted coding.
+- quality_score 0.9-1.0: concrete, reproducible detail (configs, prompts, benchmarks, \
+code) that a practitioner could act on today; 0.6-0.8: useful but partly anecdotal; \
+0.3-0.5: mostly opinion or a question with some useful answers in the comments; \
+below 0.3: little content beyond the title.
+- Judge the post by its body and top comments, not its score; the score and comment \
+count say how much attention it got, not whether it is correct or useful. A strong \
+answer in the comments can raise quality_score for a weak post.
+
+Writing the text fields:
+- summary: say what the post is and what it claims or shows, in plain words, without \
+repeating the title. No "This post discusses".
+- key_insight: the one thing a busy reader should remember, stated as a fact or a \
+recommendation. For `skip` posts both fields may be a short phrase.
+- Write in English even when the post is not, and never invent details (versions, \
+numbers, names) that are not in the post or its comments.
+
+Respond with a JSON array (same order as input) and nothing else: no prose before or \
+after it. Include every post exactly once, including `skip` posts. Each element uses \
+the full key names:
 ```json
-{{
-  "reddit_id": "<post reddit_id>",
+{
+  "reddit_id": "<post id>",
   "category": "<category>",
   "relevance_score": <float>,
   "quality_score": <float>,
   "tool_tags": ["<tag>", ...],
   "summary": "<summary>",
   "key_insight": "<key_insight>"
-}}
+}
 ```
 
+Example input:
+```json
+[{"id":"1abc","sr":"ClaudeAI","t":"My CLAUDE.md for a Django monorepo","s":412,"nc":57,\
+"b":"Sharing the rules file that stopped Claude Code from editing migrations...",\
+"c":[[120,"Adding the test command to the file was the biggest win for me"]]}]
+```
+
+Example output:
+```json
+[{"reddit_id":"1abc","category":"best_practices","relevance_score":0.95,\
+"quality_score":0.85,"tool_tags":["claude_code"],"summary":"A developer shares the \
+CLAUDE.md rules they use in a Django monorepo to keep Claude Code away from migrations \
+and generated files.","key_insight":"Listing forbidden paths and the exact test command \
+in CLAUDE.md prevents most unwanted edits."}]
+```"""
+
+CATEGORIZATION_USER = """\
 Posts:
 {posts_json}"""
 
@@ -81,3 +162,44 @@ Respond with JSON:
 
 Posts grouped by section:
 {grouped_posts_json}"""
+
+SYNTHESIS_SECTION_USER = """\
+Write one section of a newsletter edition about AI coding tools (Claude Code, Cursor, \
+Copilot, ChatGPT, local LLMs, MCP).
+
+Section: **{section_title}** ({section_key}) — {section_description}
+
+For each post below, write:
+- **headline**: A compelling, concise headline (not the Reddit title verbatim)
+- **blurb**: 2-3 sentences explaining why this matters to practitioners
+
+Also produce:
+- **intro**: A 1-sentence intro for the section
+
+Respond with JSON:
+```json
+{{
+  "intro": "<section intro>",
+  "items": [
+    {{
+      "reddit_id": "<post reddit_id>",
+      "headline": "<headline>",
+      "blurb": "<blurb>"
+    }}
+  ]
+}}
+```
+
+Posts:
+{posts_json}"""
+
+SYNTHESIS_TITLE_USER = """\
+Write a catchy title (max 10 words) for a newsletter edition about AI coding tools. \
+These are the edition's leading posts:
+
+{posts_json}
+
+Respond with JSON:
+```json
+{{"edition_title": "<title>"}}
+```"""
@@ -0,0 +1,70 @@
+"""Incremental parsing of streamed JSON arrays from Claude responses."""
+import json
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class JsonArrayStreamParser:
+    """Yields each top-level object of a JSON array as soon as its closing brace arrives.
+
+    Text before the opening ``[`` (such as a markdown code fence) is ignored, so
+    the parser can be fed raw text deltas straight from the stream.
+    """
+
+    def __init__(self) -> None:
+        self._buffer: List[str] = []
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        items = []
+        for char in chunk:
+            if self._finished:
+                break
+            if not self._started:
+                if char == "[":
+                    self._started = True
+                continue
+
+            if self._depth > 0:
+                self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._buffer = [char]
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the outer array
+                    self._finished = True
+                    continue
+                self._depth -= 1
+                if self._depth == 0:
+                    item = self._decode("".join(self._buffer))
+                    if item is not None:
+                        items.append(item)
+                    self._buffer = []
+        return items
+
+    @staticmethod
+    def _decode(text: str) -> Any:
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed streamed item: {e}")
+            return None
+        return item if isinstance(item, dict) else None
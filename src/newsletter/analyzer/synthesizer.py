@@ -1,29 +1,92 @@
 import json
 import logging
-from typing import Any, Dict, List, Tuple
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Tuple
 
 import anthropic
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 
-from newsletter.config import get_settings, get_newsletter_config
+from newsletter.config import get_newsletter_config
 from newsletter.models import Post, PostAnalysis, Newsletter, NewsletterItem
-from newsletter.analyzer.prompts import SYNTHESIS_SYSTEM, SYNTHESIS_USER
+from newsletter.analyzer.client import get_anthropic_client
+from newsletter.analyzer.prompts import (
+    SYNTHESIS_SECTION_USER,
+    SYNTHESIS_SYSTEM,
+    SYNTHESIS_TITLE_USER,
+    SYNTHESIS_USER,
+)
+from newsletter.telemetry import observe_claude, record_retry, submit_in_context
 
 logger = logging.getLogger(__name__)
 
 
+SELECTION_WINDOWS = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(days=7),
+}
+
+
+def _category_capacities(sections: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Most posts any category can contribute: the summed slots of sections accepting it.
+
+    Sections fill greedily in score order, so the posts a category ends up
+    contributing are always a prefix of its own ranking no longer than this.
+    """
+    capacities: Dict[str, int] = defaultdict(int)
+    for section in sections:
+        default = 1 if section["key"] == "top_story" else 5
+        for category in section.get("categories", []):
+            capacities[category] += section.get("max_items", default)
+    return dict(capacities)
+
+
 def _select_posts_for_sections(
-    session: Session, sections: List[Dict[str, Any]]
+    session: Session, sections: List[Dict[str, Any]], frequency: str = "daily"
 ) -> Dict[str, List[Tuple[Post, PostAnalysis]]]:
     """Select top-scoring posts for each newsletter section."""
-    # Get all analyzed posts that aren't skipped
+    window = SELECTION_WINDOWS.get(frequency, SELECTION_WINDOWS["daily"])
+    cutoff = datetime.now(timezone.utc) - window
+    capacities = _category_capacities(sections)
+    if not capacities:
+        return {section["key"]: [] for section in sections}
+
+    combined_score = PostAnalysis.relevance_score + PostAnalysis.quality_score
+
+    # Rank each category's posts from this window in SQL and keep only as many
+    # per category as the sections could possibly use
+    ranked = (
+        session.query(
+            PostAnalysis.id.label("analysis_id"),
+            func.row_number()
+            .over(
+                partition_by=PostAnalysis.category,
+                order_by=(combined_score.desc(), PostAnalysis.id),
+            )
+            .label("category_rank"),
+        )
+        .join(Post, Post.id == PostAnalysis.post_id)
+        .filter(
+            PostAnalysis.category.in_(list(capacities)),
+            Post.scraped_at >= cutoff,
+            # Near-duplicates compete through their cluster's representative only
+            Post.duplicate_of_id.is_(None),
+        )
+        .subquery()
+    )
     analyzed = (
         session.query(Post, PostAnalysis)
         .join(PostAnalysis)
-        .filter(PostAnalysis.category != "skip")
-        .order_by(
-            (PostAnalysis.relevance_score + PostAnalysis.quality_score).desc()
+        .join(ranked, ranked.c.analysis_id == PostAnalysis.id)
+        .filter(
+            or_(*[
+                and_(PostAnalysis.category == category, ranked.c.category_rank <= capacity)
+                for category, capacity in capacities.items()
+            ])
         )
+        .order_by(combined_score.desc(), PostAnalysis.id)
         .all()
     )
 
@@ -75,48 +138,58 @@ def _build_sections_description(sections: List[Dict[str, Any]]) -> str:
     return "\n".join(lines)
 
 
+def _post_entries(items: List[Tuple[Post, PostAnalysis]]) -> List[Dict[str, Any]]:
+    entries = []
+    for post, analysis in items:
+        entries.append({
+            "reddit_id": post.reddit_id,
+            "subreddit": post.subreddit,
+            "title": post.title,
+            "body": post.body[:300] if post.body else "",
+            "score": post.score,
+            "permalink": post.permalink,
+            "category": analysis.category,
+            "tool_tags": analysis.tool_tags,
+            "summary": analysis.summary,
+            "key_insight": analysis.key_insight,
+        })
+    return entries
+
+
 def _build_grouped_posts_json(
     grouped: Dict[str, List[Tuple[Post, PostAnalysis]]]
 ) -> str:
     data = {}
     for section_key, items in grouped.items():
-        data[section_key] = []
-        for post, analysis in items:
-            data[section_key].append({
-                "reddit_id": post.reddit_id,
-                "subreddit": post.subreddit,
-                "title": post.title,
-                "body": post.body[:300] if post.body else "",
-                "score": post.score,
-                "permalink": post.permalink,
-                "category": analysis.category,
-                "tool_tags": analysis.tool_tags,
-                "summary": analysis.summary,
-                "key_insight": analysis.key_insight,
-            })
+        data[section_key] = _post_entries(items)
     return json.dumps(data, indent=2)
 
 
-def _call_claude_synthesize(
+def _call_claude_json(
     client: anthropic.Anthropic,
-    sections_description: str,
-    grouped_posts_json: str,
+    user_prompt: str,
     model: str,
     max_tokens: int,
+    stream: bool = False,
+    operation: str = "synthesize",
 ) -> Dict[str, Any]:
-    user_prompt = SYNTHESIS_USER.format(
-        sections_description=sections_description,
-        grouped_posts_json=grouped_posts_json,
-    )
-
-    response = client.messages.create(
+    params = dict(
         model=model,
         max_tokens=max_tokens,
         system=SYNTHESIS_SYSTEM,
         messages=[{"role": "user", "content": user_prompt}],
     )
 
-    text = response.content[0].text
+    with observe_claude(operation) as call:
+        # Streaming keeps long generations from hitting the SDK's non-streaming timeout
+        if stream:
+            with client.messages.stream(**params) as message_stream:
+                response = message_stream.get_final_message()
+        else:
+            response = client.messages.create(**params)
+        call.record_usage(response)
+        text = response.content[0].text
+
     if "```json" in text:
         text = text.split("```json")[1].split("```")[0]
     elif "```" in text:
@@ -125,20 +198,123 @@ def _call_claude_synthesize(
     return json.loads(text.strip())
 
 
+def _call_claude_synthesize(
+    client: anthropic.Anthropic,
+    sections_description: str,
+    grouped_posts_json: str,
+    model: str,
+    max_tokens: int,
+    stream: bool = False,
+) -> Dict[str, Any]:
+    user_prompt = SYNTHESIS_USER.format(
+        sections_description=sections_description,
+        grouped_posts_json=grouped_posts_json,
+    )
+    return _call_claude_json(client, user_prompt, model, max_tokens, stream)
+
+
+def _call_claude_synthesize_section(
+    client: anthropic.Anthropic,
+    section: Dict[str, Any],
+    items: List[Tuple[Post, PostAnalysis]],
+    model: str,
+    max_tokens: int,
+    stream: bool = False,
+) -> Dict[str, Any]:
+    user_prompt = SYNTHESIS_SECTION_USER.format(
+        section_title=section["title"],
+        section_key=section["key"],
+        section_description=section.get("description", ""),
+        posts_json=json.dumps(_post_entries(items), indent=2),
+    )
+    return _call_claude_json(
+        client, user_prompt, model, max_tokens, stream, operation="synthesize_section"
+    )
+
+
+def _call_claude_edition_title(
+    client: anthropic.Anthropic,
+    grouped: Dict[str, List[Tuple[Post, PostAnalysis]]],
+    model: str,
+    stream: bool = False,
+) -> Dict[str, Any]:
+    leading = [
+        {"title": post.title, "summary": analysis.summary}
+        for items in grouped.values()
+        for post, analysis in items[:2]
+    ][:10]
+    user_prompt = SYNTHESIS_TITLE_USER.format(posts_json=json.dumps(leading, indent=2))
+    return _call_claude_json(client, user_prompt, model, 256, stream, operation="edition_title")
+
+
+def _synthesize_fanout(
+    client: anthropic.Anthropic,
+    sections: List[Dict[str, Any]],
+    grouped: Dict[str, List[Tuple[Post, PostAnalysis]]],
+    model: str,
+    max_tokens: int,
+    stream: bool,
+    retries: int,
+) -> Dict[str, Any]:
+    """One concurrent request per section plus one for the title, merged into the
+    single-request result shape. Only failed requests are retried; sections that
+    still fail fall back to post titles and summaries.
+    """
+    sections_by_key = {s["key"]: s for s in sections}
+    jobs: Dict[str, Callable[[], Dict[str, Any]]] = {
+        "edition_title": lambda: _call_claude_edition_title(client, grouped, model, stream),
+    }
+    for key, items in grouped.items():
+        if items:
+            jobs[key] = (
+                lambda key=key, items=items: _call_claude_synthesize_section(
+                    client, sections_by_key[key], items, model, max_tokens, stream
+                )
+            )
+
+    result: Dict[str, Any] = {"edition_title": "AI Coding Newsletter", "sections": {}}
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        for attempt in range(retries + 1):
+            if attempt:
+                record_retry("synthesize", len(jobs))
+            futures = {submit_in_context(pool, job): key for key, job in jobs.items()}
+            failed = {}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logger.warning(f"Synthesis of {key} failed (attempt {attempt + 1}): {e}")
+                    failed[key] = jobs[key]
+                    continue
+                if key == "edition_title":
+                    result["edition_title"] = data.get("edition_title", result["edition_title"])
+                else:
+                    result["sections"][key] = data
+            jobs = failed
+            if not jobs:
+                break
+
+    if jobs:
+        logger.error(f"Synthesis gave up on: {', '.join(sorted(jobs))}")
+    return result
+
+
 def synthesize_newsletter(
     session: Session, frequency: str = "daily"
 ) -> Newsletter:
-    settings = get_settings()
     nl_config = get_newsletter_config()
     sections = nl_config["sections"]
     claude_config = nl_config.get("claude", {})
 
-    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+    client = get_anthropic_client()
     model = claude_config.get("synthesis_model", "claude-sonnet-4-20250514")
     max_tokens = claude_config.get("max_tokens_synthesis", 4096)
+    streaming = claude_config.get("streaming", True)
+    synthesis_mode = claude_config.get("synthesis_mode", "fanout")
 
     # Select posts for each section
-    grouped = _select_posts_for_sections(session, sections)
+    grouped = _select_posts_for_sections(session, sections, frequency)
 
     total_posts = sum(len(items) for items in grouped.values())
     if total_posts == 0:
@@ -154,12 +330,22 @@ def synthesize_newsletter(
 
     logger.info(f"Synthesizing newsletter from {total_posts} posts across {len(grouped)} sections")
 
-    sections_description = _build_sections_description(sections)
-    grouped_posts_json = _build_grouped_posts_json(grouped)
-
-    result = _call_claude_synthesize(
-        client, sections_description, grouped_posts_json, model, max_tokens
-    )
+    if synthesis_mode == "fanout":
+        result = _synthesize_fanout(
+            client,
+            sections,
+            grouped,
+            model,
+            max_tokens,
+            streaming,
+            retries=claude_config.get("synthesis_retries", 1),
+        )
+    else:
+        sections_description = _build_sections_description(sections)
+        grouped_posts_json = _build_grouped_posts_json(grouped)
+        result = _call_claude_synthesize(
+            client, sections_description, grouped_posts_json, model, max_tokens, streaming
+        )
 
     # Create newsletter
     newsletter = Newsletter(
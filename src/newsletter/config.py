@@ -25,15 +25,22 @@ class Settings(BaseSettings):
 
     # Anthropic
     anthropic_api_key: str = ""
+    anthropic_base_url: str = ""
 
     # Database
     database_url: str = Field(default=f"sqlite:///{PROJECT_ROOT / 'newsletter.db'}")
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    sqlite_busy_timeout_ms: int = 5000
 
-    # Email (deferred)
+    # Email
     smtp_host: str = ""
     smtp_port: int = 587
     smtp_user: str = ""
     smtp_password: str = ""
+    smtp_starttls: bool = True
     email_from: str = ""
 
     # Web
@@ -1,6 +1,8 @@
+from functools import lru_cache
 from typing import Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 from newsletter.config import get_settings
@@ -10,14 +12,52 @@ class Base(DeclarativeBase):
     pass
 
 
-def get_engine():
+def _configure_sqlite(engine: Engine, busy_timeout_ms: int) -> None:
+    """Apply WAL mode, relaxed fsync and a busy timeout to every new SQLite connection.
+
+    WAL lets dashboard reads proceed while the pipeline holds the write lock, and the
+    busy timeout makes concurrent writers wait instead of failing with "database is locked".
+    """
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cursor.close()
+
+
+@lru_cache
+def get_engine() -> Engine:
+    """Process-wide engine; every session shares its connection pool."""
     settings = get_settings()
     connect_args = {}
-    if settings.database_url.startswith("sqlite"):
+    engine_kwargs = {}
+    url = make_url(settings.database_url)
+    is_sqlite = url.get_backend_name() == "sqlite"
+    is_memory = is_sqlite and url.database in (None, "", ":memory:")
+
+    if is_sqlite:
         connect_args["check_same_thread"] = False
-    return create_engine(settings.database_url, connect_args=connect_args, echo=False)
+    if not is_memory:
+        engine_kwargs.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=not is_sqlite,
+        )
+
+    engine = create_engine(
+        settings.database_url, connect_args=connect_args, echo=False, **engine_kwargs
+    )
+    if is_sqlite and not is_memory:
+        _configure_sqlite(engine, settings.sqlite_busy_timeout_ms)
+    return engine
 
 
+@lru_cache
 def get_session_factory() -> sessionmaker:
     return sessionmaker(bind=get_engine(), expire_on_commit=False)
 
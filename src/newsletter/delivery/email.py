@@ -1,33 +1,370 @@
-"""Email delivery (deferred — stub for future implementation)."""
+"""Queued email delivery over a small pool of reused SMTP connections.
+
+Delivering an edition is two steps. ``enqueue_newsletter`` adds one
+``EmailDelivery`` row per active subscriber. ``send_pending`` then works
+through the queue. Each recipient gets their own message, personalized
+by their subreddit and tool-tag preferences. Messages go out
+concurrently, one reused SMTP connection per worker thread, and each
+connection stays under its own rate limit. Workers only talk SMTP; every
+queue update is made on the caller's session.
+
+A transient failure puts the row back in the queue with exponential backoff
+until ``max_attempts`` is reached. Rows claimed by a sender that crashed are
+released again once their lease expires, so rerunning ``newsletter send``
+resumes where the crash left off. A message whose outcome was never recorded
+may be sent twice; no message is ever lost.
+"""
 import logging
 import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from typing import List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import make_msgid
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Row, and_, insert, literal, select, update
+from sqlalchemy.orm import Session, aliased
 
-from newsletter.config import get_settings
+from newsletter.config import Settings, get_newsletter_config, get_settings
+from newsletter.models import EmailDelivery, Newsletter, Subscriber
+from newsletter.ratelimit import RateLimiter
+from newsletter.telemetry import observe_stage, record_email, submit_in_context
+from newsletter.web.render import (
+    NO_FILTER,
+    EditionFilter,
+    filtered_item_count,
+    render_email_html,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def send_newsletter_email(
-    subject: str, html_content: str, recipients: List[str]
-) -> None:
-    settings = get_settings()
+def _delivery_config() -> Dict[str, Any]:
+    return get_newsletter_config().get("delivery", {})
+
+
+class SMTPConnection:
+    """One SMTP session that is opened on first use and reused for later messages."""
+
+    def __init__(self, settings: Settings, messages_per_minute: float, timeout: float) -> None:
+        self._settings = settings
+        self._timeout = timeout
+        self._limiter = RateLimiter(messages_per_minute)
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        settings = self._settings
+        smtp = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=self._timeout)
+        try:
+            if settings.smtp_starttls:
+                smtp.starttls()
+            if settings.smtp_user:
+                smtp.login(settings.smtp_user, settings.smtp_password)
+        except Exception:
+            smtp.close()
+            raise
+        return smtp
+
+    def send(self, message: EmailMessage) -> None:
+        self._limiter.acquire()
+        reused = self._smtp is not None
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self.reset()
+            if not reused:
+                raise
+            # The server closed the idle connection; one fresh attempt
+            self._smtp = self._connect()
+            self._smtp.send_message(message)
+        except (smtplib.SMTPException, OSError) as e:
+            # A refused recipient leaves the session usable; anything else may not
+            if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                self.reset()
+            raise
+
+    def reset(self) -> None:
+        """Drop the connection without a QUIT; the next send reconnects."""
+        if self._smtp is not None:
+            self._smtp.close()
+            self._smtp = None
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+
+def build_message(
+    settings: Settings, subject: str, html_content: str, recipient: str
+) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = settings.email_from
+    message["To"] = recipient
+    message["Message-ID"] = make_msgid(domain=settings.email_from.rpartition("@")[2] or None)
+    message.set_content(html_content, subtype="html")
+    return message
+
+
+def _is_permanent(error: Exception) -> bool:
+    """Errors that will fail the same way for this recipient however often we retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        # 4xx refusals (greylisting, full mailbox) are worth another try
+        return all(500 <= code < 600 for code, _ in error.recipients.values())
+    # Bad credentials or a refused sender are our problem, not the recipient's
+    if isinstance(error, (smtplib.SMTPAuthenticationError, smtplib.SMTPSenderRefused)):
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+def enqueue_newsletter(session: Session, newsletter: Newsletter) -> int:
+    """Queue ``newsletter`` for every active subscriber not already queued; returns the count."""
+    queued = aliased(EmailDelivery)
+    now = datetime.now(timezone.utc)
+    source = (
+        select(
+            literal(newsletter.id),
+            Subscriber.id,
+            Subscriber.email,
+            literal("pending"),
+            literal(0),
+            literal(""),
+            literal(now, EmailDelivery.next_attempt_at.type),
+            literal(now, EmailDelivery.created_at.type),
+        )
+        .outerjoin(
+            queued,
+            and_(queued.newsletter_id == newsletter.id, queued.email == Subscriber.email),
+        )
+        .where(and_(Subscriber.active.is_(True), queued.id.is_(None)))
+    )
+    result = session.execute(
+        insert(EmailDelivery).from_select(
+            [
+                "newsletter_id",
+                "subscriber_id",
+                "email",
+                "status",
+                "attempts",
+                "last_error",
+                "next_attempt_at",
+                "created_at",
+            ],
+            source,
+        )
+    )
+    session.commit()
+    count = result.rowcount or 0
+    logger.info(f"Queued newsletter #{newsletter.id} for {count} subscribers")
+    return count
+
+
+def _release_expired_claims(session: Session, lease: timedelta) -> int:
+    result = session.execute(
+        update(EmailDelivery)
+        .where(and_(
+            EmailDelivery.status == "sending",
+            EmailDelivery.claimed_at < datetime.now(timezone.utc) - lease,
+        ))
+        .values(status="pending", claimed_at=None)
+    )
+    session.commit()
+    released = result.rowcount or 0
+    if released:
+        logger.warning(f"Re-queued {released} messages left claimed by an interrupted sender")
+    return released
 
+
+def _pending_filter(newsletter_id: Optional[int]) -> List[Any]:
+    conditions = [EmailDelivery.status == "pending"]
+    if newsletter_id is not None:
+        conditions.append(EmailDelivery.newsletter_id == newsletter_id)
+    return conditions
+
+
+def _claim(session: Session, newsletter_id: Optional[int], limit: int) -> Sequence[Row]:
+    """Mark up to ``limit`` due rows as sending; returns them with the subscriber's preferences."""
+    now = datetime.now(timezone.utc)
+    rows = session.execute(
+        select(
+            EmailDelivery.id,
+            EmailDelivery.newsletter_id,
+            EmailDelivery.email,
+            EmailDelivery.attempts,
+            Subscriber.subreddits,
+            Subscriber.tool_tags,
+        )
+        .outerjoin(Subscriber, Subscriber.id == EmailDelivery.subscriber_id)
+        .where(and_(*_pending_filter(newsletter_id), EmailDelivery.next_attempt_at <= now))
+        .order_by(EmailDelivery.id)
+        .limit(limit)
+        # Concurrent senders on PostgreSQL skip each other's rows; SQLite ignores this
+        .with_for_update(skip_locked=True, of=EmailDelivery)
+    ).all()
+    if rows:
+        session.execute(
+            update(EmailDelivery),
+            [{"id": row.id, "status": "sending", "claimed_at": now} for row in rows],
+        )
+    session.commit()
+    return rows
+
+
+def _next_retry_at(session: Session, newsletter_id: Optional[int]) -> Optional[datetime]:
+    next_at = session.execute(
+        select(EmailDelivery.next_attempt_at)
+        .where(and_(*_pending_filter(newsletter_id)))
+        .order_by(EmailDelivery.next_attempt_at)
+        .limit(1)
+    ).scalar()
+    if next_at is not None and next_at.tzinfo is None:
+        # SQLite hands back naive datetimes
+        next_at = next_at.replace(tzinfo=timezone.utc)
+    return next_at
+
+
+def send_pending(
+    session: Session, newsletter_id: Optional[int] = None, wait: bool = True
+) -> Dict[str, int]:
+    """Send queued messages (for one edition, or all of them) until the queue is drained.
+
+    With ``wait`` the call also sleeps until messages waiting out a retry
+    backoff are due; without it only messages due now are attempted.
+
+    Each recipient gets the edition filtered by their subreddit and tool-tag
+    preferences. Recipients whose filter leaves no items are skipped. Returns
+    the number of messages sent, skipped, re-queued for retry and failed for good.
+    """
+    totals = {"sent": 0, "skipped": 0, "retry": 0, "failed": 0}
+    settings = get_settings()
     if not settings.smtp_host:
         logger.warning("SMTP not configured — skipping email delivery")
-        return
+        return totals
+
+    config = _delivery_config()
+    connections = max(1, config.get("connections", 4))
+    claim_batch = config.get("claim_batch", 100)
+    max_attempts = config.get("max_attempts", 5)
+    backoff = config.get("retry_backoff_seconds", 30)
+    _release_expired_claims(session, timedelta(minutes=config.get("lease_minutes", 15)))
+
+    # SMTP sessions are not thread-safe, so each worker thread gets its own
+    local = threading.local()
+    opened: List[SMTPConnection] = []
+    opened_lock = threading.Lock()
+
+    def _init_worker() -> None:
+        local.connection = SMTPConnection(
+            settings,
+            config.get("messages_per_minute", 60),
+            config.get("timeout_seconds", 30),
+        )
+        with opened_lock:
+            opened.append(local.connection)
+
+    def _send(message: EmailMessage) -> None:
+        local.connection.send(message)
+
+    def _message(newsletter: Newsletter, row: Row) -> Optional[EmailMessage]:
+        """The recipient's personalized edition, or None when nothing matches."""
+        edition_filter = EditionFilter.of(row.subreddits, row.tool_tags)
+        if edition_filter != NO_FILTER and not filtered_item_count(
+            session, newsletter, edition_filter
+        ):
+            return None
+        # Pages are cached per filter, so equal preferences share one render
+        html = render_email_html(session, newsletter, edition_filter)
+        return build_message(settings, newsletter.edition_title, html, row.email)
+
+    pool = ThreadPoolExecutor(max_workers=connections, initializer=_init_worker)
+    try:
+        with observe_stage("deliver"):
+            while True:
+                claimed = _claim(session, newsletter_id, claim_batch)
+                if not claimed:
+                    next_at = _next_retry_at(session, newsletter_id) if wait else None
+                    if next_at is None:
+                        break
+                    delay = (next_at - datetime.now(timezone.utc)).total_seconds()
+                    if delay > 0:
+                        logger.info(f"Waiting {delay:.0f}s for messages due a retry")
+                        time.sleep(delay)
+                    continue
+
+                futures = {}
+                updates = []
+                for row in claimed:
+                    newsletter = session.get(Newsletter, row.newsletter_id)
+                    if newsletter is None:
+                        logger.warning(f"Newsletter #{row.newsletter_id} no longer exists")
+                        updates.append({
+                            "id": row.id, "status": "failed", "claimed_at": None,
+                            "last_error": f"newsletter #{row.newsletter_id} not found",
+                        })
+                        totals["failed"] += 1
+                        record_email("failed")
+                        continue
+                    message = _message(newsletter, row)
+                    if message is None:
+                        updates.append({"id": row.id, "status": "skipped", "claimed_at": None})
+                        totals["skipped"] += 1
+                        record_email("skipped")
+                        continue
+                    futures[submit_in_context(pool, _send, message)] = row
+
+                now = datetime.now(timezone.utc)
+                for future in as_completed(futures):
+                    row = futures[future]
+                    attempts = row.attempts + 1
+                    error = future.exception()
+                    if error is None:
+                        outcome = "sent"
+                        updates.append({
+                            "id": row.id, "status": "sent", "attempts": attempts,
+                            "last_error": "", "sent_at": now, "claimed_at": None,
+                        })
+                    else:
+                        permanent = _is_permanent(error)
+                        outcome = "failed" if permanent or attempts >= max_attempts else "retry"
+                        logger.warning(f"Sending to {row.email} failed ({outcome}): {error}")
+                        retry_at = now + timedelta(seconds=backoff * 2 ** (attempts - 1))
+                        updates.append({
+                            "id": row.id,
+                            "status": "failed" if outcome == "failed" else "pending",
+                            "attempts": attempts,
+                            "last_error": str(error)[:1000],
+                            "next_attempt_at": retry_at,
+                            "claimed_at": None,
+                        })
+                    totals[outcome] += 1
+                    record_email(outcome)
+
+                session.execute(update(EmailDelivery), updates)
+                session.commit()
+    finally:
+        pool.shutdown(wait=True)
+        for connection in opened:
+            connection.close()
 
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["From"] = settings.email_from
-    msg["To"] = ", ".join(recipients)
-    msg.attach(MIMEText(html_content, "html"))
+    logger.info(
+        f"Email delivery: {totals['sent']} sent, {totals['skipped']} skipped, "
+        f"{totals['retry']} to retry, {totals['failed']} failed"
+    )
+    return totals
 
-    with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-        server.starttls()
-        server.login(settings.smtp_user, settings.smtp_password)
-        server.sendmail(settings.email_from, recipients, msg.as_string())
 
-    logger.info(f"Email sent to {len(recipients)} recipients")
+def deliver_newsletter(
+    session: Session, newsletter: Newsletter, wait: bool = True
+) -> Dict[str, int]:
+    """Queue ``newsletter`` for all active subscribers and send it."""
+    enqueue_newsletter(session, newsletter)
+    return send_pending(session, newsletter_id=newsletter.id, wait=wait)
@@ -1,13 +1,33 @@
 import logging
+from typing import TYPE_CHECKING
 
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
-from newsletter.config import get_newsletter_config
+from newsletter.config import get_newsletter_config, get_subreddit_config
+from newsletter.telemetry import start_metrics_server
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+    from newsletter.models import Newsletter
 
 logger = logging.getLogger(__name__)
 
 
+def _deliver(session: "Session", newsletter: "Newsletter") -> None:
+    from newsletter.delivery.email import deliver_newsletter
+
+    try:
+        totals = deliver_newsletter(session, newsletter)
+        logger.info(
+            f"Scheduler: emailed newsletter #{newsletter.id} to {totals['sent']} subscribers"
+        )
+    except Exception:
+        logger.exception("Scheduler: email delivery failed")
+
+
 def _run_pipeline_job() -> None:
     from newsletter.database import get_session_factory
     from newsletter.pipeline.orchestrator import run_pipeline
@@ -20,12 +40,28 @@ def _run_pipeline_job() -> None:
             f"Scheduler: pipeline complete — "
             f'Newsletter #{newsletter.id}: "{newsletter.edition_title}"'
         )
+        if get_newsletter_config().get("delivery", {}).get("enabled", False):
+            _deliver(session, newsletter)
     except Exception:
         logger.exception("Scheduler: pipeline failed")
     finally:
         session.close()
 
 
+def _run_refresh_job() -> None:
+    from newsletter.database import get_session_factory
+    from newsletter.scraper.metrics import refresh_post_metrics
+
+    session = get_session_factory()()
+    try:
+        count = refresh_post_metrics(session)
+        logger.info(f"Scheduler: refreshed metrics for {count} posts")
+    except Exception:
+        logger.exception("Scheduler: metric refresh failed")
+    finally:
+        session.close()
+
+
 def start_scheduler() -> None:
     nl_config = get_newsletter_config()
     schedule = nl_config.get("schedule", {})
@@ -50,6 +86,20 @@ def start_scheduler() -> None:
     scheduler = BlockingScheduler()
     scheduler.add_job(_run_pipeline_job, trigger, id="newsletter_pipeline")
 
+    refresh_minutes = get_subreddit_config().get("refresh", {}).get("interval_minutes", 0)
+    if refresh_minutes:
+        scheduler.add_job(
+            _run_refresh_job,
+            IntervalTrigger(minutes=refresh_minutes),
+            id="metric_refresh",
+            max_instances=1,
+            coalesce=True,
+        )
+        logger.info(f"Metric refresh every {refresh_minutes} minutes")
+
+    # The scheduler process has no web app to serve /metrics from
+    start_metrics_server(schedule.get("metrics_port", 0))
+
     logger.info(
         f"Scheduler started: {frequency} at {time_str} {tz} "
         f"(day_of_week={day_of_week})"
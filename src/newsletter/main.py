@@ -1,10 +1,14 @@
 import logging
-from typing import Optional
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, List, Optional
 
 import typer
 from rich.console import Console
 from rich.logging import RichHandler
 
+if TYPE_CHECKING:
+    from newsletter.profiling import RunProfiler
+
 console = Console()
 app = typer.Typer(name="newsletter", help="AI-coding subreddit newsletter")
 
@@ -18,8 +22,50 @@ def _setup_logging(verbose: bool = False) -> None:
     )
 
 
+_PROFILE_HELP = "Profile each stage (cProfile, tracemalloc, SQL counts) into profiles/"
+
+
+@contextmanager
+def _profiled(enabled: bool, command: str) -> Iterator[None]:
+    """Run the block under ``profile_run`` when ``--profile`` is given, then summarize."""
+    if not enabled:
+        yield
+        return
+    from newsletter.profiling import profile_run
+
+    profiler = None
+    try:
+        with profile_run(command) as profiler:
+            yield
+    finally:
+        # Reports are written on failure too; summarize them either way
+        if profiler is not None:
+            _print_profile(profiler)
+
+
+def _print_profile(profiler: "RunProfiler") -> None:
+    from rich.table import Table
+
+    table = Table(title=f"Profile: {profiler.name}")
+    for column in ("Stage", "Wall (s)", "SQL stmts", "SQL (s)", "Peak MB"):
+        table.add_column(column, justify="left" if column == "Stage" else "right")
+    for row in profiler.summary_rows():
+        table.add_row(
+            row["stage"],
+            f"{row['wall_seconds']:.2f}",
+            str(row["sql_statements"]),
+            f"{row['sql_seconds']:.2f}",
+            f"{row['peak_memory_mb']:.1f}",
+        )
+    console.print(table)
+    console.print(f"Reports in {profiler.output_dir}")
+
+
 @app.command()
-def scrape(verbose: bool = typer.Option(False, "--verbose", "-v")) -> None:
+def scrape(
+    profile: bool = typer.Option(False, "--profile", help=_PROFILE_HELP),
+    verbose: bool = typer.Option(False, "--verbose", "-v"),
+) -> None:
     """Scrape all configured subreddits."""
     _setup_logging(verbose)
     from newsletter.database import get_session_factory
@@ -27,7 +73,8 @@ def scrape(verbose: bool = typer.Option(False, "--verbose", "-v")) -> None:
 
     session = get_session_factory()()
     try:
-        run = run_scrape(session)
+        with _profiled(profile, "scrape"):
+            run = run_scrape(session)
         console.print(
             f"[green]Scrape complete:[/green] {run.total_posts} total, "
             f"{run.new_posts} new, {len(run.errors)} errors"
@@ -37,16 +84,53 @@ def scrape(verbose: bool = typer.Option(False, "--verbose", "-v")) -> None:
 
 
 @app.command()
-def analyze(verbose: bool = typer.Option(False, "--verbose", "-v")) -> None:
+def refresh(verbose: bool = typer.Option(False, "--verbose", "-v")) -> None:
+    """Refresh score and comment counts for recent posts and record the observations."""
+    _setup_logging(verbose)
+    from newsletter.database import get_session_factory
+    from newsletter.scraper.metrics import refresh_post_metrics
+
+    session = get_session_factory()()
+    try:
+        count = refresh_post_metrics(session)
+        console.print(f"[green]Refreshed metrics for {count} posts[/green]")
+    finally:
+        session.close()
+
+
+@app.command()
+def analyze(
+    batch_api: bool = typer.Option(
+        False, "--batch-api", help="Submit through the Message Batches API and return"
+    ),
+    collect: bool = typer.Option(
+        False, "--collect", help="Store results from submitted Message Batches"
+    ),
+    profile: bool = typer.Option(False, "--profile", help=_PROFILE_HELP),
+    verbose: bool = typer.Option(False, "--verbose", "-v"),
+) -> None:
     """Analyze unprocessed posts with Claude."""
     _setup_logging(verbose)
     from newsletter.database import get_session_factory
     from newsletter.analyzer.categorizer import categorize_unanalyzed_posts
+    from newsletter.profiling import profile_stage
 
     session = get_session_factory()()
     try:
-        count = categorize_unanalyzed_posts(session)
-        console.print(f"[green]Analyzed {count} posts[/green]")
+        if collect:
+            from newsletter.analyzer.batches import collect_categorization_batches
+
+            with _profiled(profile, "analyze"), profile_stage("collect"):
+                count = collect_categorization_batches(session)
+            console.print(f"[green]Collected {count} analyses[/green]")
+        elif batch_api:
+            with _profiled(profile, "analyze"), profile_stage("submit"):
+                count = categorize_unanalyzed_posts(session, use_batch_api=True)
+            console.print(f"[green]Submitted {count} posts for batch analysis[/green]")
+        else:
+            with _profiled(profile, "analyze"), profile_stage("categorize"):
+                count = categorize_unanalyzed_posts(session)
+            console.print(f"[green]Analyzed {count} posts[/green]")
     finally:
         session.close()
 
@@ -54,24 +138,226 @@ def analyze(verbose: bool = typer.Option(False, "--verbose", "-v")) -> None:
 @app.command()
 def pipeline(
     frequency: str = typer.Option("daily", help="daily or weekly"),
+    resume: bool = typer.Option(
+        False, "--resume", help="Continue the latest unfinished run, skipping completed stages"
+    ),
+    run_id: Optional[int] = typer.Option(None, "--run-id", help="Work on this pipeline run"),
+    stage: Optional[List[str]] = typer.Option(
+        None, "--stage", help="Run only this stage (scrape, categorize, synthesize); repeatable"
+    ),
+    streaming: Optional[bool] = typer.Option(
+        None,
+        "--streaming/--sequential",
+        help="Categorize while scraping (default: pipeline.mode in newsletter.yaml)",
+    ),
+    profile: bool = typer.Option(False, "--profile", help=_PROFILE_HELP),
     verbose: bool = typer.Option(False, "--verbose", "-v"),
 ) -> None:
     """Run the full pipeline: scrape, analyze, synthesize, store."""
     _setup_logging(verbose)
     from newsletter.database import get_session_factory
-    from newsletter.pipeline.orchestrator import run_pipeline
+    from newsletter.pipeline.orchestrator import PipelineError, run_pipeline
+
+    session = get_session_factory()()
+    try:
+        with _profiled(profile, "pipeline"):
+            newsletter = run_pipeline(
+                session,
+                frequency=frequency,
+                resume=resume,
+                run_id=run_id,
+                stages=stage,
+                streaming=streaming,
+            )
+        if newsletter is None:
+            console.print("[green]Pipeline stages complete[/green]")
+        else:
+            console.print(
+                f"[green]Pipeline complete![/green] Newsletter #{newsletter.id}: "
+                f'"{newsletter.edition_title}" ({newsletter.post_count} posts)'
+            )
+    except PipelineError as e:
+        console.print(f"[red]{e}[/red]")
+        console.print(f"Retry the failed stage with: newsletter pipeline --run-id {e.run.id}")
+        raise typer.Exit(1) from None
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1) from None
+    finally:
+        session.close()
+
+
+@app.command()
+def runs(
+    limit: int = typer.Option(10, "--limit", "-n"),
+) -> None:
+    """List recent pipeline runs and the status of each stage."""
+    from rich.table import Table
+
+    from newsletter.database import get_session_factory
+    from newsletter.models import PipelineRun
+    from newsletter.pipeline.orchestrator import STAGES, stage_status
+
+    session = get_session_factory()()
+    try:
+        table = Table()
+        table.add_column("Run", justify="right")
+        table.add_column("Started")
+        table.add_column("Status")
+        for stage_name in STAGES:
+            table.add_column(stage_name.capitalize())
+        table.add_column("Error")
+        for run in (
+            session.query(PipelineRun).order_by(PipelineRun.id.desc()).limit(limit)
+        ):
+            table.add_row(
+                str(run.id),
+                run.started_at.strftime("%Y-%m-%d %H:%M"),
+                run.status,
+                *[stage_status(run, stage_name) for stage_name in STAGES],
+                run.error,
+            )
+        console.print(table)
+    finally:
+        session.close()
+
+
+@app.command()
+def render(
+    newsletter_id: Optional[int] = typer.Option(None, "--id", help="Edition to re-render"),
+    verbose: bool = typer.Option(False, "--verbose", "-v"),
+) -> None:
+    """Re-render stored newsletter HTML (one edition, or all of them)."""
+    _setup_logging(verbose)
+    from newsletter.database import get_session_factory
+    from newsletter.models import Newsletter
+    from newsletter.web.render import store_newsletter_html
+
+    session = get_session_factory()()
+    try:
+        query = session.query(Newsletter)
+        if newsletter_id is not None:
+            query = query.filter(Newsletter.id == newsletter_id)
+        count = 0
+        for newsletter in query.order_by(Newsletter.id):
+            store_newsletter_html(session, newsletter)
+            count += 1
+        console.print(f"[green]Rendered {count} editions[/green]")
+    finally:
+        session.close()
+
+
+@app.command()
+def subscribe(
+    email: str = typer.Argument(..., help="Subscriber address"),
+    subreddit: Optional[List[str]] = typer.Option(
+        None, "--subreddit", "-s", help="Only items from this subreddit (repeatable)"
+    ),
+    tool_tag: Optional[List[str]] = typer.Option(
+        None, "--tool-tag", "-t", help="Only items with this tool tag (repeatable)"
+    ),
+) -> None:
+    """Add a subscriber, or update an existing one's preferences (none = everything)."""
+    from newsletter.config import get_newsletter_config
+    from newsletter.database import get_session_factory
+    from newsletter.models import Subscriber
+
+    known_tags = set(get_newsletter_config().get("tool_tags", []))
+    unknown = set(tool_tag or []) - known_tags
+    if unknown:
+        console.print(f"[red]Unknown tool tags: {', '.join(sorted(unknown))}[/red]")
+        raise typer.Exit(1)
+
+    session = get_session_factory()()
+    try:
+        subscriber = session.query(Subscriber).filter(Subscriber.email == email).first()
+        if subscriber is None:
+            subscriber = Subscriber(email=email)
+            session.add(subscriber)
+        subscriber.active = True
+        subscriber.unsubscribed_at = None
+        subscriber.subreddits = sorted(set(subreddit or []))
+        subscriber.tool_tags = sorted(set(tool_tag or []))
+        session.commit()
+        console.print(
+            f"[green]{email}[/green]: subreddits={subscriber.subreddits or 'all'}, "
+            f"tool tags={subscriber.tool_tags or 'all'}"
+        )
+    finally:
+        session.close()
+
+
+@app.command()
+def send(
+    newsletter_id: Optional[int] = typer.Option(
+        None, "--id", help="Queue and send this edition (default: resume the existing queue)"
+    ),
+    wait: bool = typer.Option(
+        True, "--wait/--no-wait", help="Wait for messages in retry backoff before exiting"
+    ),
+    verbose: bool = typer.Option(False, "--verbose", "-v"),
+) -> None:
+    """Email an edition to active subscribers, or finish sending what is queued."""
+    _setup_logging(verbose)
+    from newsletter.database import get_session_factory
+    from newsletter.delivery.email import deliver_newsletter, send_pending
+    from newsletter.models import Newsletter
 
     session = get_session_factory()()
     try:
-        newsletter = run_pipeline(session, frequency=frequency)
+        if newsletter_id is None:
+            totals = send_pending(session, wait=wait)
+        else:
+            newsletter = session.get(Newsletter, newsletter_id)
+            if newsletter is None:
+                console.print(f"[red]Newsletter #{newsletter_id} not found[/red]")
+                raise typer.Exit(1)
+            totals = deliver_newsletter(session, newsletter, wait=wait)
         console.print(
-            f"[green]Pipeline complete![/green] Newsletter #{newsletter.id}: "
-            f'"{newsletter.edition_title}" ({newsletter.post_count} posts)'
+            f"[green]Sent {totals['sent']} emails[/green] ({totals['skipped']} skipped, "
+            f"{totals['retry']} waiting to retry, {totals['failed']} failed)"
         )
     finally:
         session.close()
 
 
+@app.command()
+def search(
+    query: str = typer.Argument(..., help="Words to search for"),
+    limit: int = typer.Option(20, "--limit", "-n"),
+    subreddit: Optional[str] = typer.Option(None, "--subreddit", "-s"),
+    verbose: bool = typer.Option(False, "--verbose", "-v"),
+) -> None:
+    """Full-text search over stored posts and their analyses."""
+    _setup_logging(verbose)
+    from rich.table import Table
+
+    from newsletter.database import get_session_factory
+    from newsletter.search import search_posts
+
+    session = get_session_factory()()
+    try:
+        results, _ = search_posts(session, query, limit=limit, subreddit=subreddit)
+        if not results:
+            console.print(f"[yellow]No posts match {query!r}[/yellow]")
+            return
+        table = Table(show_lines=False)
+        table.add_column("ID", justify="right")
+        table.add_column("Subreddit")
+        table.add_column("Title")
+        table.add_column("Match")
+        for result in results:
+            table.add_row(
+                str(result.post.id),
+                f"r/{result.post.subreddit}",
+                result.post.title,
+                result.snippet,
+            )
+        console.print(table)
+    finally:
+        session.close()
+
+
 @app.command()
 def serve(
     host: Optional[str] = typer.Option(None),
@@ -88,6 +374,8 @@ def serve(
         host=host or settings.web_host,
         port=port or settings.web_port,
         reload=True,
+        # Template and asset edits restart too, since the render version is computed once
+        reload_includes=["*.html", "*.css", "*.js"],
     )
 
 
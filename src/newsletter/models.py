@@ -1,7 +1,10 @@
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Text, Boolean, JSON
+from sqlalchemy import (
+    BigInteger, Boolean, DateTime, Float, ForeignKey, Index, Integer, JSON, String, Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from newsletter.database import Base
@@ -13,6 +16,10 @@ def _utcnow() -> datetime:
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Keyset pagination order for the posts API
+        Index("ix_posts_created_utc_id", "created_utc", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     reddit_id: Mapped[str] = mapped_column(String(20), unique=True, index=True)
@@ -26,10 +33,16 @@ class Post(Base):
     num_comments: Mapped[int] = mapped_column(Integer, default=0)
     top_comments: Mapped[List] = mapped_column(JSON, default=list)
     created_utc: Mapped[datetime] = mapped_column(DateTime(timezone=True))
-    scraped_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
+    scraped_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=_utcnow, index=True
+    )
     scrape_run_id: Mapped[Optional[int]] = mapped_column(
         Integer, ForeignKey("scrape_runs.id"), nullable=True
     )
+    # Representative of this post's near-duplicate cluster (None for representatives)
+    duplicate_of_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("posts.id"), nullable=True, index=True
+    )
 
     analysis: Mapped[Optional["PostAnalysis"]] = relationship(
         back_populates="post", uselist=False
@@ -42,7 +55,7 @@ class PostAnalysis(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     post_id: Mapped[int] = mapped_column(Integer, ForeignKey("posts.id"), unique=True, index=True)
-    category: Mapped[str] = mapped_column(String(50))
+    category: Mapped[str] = mapped_column(String(50), index=True)
     relevance_score: Mapped[float] = mapped_column(Float, default=0.0)
     quality_score: Mapped[float] = mapped_column(Float, default=0.0)
     tool_tags: Mapped[List] = mapped_column(JSON, default=list)
@@ -60,10 +73,13 @@ class Newsletter(Base):
     edition_title: Mapped[str] = mapped_column(Text, default="")
     frequency: Mapped[str] = mapped_column(String(20), default="daily")
     html_content: Mapped[str] = mapped_column(Text, default="")
+    html_version: Mapped[str] = mapped_column(String(64), default="")
     post_count: Mapped[int] = mapped_column(Integer, default=0)
     metadata_json: Mapped[Dict] = mapped_column(JSON, default=dict)
     sent: Mapped[bool] = mapped_column(Boolean, default=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=_utcnow, index=True
+    )
 
     items: Mapped[List["NewsletterItem"]] = relationship(
         back_populates="newsletter", order_by="NewsletterItem.display_order"
@@ -87,6 +103,34 @@ class NewsletterItem(Base):
     post: Mapped["Post"] = relationship(back_populates="newsletter_items")
 
 
+class PostSignature(Base):
+    """SimHash of a post, split into LSH bands for near-duplicate candidate lookup."""
+
+    __tablename__ = "post_signatures"
+
+    post_id: Mapped[int] = mapped_column(Integer, ForeignKey("posts.id"), primary_key=True)
+    simhash: Mapped[int] = mapped_column(BigInteger)
+    band_0: Mapped[int] = mapped_column(Integer, index=True)
+    band_1: Mapped[int] = mapped_column(Integer, index=True)
+    band_2: Mapped[int] = mapped_column(Integer, index=True)
+    band_3: Mapped[int] = mapped_column(Integer, index=True)
+
+
+class PostMetric(Base):
+    """One engagement observation of a post; consecutive rows give score velocity."""
+
+    __tablename__ = "post_metrics"
+    __table_args__ = (
+        Index("ix_post_metrics_post_id_observed_at", "post_id", "observed_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    post_id: Mapped[int] = mapped_column(Integer, ForeignKey("posts.id"))
+    observed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
+    score: Mapped[int] = mapped_column(Integer, default=0)
+    num_comments: Mapped[int] = mapped_column(Integer, default=0)
+
+
 class ScrapeRun(Base):
     __tablename__ = "scrape_runs"
 
@@ -100,17 +144,107 @@ class ScrapeRun(Base):
     new_posts: Mapped[int] = mapped_column(Integer, default=0)
     subreddits_scraped: Mapped[List] = mapped_column(JSON, default=list)
     errors: Mapped[List] = mapped_column(JSON, default=list)
+    # newsletter.telemetry.RunMetrics snapshot: {"counts": {...}, "timings": {...}}
+    metrics: Mapped[Dict] = mapped_column(JSON, default=dict)
 
     posts: Mapped[List["Post"]] = relationship()
 
 
+class PipelineRun(Base):
+    """One pipeline invocation with per-stage status, so a failed run can be resumed."""
+
+    __tablename__ = "pipeline_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    frequency: Mapped[str] = mapped_column(String(20), default="daily")
+    status: Mapped[str] = mapped_column(String(20), default="running", index=True)
+    # {stage: {"status", "started_at", "finished_at", "output", "error"}}
+    stages: Mapped[Dict] = mapped_column(JSON, default=dict)
+    # Accumulated across resumes; same shape as ScrapeRun.metrics
+    metrics: Mapped[Dict] = mapped_column(JSON, default=dict)
+    scrape_run_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("scrape_runs.id"), nullable=True
+    )
+    newsletter_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("newsletters.id"), nullable=True
+    )
+    error: Mapped[str] = mapped_column(Text, default="")
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
 class Subscriber(Base):
     __tablename__ = "subscribers"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Personalization: only items from these subreddits / with one of these tags (empty = all)
+    subreddits: Mapped[List] = mapped_column(JSON, default=list)
+    tool_tags: Mapped[List] = mapped_column(JSON, default=list)
     subscribed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
     unsubscribed_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
+
+
+class CategorizationCache(Base):
+    __tablename__ = "categorization_cache"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), unique=True, index=True)
+    result: Mapped[Dict] = mapped_column(JSON, default=dict)
+    hit_count: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
+    last_hit_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class CategorizationBatch(Base):
+    """One request inside an Anthropic Message Batch, with the posts it covers."""
+
+    __tablename__ = "categorization_batches"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    anthropic_batch_id: Mapped[str] = mapped_column(String(100), index=True)
+    custom_id: Mapped[str] = mapped_column(String(64), unique=True)
+    post_ids: Mapped[List] = mapped_column(JSON, default=list)
+    copies: Mapped[Dict] = mapped_column(JSON, default=dict)
+    status: Mapped[str] = mapped_column(String(20), default="submitted", index=True)
+    error: Mapped[str] = mapped_column(Text, default="")
+    submitted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
+    collected_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class EmailDelivery(Base):
+    """One recipient's copy of an edition in the outgoing mail queue."""
+
+    __tablename__ = "email_deliveries"
+    __table_args__ = (
+        UniqueConstraint("newsletter_id", "email", name="uq_email_deliveries_newsletter_email"),
+        # The sender claims due rows by status and retry time
+        Index("ix_email_deliveries_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    newsletter_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("newsletters.id"), index=True
+    )
+    subscriber_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("subscribers.id"), nullable=True
+    )
+    email: Mapped[str] = mapped_column(String(255))
+    # pending, sending (claimed by a sender), sent, failed, or skipped when none of
+    # the edition's items match the subscriber's preferences
+    status: Mapped[str] = mapped_column(String(20), default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[str] = mapped_column(Text, default="")
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
@@ -1,38 +1,247 @@
 import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
 from sqlalchemy.orm import Session
 
-from newsletter.models import Newsletter
+from newsletter.config import get_newsletter_config
+from newsletter.models import Newsletter, PipelineRun
 from newsletter.scraper.reddit import run_scrape
 from newsletter.analyzer.categorizer import categorize_unanalyzed_posts
 from newsletter.analyzer.synthesizer import synthesize_newsletter
+from newsletter.telemetry import collect, observe_stage
+from newsletter.web.render import store_newsletter_html
 
 logger = logging.getLogger(__name__)
 
+STAGES = ("scrape", "categorize", "synthesize")
 
-def run_pipeline(session: Session, frequency: str = "daily") -> Newsletter:
-    """Execute the full pipeline: scrape → analyze → synthesize → store."""
 
-    # Step 1: Scrape
-    logger.info("Step 1/3: Scraping subreddits...")
+class PipelineError(Exception):
+    """A stage failed; the run is stored as failed and can be resumed."""
+
+    def __init__(self, run: PipelineRun, stage: str, cause: Exception) -> None:
+        super().__init__(f"Pipeline run #{run.id} failed at {stage}: {cause}")
+        self.run = run
+        self.stage = stage
+
+
+def _scrape_stage(session: Session, run: PipelineRun) -> Dict[str, Any]:
+    # run_scrape observes its own stage timing
     scrape_run = run_scrape(session)
+    run.scrape_run_id = scrape_run.id
     logger.info(
         f"  Scraped {scrape_run.total_posts} posts "
         f"({scrape_run.new_posts} new)"
     )
+    return {
+        "scrape_run_id": scrape_run.id,
+        "total_posts": scrape_run.total_posts,
+        "new_posts": scrape_run.new_posts,
+    }
 
-    # Step 2: Categorize
-    logger.info("Step 2/3: Categorizing posts with Claude...")
-    analyzed_count = categorize_unanalyzed_posts(session)
+
+def _categorize_stage(session: Session, run: PipelineRun) -> Dict[str, Any]:
+    with observe_stage("categorize"):
+        analyzed_count = categorize_unanalyzed_posts(session)
     logger.info(f"  Categorized {analyzed_count} posts")
+    return {"analyzed": analyzed_count}
+
 
-    # Step 3: Synthesize
-    logger.info("Step 3/3: Synthesizing newsletter...")
-    newsletter = synthesize_newsletter(session, frequency=frequency)
+def _synthesize_stage(session: Session, run: PipelineRun) -> Dict[str, Any]:
+    with observe_stage("synthesize"):
+        newsletter = synthesize_newsletter(session, frequency=run.frequency)
+        # Published editions never change, so render the page once now
+        store_newsletter_html(session, newsletter)
+    run.newsletter_id = newsletter.id
     logger.info(
         f"  Newsletter #{newsletter.id}: "
         f'"{newsletter.edition_title}" '
         f"({newsletter.post_count} posts)"
     )
+    return {"newsletter_id": newsletter.id, "post_count": newsletter.post_count}
+
+
+def _streaming_scrape_and_categorize(
+    session: Session, run: PipelineRun
+) -> Dict[str, Dict[str, Any]]:
+    from newsletter.pipeline.streaming import scrape_and_categorize
+
+    with observe_stage("scrape_categorize"):
+        scrape_run, analyzed_count = scrape_and_categorize(session)
+    run.scrape_run_id = scrape_run.id
+    logger.info(
+        f"  Scraped {scrape_run.total_posts} posts ({scrape_run.new_posts} new), "
+        f"categorized {analyzed_count}"
+    )
+    return {
+        "scrape": {
+            "scrape_run_id": scrape_run.id,
+            "total_posts": scrape_run.total_posts,
+            "new_posts": scrape_run.new_posts,
+        },
+        "categorize": {"analyzed": analyzed_count, "streamed": True},
+    }
+
+
+_STAGE_FUNCS: Dict[str, Callable[[Session, PipelineRun], Dict[str, Any]]] = {
+    "scrape": _scrape_stage,
+    "categorize": _categorize_stage,
+    "synthesize": _synthesize_stage,
+}
+
+_STAGE_MESSAGES = {
+    "scrape": "Scraping subreddits...",
+    "categorize": "Categorizing posts with Claude...",
+    "synthesize": "Synthesizing newsletter...",
+}
+
+
+def _set_stage(session: Session, run: PipelineRun, stage: str, **fields: Any) -> None:
+    stages = dict(run.stages or {})
+    stages[stage] = {**stages.get(stage, {}), **fields}
+    # Reassign so the JSON column is flagged dirty
+    run.stages = stages
+    session.commit()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def stage_status(run: PipelineRun, stage: str) -> str:
+    return (run.stages or {}).get(stage, {}).get("status", "pending")
+
+
+def get_pipeline_run(
+    session: Session, run_id: Optional[int] = None, resume: bool = False, frequency: str = "daily"
+) -> PipelineRun:
+    """The run to work on: ``run_id``, the latest unfinished run when resuming, or a new run."""
+    if run_id is not None:
+        run = session.get(PipelineRun, run_id)
+        if run is None:
+            raise ValueError(f"Pipeline run #{run_id} not found")
+        return run
+
+    if resume:
+        run = (
+            session.query(PipelineRun)
+            .order_by(PipelineRun.started_at.desc(), PipelineRun.id.desc())
+            .first()
+        )
+        if run is not None and run.status != "completed":
+            logger.info(f"Resuming pipeline run #{run.id} ({run.status})")
+            return run
+        logger.info("No unfinished pipeline run to resume; starting a new one")
+
+    run = PipelineRun(frequency=frequency, stages={})
+    session.add(run)
+    session.commit()
+    return run
+
+
+def _fail(session: Session, run: PipelineRun, stages: Sequence[str], error: Exception) -> None:
+    session.rollback()
+    for stage in stages:
+        _set_stage(session, run, stage, status="failed", finished_at=_now(), error=str(error))
+    run.status = "failed"
+    run.error = f"{stages[-1]}: {error}"
+    run.finished_at = datetime.now(timezone.utc)
+    session.commit()
+
+
+def _run_todo(session: Session, run: PipelineRun, todo: List[str], streaming: bool) -> None:
+    """Run ``todo`` in pipeline order, checkpointing each stage."""
+    if streaming and "scrape" in todo and "categorize" in todo:
+        logger.info(f"Run #{run.id}: scraping and categorizing (streaming)...")
+        for stage in ("scrape", "categorize"):
+            _set_stage(session, run, stage, status="running", started_at=_now(), error="")
+        try:
+            outputs = _streaming_scrape_and_categorize(session, run)
+        except Exception as e:
+            _fail(session, run, ("scrape", "categorize"), e)
+            raise PipelineError(run, "scrape/categorize", e) from e
+        for stage, output in outputs.items():
+            _set_stage(session, run, stage, status="completed", finished_at=_now(), output=output)
+        todo = [stage for stage in todo if stage not in outputs]
+
+    for stage in STAGES:
+        if stage not in todo:
+            if stage_status(run, stage) == "completed":
+                logger.info(f"Run #{run.id}: {stage} already completed, skipping")
+            continue
+
+        position = f"{STAGES.index(stage) + 1}/{len(STAGES)}"
+        logger.info(f"Run #{run.id} step {position}: {_STAGE_MESSAGES[stage]}")
+        _set_stage(session, run, stage, status="running", started_at=_now(), error="")
+        try:
+            output = _STAGE_FUNCS[stage](session, run)
+        except Exception as e:
+            _fail(session, run, (stage,), e)
+            raise PipelineError(run, stage, e) from e
+        _set_stage(session, run, stage, status="completed", finished_at=_now(), output=output)
+
+
+def run_stages(
+    session: Session,
+    run: PipelineRun,
+    stages: Optional[Sequence[str]] = None,
+    streaming: bool = False,
+) -> PipelineRun:
+    """Run the given stages of ``run`` in pipeline order, recording each one.
+
+    Without ``stages`` every stage that has not completed yet is run, which is
+    what resuming means. Explicitly named stages run even if they completed before.
+    With ``streaming``, scrape and categorize run together when both are due.
+    """
+    if stages:
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+        todo: List[str] = [stage for stage in STAGES if stage in stages]
+    else:
+        todo = [stage for stage in STAGES if stage_status(run, stage) != "completed"]
+
+    run.status = "running"
+    run.error = ""
+    session.commit()
+
+    with collect(run.metrics) as run_metrics:
+        try:
+            _run_todo(session, run, todo, streaming)
+        finally:
+            # Kept on failure too, and added to on resume
+            run.metrics = run_metrics.snapshot()
+            session.commit()
+
+    all_done = all(stage_status(run, stage) == "completed" for stage in STAGES)
+    run.status = "completed" if all_done else "partial"
+    run.finished_at = datetime.now(timezone.utc)
+    session.commit()
+    return run
+
+
+def run_pipeline(
+    session: Session,
+    frequency: str = "daily",
+    resume: bool = False,
+    run_id: Optional[int] = None,
+    stages: Optional[Sequence[str]] = None,
+    streaming: Optional[bool] = None,
+) -> Optional[Newsletter]:
+    """Execute the pipeline: scrape → analyze → synthesize → store.
+
+    Progress is checkpointed in a ``PipelineRun``. With ``resume`` (or a
+    ``run_id``) stages that already succeeded are skipped, so a failure costs only
+    the failed stage. Returns the run's newsletter once synthesis has completed.
 
-    return newsletter
+    ``streaming`` (default: ``pipeline.mode: streaming`` in newsletter.yaml)
+    categorizes posts while the scrape is still running.
+    """
+    if streaming is None:
+        streaming = get_newsletter_config().get("pipeline", {}).get("mode") == "streaming"
+    run = get_pipeline_run(session, run_id=run_id, resume=resume, frequency=frequency)
+    run = run_stages(session, run, stages, streaming=streaming)
+    if run.newsletter_id is None:
+        return None
+    return session.get(Newsletter, run.newsletter_id)
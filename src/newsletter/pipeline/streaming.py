@@ -0,0 +1,178 @@
+"""Streaming mode: categorize posts while the scrape is still running.
+
+``run_scrape`` hands each subreddit's new post ids to a bounded queue as soon
+as they are committed. A consumer thread, with its own session, drains the
+queue in chunks and feeds them to one categorization run, whose worker pool
+keeps up to ``claude.categorization_concurrency`` requests in flight across
+chunks, so Claude requests overlap with the remaining Reddit requests. Each
+chunk is only signed for near-duplicate detection; the full clustering pass,
+cache eviction and the submitted-batch lookup happen once per run. When the
+scrape finishes the queue is closed, the consumer waits for its requests, and
+a final sweep retries the streamed posts it did not finish (failed batches)
+and copies analyses to their duplicates. Unanalyzed posts from earlier runs
+are left to the regular categorize stage.
+
+The consumer writes analyses through its own session while the scrape commits
+posts through the caller's, so on SQLite there are two writers. That relies on
+the WAL journal and busy timeout ``database`` sets on every connection:
+``SQLITE_BUSY_TIMEOUT_MS`` must outlast the longest commit of either side.
+"""
+import contextvars
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from newsletter.analyzer.categorizer import (
+    _CategorizationRun,
+    _cluster_duplicates,
+    _find_unanalyzed_posts,
+    _submitted_post_ids,
+)
+from newsletter.analyzer.dedup import inherit_cluster_analyses
+from newsletter.config import get_newsletter_config
+from newsletter.database import get_session_factory
+from newsletter.models import ScrapeRun
+from newsletter.scraper.reddit import run_scrape
+
+logger = logging.getLogger(__name__)
+
+_DONE = None  # end-of-stream marker
+_PUT_TIMEOUT = 1.0  # seconds between checks that the consumer is still alive
+_POLL_SECONDS = 0.1  # how often finished batches are written while requests are in flight
+
+
+class _CategorizeConsumer(threading.Thread):
+    """Pulls post ids off the queue and feeds them to one categorization run in chunks."""
+
+    def __init__(
+        self, ids: "queue.Queue[Optional[int]]", batch_size: int, flush_seconds: float
+    ) -> None:
+        super().__init__(name="categorize-consumer", daemon=True)
+        self._ids = ids
+        self._batch_size = batch_size
+        self._flush_seconds = flush_seconds
+        self.analyzed = 0
+        self.batches = 0
+        self.error: Optional[BaseException] = None
+        # Report Claude usage into the run metrics of the thread that started us
+        self._context = contextvars.copy_context()
+
+    def run(self) -> None:
+        self._context.run(self._consume)
+
+    def _consume(self) -> None:
+        session = get_session_factory()()
+        try:
+            run = _CategorizationRun(session)
+            try:
+                self._feed(session, run)
+            finally:
+                self.analyzed = run.finish()
+        except BaseException as e:
+            self.error = e
+            logger.exception("Streaming categorization failed")
+        finally:
+            session.close()
+
+    def _feed(self, session: Session, run: _CategorizationRun) -> None:
+        dedup_config = get_newsletter_config().get("dedup", {})
+        pending_ids = _submitted_post_ids(session)
+        chunk: List[int] = []
+        last_id = time.monotonic()
+
+        def _flush() -> None:
+            self.batches += 1
+            logger.info(f"Streaming: categorizing {len(chunk)} posts (chunk {self.batches})")
+            _cluster_duplicates(session, dedup_config, post_ids=chunk)
+            posts = _find_unanalyzed_posts(session, chunk, pending_ids)
+            if posts:
+                run.add(posts, hold_partial=True)
+            chunk.clear()
+
+        while True:
+            run.poll()
+            try:
+                post_id = self._ids.get(
+                    timeout=_POLL_SECONDS if run.busy else self._flush_seconds
+                )
+            except queue.Empty:
+                # The scrape is between subreddits; don't let a partial chunk wait
+                if time.monotonic() - last_id >= self._flush_seconds:
+                    if chunk:
+                        _flush()
+                    run.flush()
+                continue
+            if post_id is _DONE:
+                break
+            last_id = time.monotonic()
+            chunk.append(post_id)
+            if len(chunk) >= self._batch_size:
+                _flush()
+        if chunk:
+            _flush()
+
+
+def _sweep(session: Session, post_ids: List[int]) -> int:
+    """Categorize streamed posts still lacking an analysis and fill in their duplicates."""
+    analyzed = 0
+    posts = _find_unanalyzed_posts(session, post_ids)
+    if posts:
+        logger.info(f"Streaming: retrying {len(posts)} posts the stream did not finish")
+        run = _CategorizationRun(session)
+        run.add(posts)
+        analyzed = run.finish()
+    if get_newsletter_config().get("dedup", {}).get("enabled", True):
+        # Chunks only signed their posts; members are filled in once, here
+        analyzed += inherit_cluster_analyses(session)
+    return analyzed
+
+
+def scrape_and_categorize(session: Session) -> Tuple[ScrapeRun, int]:
+    """Scrape with categorization running alongside; returns the scrape run and analyses stored."""
+    stream_config = get_newsletter_config().get("pipeline", {})
+    ids: "queue.Queue[Optional[int]]" = queue.Queue(maxsize=stream_config.get("queue_size", 500))
+    consumer = _CategorizeConsumer(
+        ids,
+        batch_size=stream_config.get("stream_batch_size", 50),
+        flush_seconds=stream_config.get("flush_seconds", 5.0),
+    )
+    consumer.start()
+
+    def _put(post_id: Optional[int]) -> None:
+        # Blocks while the queue is full (backpressure on the scrape), but not forever
+        while True:
+            if not consumer.is_alive():
+                raise RuntimeError("Streaming categorization stopped") from consumer.error
+            try:
+                ids.put(post_id, timeout=_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+
+    streamed: List[int] = []
+
+    def _on_ingest(post_ids: List[int]) -> None:
+        streamed.extend(post_ids)
+        for post_id in post_ids:
+            _put(post_id)
+
+    try:
+        scrape_run = run_scrape(session, on_ingest=_on_ingest)
+    finally:
+        if consumer.is_alive():
+            _put(_DONE)
+        consumer.join()
+
+    if consumer.error is not None:
+        raise RuntimeError("Streaming categorization failed") from consumer.error
+
+    analyzed = consumer.analyzed + _sweep(session, streamed)
+    logger.info(
+        f"Streaming: {analyzed} analyses stored "
+        f"({consumer.analyzed} while scraping, in {consumer.batches} chunks)"
+    )
+    return scrape_run, analyzed
@@ -0,0 +1,210 @@
+"""Opt-in profiling for CLI runs (``--profile``).
+
+``profile_run`` activates a ``RunProfiler`` for the duration of a command.
+While it is active, every ``profile_stage`` block (pipeline stages open one
+through ``newsletter.telemetry.observe_stage``) is run under cProfile and
+tracemalloc, and the SQL statements it issues are counted and timed through
+SQLAlchemy cursor events. When the command finishes each stage gets a
+``.pstats`` file and a text report with its hottest functions and largest
+allocation sites, plus a ``summary.json`` for the whole run.
+
+cProfile only sees the thread that opened the stage; Claude and Reddit worker
+threads show up as time spent waiting on their futures. tracemalloc and the SQL
+counts cover every thread.
+"""
+import cProfile
+import io
+import json
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+
+from newsletter.config import PROJECT_ROOT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = PROJECT_ROOT / "profiles"
+DEFAULT_TOP = 25
+
+# Frames that would otherwise dominate the allocation report
+_ALLOCATION_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+@dataclass
+class StageProfile:
+    """Everything recorded for one stage; a stage entered twice accumulates."""
+
+    name: str
+    profile: cProfile.Profile = field(default_factory=cProfile.Profile)
+    runs: int = 0
+    wall_seconds: float = 0.0
+    sql_statements: int = 0
+    sql_seconds: float = 0.0
+    peak_memory_bytes: int = 0
+    allocations: Optional[tracemalloc.Snapshot] = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "sql_statements": self.sql_statements,
+            "sql_seconds": round(self.sql_seconds, 3),
+            "peak_memory_mb": round(self.peak_memory_bytes / 1024 / 1024, 1),
+        }
+
+
+class RunProfiler:
+    """Per-stage cProfile, tracemalloc and SQL statistics for one command."""
+
+    def __init__(self, name: str, output_dir: Path, top: int = DEFAULT_TOP) -> None:
+        self.name = name
+        self.output_dir = output_dir
+        self.top = top
+        self.stages: Dict[str, StageProfile] = {}
+        self.unscoped_sql_statements = 0
+        self._current: Optional[StageProfile] = None
+        self._thread = threading.get_ident()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        # Nested stages (e.g. the scrape inside a streaming scrape_categorize) and
+        # stages opened from worker threads are part of the enclosing stage
+        if self._current is not None or threading.get_ident() != self._thread:
+            yield
+            return
+
+        stage = self.stages.setdefault(name, StageProfile(name))
+        stage.runs += 1
+        self._current = stage
+        # Leave tracing on afterwards if it was started outside us (PYTHONTRACEMALLOC)
+        was_tracing = tracemalloc.is_tracing()
+        if was_tracing:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+        start = time.perf_counter()
+        stage.profile.enable()
+        try:
+            yield
+        finally:
+            stage.profile.disable()
+            stage.wall_seconds += time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            if peak >= stage.peak_memory_bytes:
+                stage.peak_memory_bytes = peak
+                stage.allocations = tracemalloc.take_snapshot().filter_traces(
+                    _ALLOCATION_FILTERS
+                )
+            if not was_tracing:
+                tracemalloc.stop()
+            self._current = None
+
+    def record_sql(self, seconds: float) -> None:
+        with self._lock:
+            stage = self._current
+            if stage is None:
+                self.unscoped_sql_statements += 1
+                return
+            stage.sql_statements += 1
+            stage.sql_seconds += seconds
+
+    def _stage_report(self, stage: StageProfile) -> str:
+        out = io.StringIO()
+        summary = stage.summary()
+        out.write(f"Stage: {stage.name}\n")
+        for key, value in summary.items():
+            out.write(f"  {key}: {value}\n")
+
+        out.write(f"\nTop {self.top} functions by cumulative time\n")
+        pstats.Stats(stage.profile, stream=out).sort_stats("cumulative").print_stats(self.top)
+
+        out.write(f"Top {self.top} allocation sites (live at the stage's peak run)\n")
+        if stage.allocations is not None:
+            for stat in stage.allocations.statistics("lineno")[: self.top]:
+                frame = stat.traceback[0]
+                out.write(
+                    f"  {stat.size / 1024:10.1f} KiB {stat.count:8} blocks  "
+                    f"{frame.filename}:{frame.lineno}\n"
+                )
+        return out.getvalue()
+
+    def write(self) -> Path:
+        """Write the per-stage reports and ``summary.json``; returns the directory."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for stage in self.stages.values():
+            stage.profile.dump_stats(str(self.output_dir / f"{stage.name}.pstats"))
+            (self.output_dir / f"{stage.name}.txt").write_text(self._stage_report(stage))
+
+        summary = {
+            "command": self.name,
+            "stages": {name: stage.summary() for name, stage in self.stages.items()},
+            "unscoped_sql_statements": self.unscoped_sql_statements,
+        }
+        (self.output_dir / "summary.json").write_text(json.dumps(summary, indent=2) + "\n")
+        return self.output_dir
+
+    def summary_rows(self) -> List[Dict[str, Any]]:
+        return [{"stage": name, **stage.summary()} for name, stage in self.stages.items()]
+
+
+_active: Optional[RunProfiler] = None
+
+
+@contextmanager
+def profile_run(
+    name: str, output_dir: Optional[Path] = None, top: int = DEFAULT_TOP
+) -> Iterator[RunProfiler]:
+    """Profile the stages run inside this block; reports are written on exit."""
+    global _active
+    from newsletter.database import get_engine
+
+    if _active is not None:
+        raise RuntimeError("A profiling run is already active")
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    profiler = RunProfiler(name, (output_dir or DEFAULT_PROFILE_DIR) / f"{name}-{stamp}", top)
+    engine = get_engine()
+
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info["profile_started"].pop()
+        profiler.record_sql(time.perf_counter() - started)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = None
+        event.remove(engine, "before_cursor_execute", _before)
+        event.remove(engine, "after_cursor_execute", _after)
+        path = profiler.write()
+        logger.info(f"Profile written to {path}")
+
+
+@contextmanager
+def profile_stage(name: str) -> Iterator[None]:
+    """Profile ``name`` if a profiling run is active; a no-op otherwise."""
+    if _active is None:
+        yield
+        return
+    with _active.stage(name):
+        yield
@@ -0,0 +1,34 @@
+"""Rate limiting shared by the Reddit scraper and the email sender."""
+import threading
+import time
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces requests evenly across a per-minute budget.
+
+    One instance is shared by every worker that draws on the same quota, e.g.
+    all scrape workers against Reddit's per-client limit, so the whole run
+    stays under it no matter how many workers are in flight.
+    """
+
+    def __init__(self, requests_per_minute: float) -> None:
+        self._interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def acquire(self, requests: int = 1) -> None:
+        """Reserve ``requests`` consecutive slots and wait until the last of them.
+
+        The caller issues all of them as soon as this returns (e.g. every page
+        of a listing), so waiting only for the first slot would let the burst
+        run ahead of the budget.
+        """
+        if self._interval == 0.0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self._interval * requests
+        delay = slot + self._interval * (requests - 1) - now
+        if delay > 0:
+            time.sleep(delay)
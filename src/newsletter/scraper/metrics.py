@@ -0,0 +1,89 @@
+"""Engagement refresh for recently scraped posts.
+
+``refresh_post_metrics`` re-reads score and comment count for every post
+created within the refresh window through ``reddit.info``, which takes up to
+100 fullnames per request. Each observation updates the post row and is
+appended to ``post_metrics`` so ranking can look at velocity, not just the
+score at first scrape.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import praw
+from sqlalchemy.orm import Session
+
+from newsletter.config import get_subreddit_config
+from newsletter.models import Post
+from newsletter.ratelimit import RateLimiter
+from newsletter.scraper.reddit import (
+    INGEST_CHUNK_SIZE,
+    _get_reddit_client,
+    write_observations,
+)
+from newsletter.telemetry import record_reddit_requests
+
+logger = logging.getLogger(__name__)
+
+INFO_BATCH_SIZE = 100  # fullnames per reddit.info request (Reddit's maximum)
+
+
+def refresh_post_metrics(
+    session: Session, reddit: Optional[praw.Reddit] = None
+) -> int:
+    """Refresh engagement for posts inside the refresh window; returns the number observed."""
+    sub_config = get_subreddit_config()
+    refresh_config = sub_config.get("refresh", {})
+    window_days = refresh_config.get("window_days", 3)
+    rate_limiter = RateLimiter(sub_config.get("scrape", {}).get("requests_per_minute", 90))
+    reddit = reddit or _get_reddit_client()
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=window_days)
+    ids_by_fullname = {
+        f"t3_{reddit_id}": post_id
+        for reddit_id, post_id in session.query(Post.reddit_id, Post.id).filter(
+            Post.created_utc >= cutoff
+        )
+    }
+    if not ids_by_fullname:
+        logger.info("No posts inside the refresh window")
+        return 0
+
+    fullnames = list(ids_by_fullname)
+    observations: List[Dict[str, Any]] = []
+    observed = 0
+    for i in range(0, len(fullnames), INFO_BATCH_SIZE):
+        rate_limiter.acquire()
+        record_reddit_requests()
+        chunk = fullnames[i : i + INFO_BATCH_SIZE]
+        try:
+            submissions = list(reddit.info(fullnames=chunk))
+        except Exception as e:
+            logger.error(f"Metric refresh request failed for {len(chunk)} posts: {e}")
+            continue
+        for submission in submissions:
+            post_id = ids_by_fullname.get(f"t3_{submission.id}")
+            if post_id is None:
+                continue
+            observations.append({
+                "id": post_id,
+                "score": submission.score,
+                "num_comments": submission.num_comments,
+            })
+
+        # Flush in write-sized batches rather than once per request
+        if len(observations) >= INGEST_CHUNK_SIZE:
+            write_observations(session, observations)
+            session.commit()
+            observed += len(observations)
+            observations = []
+
+    write_observations(session, observations)
+    session.commit()
+    observed += len(observations)
+
+    logger.info(
+        f"Refreshed metrics for {observed} of {len(fullnames)} posts "
+        f"from the last {window_days} days"
+    )
+    return observed
@@ -1,15 +1,30 @@
 import logging
-from datetime import datetime, timezone
-from typing import Any, Dict, List
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Collection, Dict, List, Optional
 
 import praw
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 
 from newsletter.config import get_settings, get_subreddit_config, get_newsletter_config
-from newsletter.models import Post, ScrapeRun
+from newsletter.models import Post, PostMetric, ScrapeRun
+from newsletter.ratelimit import RateLimiter
+from newsletter.telemetry import (
+    collect,
+    observe_stage,
+    observe_subreddit,
+    record_reddit_requests,
+    submit_in_context,
+)
 
 logger = logging.getLogger(__name__)
 
+LISTING_PAGE_SIZE = 100  # submissions per Reddit listing request
+INGEST_CHUNK_SIZE = 500  # reddit_ids per IN lookup / rows per INSERT
+
 
 def _get_reddit_client() -> praw.Reddit:
     settings = get_settings()
@@ -50,105 +65,242 @@ def scrape_subreddit(
     fetch_limit: int,
     sort: str,
     post_limits: Dict[str, int],
+    rate_limiter: Optional[RateLimiter] = None,
+    known_ids: Collection[str] = (),
 ) -> List[Dict[str, Any]]:
-    logger.info(f"Scraping r/{name} (limit={fetch_limit}, sort={sort})")
-    subreddit = reddit.subreddit(name)
-
-    if sort == "top":
-        submissions = subreddit.top(time_filter="day", limit=fetch_limit)
-    else:
-        submissions = subreddit.hot(limit=fetch_limit)
-
-    posts = []
-    for submission in submissions:
-        if submission.stickied:
-            continue
-
-        top_comments = _extract_top_comments(
-            submission,
-            max_comments=post_limits.get("max_comments_per_post", 3),
-            max_chars=post_limits.get("comment_max_chars", 200),
+    """Fetch a subreddit listing as post dicts.
+
+    Posts in ``known_ids`` are already stored, so their comment trees are not
+    fetched; their dicts carry listing metadata only (no ``top_comments`` key).
+    """
+    with observe_subreddit(name):
+        logger.info(f"Scraping r/{name} (limit={fetch_limit}, sort={sort})")
+        subreddit = reddit.subreddit(name)
+
+        listing_requests = max(1, math.ceil(fetch_limit / LISTING_PAGE_SIZE))
+        record_reddit_requests(listing_requests)
+        if rate_limiter:
+            rate_limiter.acquire(listing_requests)
+
+        if sort == "top":
+            submissions = subreddit.top(time_filter="day", limit=fetch_limit)
+        else:
+            submissions = subreddit.hot(limit=fetch_limit)
+
+        posts = []
+        skipped = 0
+        for submission in submissions:
+            if submission.stickied:
+                continue
+
+            if submission.id in known_ids:
+                posts.append({
+                    "reddit_id": submission.id,
+                    "score": submission.score,
+                    "num_comments": submission.num_comments,
+                })
+                skipped += 1
+                continue
+
+            record_reddit_requests()
+            if rate_limiter:
+                rate_limiter.acquire()
+            top_comments = _extract_top_comments(
+                submission,
+                max_comments=post_limits.get("max_comments_per_post", 3),
+                max_chars=post_limits.get("comment_max_chars", 200),
+            )
+
+            body = submission.selftext or ""
+            body = _truncate_body(body, post_limits.get("body_max_chars", 500))
+
+            posts.append({
+                "reddit_id": submission.id,
+                "subreddit": name,
+                "title": submission.title,
+                "body": body,
+                "url": submission.url,
+                "permalink": f"https://reddit.com{submission.permalink}",
+                "author": str(submission.author) if submission.author else "[deleted]",
+                "score": submission.score,
+                "num_comments": submission.num_comments,
+                "top_comments": top_comments,
+                "created_utc": datetime.fromtimestamp(
+                    submission.created_utc, tz=timezone.utc
+                ),
+            })
+
+        logger.info(
+            f"  Found {len(posts)} posts from r/{name} "
+            f"({skipped} already stored, comments not fetched)"
         )
+        return posts
 
-        body = submission.selftext or ""
-        body = _truncate_body(body, post_limits.get("body_max_chars", 500))
 
-        posts.append({
-            "reddit_id": submission.id,
-            "subreddit": name,
-            "title": submission.title,
-            "body": body,
-            "url": submission.url,
-            "permalink": f"https://reddit.com{submission.permalink}",
-            "author": str(submission.author) if submission.author else "[deleted]",
-            "score": submission.score,
-            "num_comments": submission.num_comments,
-            "top_comments": top_comments,
-            "created_utc": datetime.fromtimestamp(
-                submission.created_utc, tz=timezone.utc
-            ),
-        })
+def _load_known_ids(session: Session, window_days: int) -> Dict[str, int]:
+    """reddit_id -> post id for posts created in the last ``window_days`` (one query).
+
+    Listings rarely surface older posts; any that do are still caught by the
+    reddit_id lookup in ``_ingest_posts``, just after their comments were fetched.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=window_days)
+    return {
+        reddit_id: post_id
+        for reddit_id, post_id in session.query(Post.reddit_id, Post.id).filter(
+            Post.created_utc >= cutoff
+        )
+    }
+
+
+def write_observations(session: Session, observations: List[Dict[str, Any]]) -> None:
+    """Update posts and append metric rows in bulk; each observation has id, score, num_comments.
+
+    The caller commits.
+    """
+    now = datetime.now(timezone.utc)
+    for i in range(0, len(observations), INGEST_CHUNK_SIZE):
+        chunk = observations[i : i + INGEST_CHUNK_SIZE]
+        session.execute(update(Post), chunk)
+        session.execute(
+            insert(PostMetric),
+            [
+                {
+                    "post_id": row["id"],
+                    "observed_at": now,
+                    "score": row["score"],
+                    "num_comments": row["num_comments"],
+                }
+                for row in chunk
+            ],
+        )
+
+
+def _ingest_posts(
+    session: Session,
+    scrape_run_id: int,
+    posts: List[Dict[str, Any]],
+    known_ids: Optional[Dict[str, int]] = None,
+) -> List[int]:
+    """Bulk-insert scraped posts that aren't stored yet; returns the new post ids.
+
+    Posts that are already stored get their score and comment count refreshed
+    from the listing instead, recorded as a ``post_metrics`` observation.
+    """
+    known_ids = known_ids or {}
+    by_reddit_id = {p["reddit_id"]: p for p in posts}
+    unknown = [reddit_id for reddit_id in by_reddit_id if reddit_id not in known_ids]
+
+    existing = {
+        reddit_id: known_ids[reddit_id] for reddit_id in by_reddit_id if reddit_id in known_ids
+    }
+    for i in range(0, len(unknown), INGEST_CHUNK_SIZE):
+        chunk = unknown[i : i + INGEST_CHUNK_SIZE]
+        existing.update(
+            session.query(Post.reddit_id, Post.id).filter(Post.reddit_id.in_(chunk)).all()
+        )
+
+    new_rows = [
+        dict(post_data, scrape_run_id=scrape_run_id)
+        for reddit_id, post_data in by_reddit_id.items()
+        if reddit_id not in existing and "title" in post_data
+    ]
+    new_ids: List[int] = []
+    for i in range(0, len(new_rows), INGEST_CHUNK_SIZE):
+        new_ids.extend(
+            session.scalars(
+                insert(Post).returning(Post.id), new_rows[i : i + INGEST_CHUNK_SIZE]
+            )
+        )
 
-    logger.info(f"  Found {len(posts)} posts from r/{name}")
-    return posts
+    # Listing metadata of stored posts doubles as an engagement observation
+    write_observations(session, [
+        {
+            "id": post_id,
+            "score": by_reddit_id[reddit_id]["score"],
+            "num_comments": by_reddit_id[reddit_id]["num_comments"],
+        }
+        for reddit_id, post_id in existing.items()
+    ])
 
+    return new_ids
 
-def run_scrape(session: Session) -> ScrapeRun:
+
+def run_scrape(
+    session: Session, on_ingest: Optional[Callable[[List[int]], None]] = None
+) -> ScrapeRun:
+    """Scrape every enabled subreddit, storing each one as soon as it arrives.
+
+    ``on_ingest`` is called with the new post ids after each subreddit is
+    committed, which lets categorization start before the scrape finishes.
+    """
     sub_config = get_subreddit_config()
     nl_config = get_newsletter_config()
     post_limits = nl_config.get("post_limits", {})
-    reddit = _get_reddit_client()
+    scrape_config = sub_config.get("scrape", {})
+    max_workers = max(1, scrape_config.get("max_workers", 4))
+    rate_limiter = RateLimiter(scrape_config.get("requests_per_minute", 90))
+    known_ids = _load_known_ids(session, scrape_config.get("known_posts_window_days", 14))
 
     scrape_run = ScrapeRun()
     session.add(scrape_run)
     session.flush()
 
-    all_posts = []
+    total_count = 0
+    new_count = 0
     errors = []
     subreddits_scraped = []
 
-    for sub in sub_config["subreddits"]:
-        if not sub.get("enabled", True):
-            continue
-        try:
-            posts = scrape_subreddit(
-                reddit,
-                name=sub["name"],
-                fetch_limit=sub.get("fetch_limit", 30),
-                sort=sub.get("sort", "hot"),
-                post_limits=post_limits,
-            )
-            all_posts.extend(posts)
-            subreddits_scraped.append(sub["name"])
-        except Exception as e:
-            logger.error(f"Error scraping r/{sub['name']}: {e}")
-            errors.append({"subreddit": sub["name"], "error": str(e)})
+    # PRAW clients are not thread-safe, so each worker thread gets its own
+    local = threading.local()
 
-    # Dedup and insert
-    new_count = 0
-    for post_data in all_posts:
-        existing = (
-            session.query(Post)
-            .filter(Post.reddit_id == post_data["reddit_id"])
-            .first()
+    def _init_worker() -> None:
+        local.reddit = _get_reddit_client()
+
+    def _scrape(sub: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return scrape_subreddit(
+            local.reddit,
+            name=sub["name"],
+            fetch_limit=sub.get("fetch_limit", 30),
+            sort=sub.get("sort", "hot"),
+            post_limits=post_limits,
+            rate_limiter=rate_limiter,
+            known_ids=known_ids,
         )
-        if existing:
-            continue
 
-        post = Post(scrape_run_id=scrape_run.id, **post_data)
-        session.add(post)
-        new_count += 1
+    enabled = [sub for sub in sub_config["subreddits"] if sub.get("enabled", True)]
+    with collect() as run_metrics, observe_stage("scrape"), ThreadPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker
+    ) as pool:
+        futures = {submit_in_context(pool, _scrape, sub): sub for sub in enabled}
+        for future in as_completed(futures):
+            sub = futures[future]
+            try:
+                posts = future.result()
+            except Exception as e:
+                logger.error(f"Error scraping r/{sub['name']}: {e}")
+                errors.append({"subreddit": sub["name"], "error": str(e)})
+                continue
+
+            # Dedup and insert each subreddit as soon as it arrives
+            new_ids = _ingest_posts(session, scrape_run.id, posts, known_ids)
+            new_count += len(new_ids)
+            total_count += len(posts)
+            subreddits_scraped.append(sub["name"])
+            session.commit()
+            if on_ingest and new_ids:
+                on_ingest(new_ids)
 
-    scrape_run.total_posts = len(all_posts)
+    scrape_run.total_posts = total_count
     scrape_run.new_posts = new_count
     scrape_run.subreddits_scraped = subreddits_scraped
     scrape_run.errors = errors
     scrape_run.status = "completed"
     scrape_run.finished_at = datetime.now(timezone.utc)
+    scrape_run.metrics = run_metrics.snapshot()
 
     session.commit()
     logger.info(
-        f"Scrape complete: {len(all_posts)} total, {new_count} new, "
+        f"Scrape complete: {total_count} total, {new_count} new, "
         f"{len(errors)} errors"
     )
     return scrape_run
@@ -0,0 +1,159 @@
+"""Ranked full-text search over post titles/bodies and their analyses.
+
+The index lives in ``post_search`` and is maintained by database triggers (see
+the ``post_search_index`` migration): an FTS5 virtual table on SQLite and a
+weighted ``tsvector`` column with a GIN index on Postgres. Other backends fall
+back to an unranked ``LIKE`` scan.
+
+Results are ordered by (rank, post id) with lower rank meaning a better match,
+so callers page through them with the last row's ``(rank, post_id)`` as ``after``.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session, joinedload
+
+from newsletter.models import Post, PostAnalysis
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# bm25 column weights for (title, body, summary, key_insight)
+_SQLITE_SEARCH = """
+SELECT post_id, rank, snippet FROM (
+    SELECT post_search.rowid AS post_id,
+           bm25(post_search, 10.0, 1.0, 4.0, 4.0) AS rank,
+           snippet(post_search, -1, '[', ']', '...', 16) AS snippet
+    FROM post_search
+    WHERE post_search MATCH :query
+) AS matches
+JOIN posts ON posts.id = matches.post_id
+WHERE {filters}
+ORDER BY rank, post_id
+LIMIT :limit
+"""
+
+_POSTGRES_SEARCH = """
+SELECT post_id, rank, snippet FROM (
+    SELECT post_search.post_id,
+           -ts_rank_cd(post_search.document, query) AS rank,
+           ts_headline(
+               'english',
+               posts.title || ' ' || coalesce(post_analyses.summary, ''),
+               query,
+               'StartSel=[, StopSel=], MaxWords=24, MinWords=8'
+           ) AS snippet
+    FROM post_search
+    CROSS JOIN websearch_to_tsquery('english', :query) AS query
+    JOIN posts ON posts.id = post_search.post_id
+    LEFT JOIN post_analyses ON post_analyses.post_id = posts.id
+    WHERE post_search.document @@ query
+) AS matches
+JOIN posts ON posts.id = matches.post_id
+WHERE {filters}
+ORDER BY rank, post_id
+LIMIT :limit
+"""
+
+
+@dataclass
+class SearchResult:
+    post: Post
+    rank: float
+    snippet: str
+
+
+def _fts5_query(query: str) -> str:
+    """Quote every word so user input can never be parsed as FTS5 syntax; words are ANDed."""
+    return " ".join(f'"{token}"' for token in _TOKEN_RE.findall(query))
+
+
+def _keyset_filters(after: Optional[Tuple[float, int]], subreddit: Optional[str]) -> str:
+    filters = ["1 = 1"]
+    if after is not None:
+        filters.append("(rank > :after_rank OR (rank = :after_rank AND post_id > :after_id))")
+    if subreddit:
+        filters.append("posts.subreddit = :subreddit")
+    return " AND ".join(filters)
+
+
+def search_posts(
+    session: Session,
+    query: str,
+    limit: int = 20,
+    after: Optional[Tuple[float, int]] = None,
+    subreddit: Optional[str] = None,
+) -> Tuple[List[SearchResult], Optional[Tuple[float, int]]]:
+    """Return one page of ranked matches and the ``after`` key of the next page (or None)."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        match = _fts5_query(query)
+        sql = _SQLITE_SEARCH
+    elif dialect == "postgresql":
+        match = query.strip()
+        sql = _POSTGRES_SEARCH
+    else:
+        return _like_search(session, query, limit, after, subreddit)
+
+    if not match:
+        return [], None
+
+    params = {"query": match, "limit": limit + 1, "subreddit": subreddit}
+    if after is not None:
+        params.update(after_rank=after[0], after_id=after[1])
+    rows = session.execute(
+        text(sql.format(filters=_keyset_filters(after, subreddit))), params
+    ).all()
+
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = (rows[-1].rank, rows[-1].post_id)
+
+    posts = {
+        post.id: post
+        for post in session.query(Post)
+        .options(joinedload(Post.analysis))
+        .filter(Post.id.in_([row.post_id for row in rows]))
+    }
+    results = [
+        SearchResult(post=posts[row.post_id], rank=row.rank, snippet=row.snippet or "")
+        for row in rows
+        if row.post_id in posts
+    ]
+    return results, next_after
+
+
+def _like_search(
+    session: Session,
+    query: str,
+    limit: int,
+    after: Optional[Tuple[float, int]],
+    subreddit: Optional[str],
+) -> Tuple[List[SearchResult], Optional[Tuple[float, int]]]:
+    """Unranked fallback for backends without a search index; newest posts first."""
+    logger.debug("No full-text index for this database; using a LIKE scan")
+    q = (
+        session.query(Post)
+        .outerjoin(Post.analysis)
+        .options(joinedload(Post.analysis))
+    )
+    for token in _TOKEN_RE.findall(query):
+        q = q.filter(or_(
+            Post.title.contains(token, autoescape=True),
+            Post.body.contains(token, autoescape=True),
+            PostAnalysis.summary.contains(token, autoescape=True),
+            PostAnalysis.key_insight.contains(token, autoescape=True),
+        ))
+    if subreddit:
+        q = q.filter(Post.subreddit == subreddit)
+    if after is not None:
+        q = q.filter(Post.id < after[1])
+
+    posts = q.order_by(Post.id.desc()).limit(limit + 1).all()
+    next_after = (0.0, posts[limit - 1].id) if len(posts) > limit else None
+    return [SearchResult(post=p, rank=0.0, snippet="") for p in posts[:limit]], next_after
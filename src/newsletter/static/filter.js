@@ -19,10 +19,10 @@ document.addEventListener("DOMContentLoaded", () => {
         const hasToolFilters = activeTools.size > 0;
 
         items.forEach((item) => {
-            const sub = item.dataset.subreddit;
+            const subs = (item.dataset.subreddit || "").split(",").filter(Boolean);
             const tools = (item.dataset.tools || "").split(",").filter(Boolean);
 
-            let showBySub = !hasSubFilters || activeSubs.has(sub);
+            let showBySub = !hasSubFilters || subs.some((s) => activeSubs.has(s));
             let showByTool = !hasToolFilters || tools.some((t) => activeTools.has(t));
 
             if (showBySub && showByTool) {
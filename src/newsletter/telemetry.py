@@ -0,0 +1,280 @@
+"""Prometheus metrics plus per-run aggregates for the pipeline and web app.
+
+Every instrumented operation updates the process-wide Prometheus collectors,
+which the web app serves at ``/metrics`` (and the scheduler on its own port,
+see ``start_metrics_server``). The same observations are also added to every
+``RunMetrics`` collector active in the current context, which is how a
+``ScrapeRun`` or ``PipelineRun`` ends up with a JSON summary of its own
+durations, request counts, tokens, retries and errors.
+
+Collectors are tracked with a context variable, so worker threads only report
+into a run when they are started with the submitting thread's context (see
+``submit_in_context``).
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client import start_http_server
+
+from newsletter.profiling import profile_stage
+
+logger = logging.getLogger(__name__)
+
+# Claude calls take seconds to minutes; web requests milliseconds
+_SLOW_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1200, 1800)
+
+STAGE_SECONDS = Histogram(
+    "newsletter_stage_duration_seconds",
+    "Wall time of pipeline stages",
+    ["stage"],
+    buckets=_SLOW_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "newsletter_stage_errors_total", "Pipeline stages that raised", ["stage"]
+)
+SUBREDDIT_SECONDS = Histogram(
+    "newsletter_subreddit_scrape_seconds",
+    "Wall time of one subreddit listing plus its comment fetches",
+    ["subreddit"],
+    buckets=_SLOW_BUCKETS,
+)
+SUBREDDIT_ERRORS = Counter(
+    "newsletter_subreddit_scrape_errors_total", "Subreddit scrapes that failed", ["subreddit"]
+)
+REDDIT_REQUESTS = Counter(
+    "newsletter_reddit_requests_total", "Requests made against the Reddit API"
+)
+CLAUDE_SECONDS = Histogram(
+    "newsletter_claude_request_duration_seconds",
+    "Latency of Claude requests",
+    ["operation"],
+    buckets=_SLOW_BUCKETS,
+)
+CLAUDE_REQUESTS = Counter(
+    "newsletter_claude_requests_total",
+    "Claude requests by outcome (ok, truncated, error)",
+    ["operation", "outcome"],
+)
+CLAUDE_TOKENS = Counter(
+    "newsletter_claude_tokens_total",
+    "Tokens reported in Claude response usage",
+    ["operation", "kind"],
+)
+RETRIES = Counter(
+    "newsletter_retries_total", "Requests retried after a failure or truncation", ["operation"]
+)
+EMAILS = Counter(
+    "newsletter_emails_total",
+    "Newsletter emails by outcome (sent, retry, failed)",
+    ["outcome"],
+)
+HTTP_SECONDS = Histogram(
+    "newsletter_http_request_duration_seconds",
+    "Latency of web requests",
+    ["method", "route", "status"],
+)
+
+# usage attribute -> token kind label
+_USAGE_FIELDS = (
+    ("input_tokens", "input"),
+    ("output_tokens", "output"),
+    ("cache_read_input_tokens", "cache_read"),
+    ("cache_creation_input_tokens", "cache_write"),
+)
+
+
+class RunMetrics:
+    """Thread-safe aggregate of the observations made while it is active.
+
+    ``initial`` is an earlier ``snapshot()`` to continue from, e.g. when a failed
+    pipeline run is resumed.
+    """
+
+    def __init__(self, initial: Optional[Dict[str, Any]] = None) -> None:
+        initial = initial or {}
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = defaultdict(int, initial.get("counts", {}))
+        # key -> [count, total seconds, max seconds]
+        self._timings: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+        for key, timing in initial.get("timings", {}).items():
+            self._timings[key] = [
+                timing["count"], timing["total_seconds"], timing["max_seconds"]
+            ]
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[key] += amount
+
+    def time(self, key: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings[key]
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-ready summary: counters plus count/total/max per timed operation."""
+        with self._lock:
+            return {
+                "counts": dict(sorted(self._counts.items())),
+                "timings": {
+                    key: {
+                        "count": count,
+                        "total_seconds": round(total, 3),
+                        "max_seconds": round(longest, 3),
+                    }
+                    for key, (count, total, longest) in sorted(self._timings.items())
+                },
+            }
+
+
+_active: "contextvars.ContextVar[Tuple[RunMetrics, ...]]" = contextvars.ContextVar(
+    "newsletter_run_metrics", default=()
+)
+
+
+@contextmanager
+def collect(initial: Optional[Dict[str, Any]] = None) -> Iterator[RunMetrics]:
+    """Aggregate everything observed in this context (and nested ones) into a ``RunMetrics``."""
+    run_metrics = RunMetrics(initial)
+    token = _active.set(_active.get() + (run_metrics,))
+    try:
+        yield run_metrics
+    finally:
+        _active.reset(token)
+
+
+def submit_in_context(pool: Executor, fn: Callable[..., Any], *args: Any) -> Future:
+    """``pool.submit`` that runs ``fn`` in a copy of the caller's context."""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _count(key: str, amount: int = 1) -> None:
+    for run_metrics in _active.get():
+        run_metrics.count(key, amount)
+
+
+def _time(key: str, seconds: float) -> None:
+    for run_metrics in _active.get():
+        run_metrics.time(key, seconds)
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """Time a pipeline stage; also its profiling scope when ``--profile`` is on."""
+    start = time.perf_counter()
+    try:
+        with profile_stage(stage):
+            yield
+    except BaseException:
+        STAGE_ERRORS.labels(stage).inc()
+        _count(f"errors.{stage}")
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        _time(f"stage.{stage}", elapsed)
+
+
+@contextmanager
+def observe_subreddit(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        SUBREDDIT_ERRORS.labels(name).inc()
+        _count("errors.subreddit")
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        SUBREDDIT_SECONDS.labels(name).observe(elapsed)
+        _time(f"subreddit.{name}", elapsed)
+
+
+def record_reddit_requests(requests: int = 1) -> None:
+    REDDIT_REQUESTS.inc(requests)
+    _count("reddit.requests", requests)
+
+
+def record_usage(operation: str, response: Any) -> None:
+    """Count the tokens in a Claude response's ``usage``.
+
+    Responses that read from the prompt cache also count towards
+    ``claude.<operation>.cache_hits``, so the hit rate is cache_hits / requests.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    for field, kind in _USAGE_FIELDS:
+        tokens = getattr(usage, field, 0) or 0
+        if tokens:
+            CLAUDE_TOKENS.labels(operation, kind).inc(tokens)
+            _count(f"claude.{operation}.{kind}_tokens", tokens)
+    if getattr(usage, "cache_read_input_tokens", 0):
+        _count(f"claude.{operation}.cache_hits")
+
+
+class ClaudeCall:
+    """Handle yielded by ``observe_claude`` for reporting usage and outcome."""
+
+    def __init__(self, operation: str) -> None:
+        self.operation = operation
+        self.outcome = "ok"
+
+    def record_usage(self, response: Any) -> None:
+        record_usage(self.operation, response)
+
+
+@contextmanager
+def observe_claude(operation: str) -> Iterator[ClaudeCall]:
+    """Time one Claude request; exceptions count as errors unless the outcome was set."""
+    call = ClaudeCall(operation)
+    start = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        if call.outcome == "ok":
+            call.outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        CLAUDE_SECONDS.labels(operation).observe(elapsed)
+        CLAUDE_REQUESTS.labels(operation, call.outcome).inc()
+        _time(f"claude.{operation}", elapsed)
+        _count(f"claude.{operation}.requests")
+        if call.outcome != "ok":
+            _count(f"claude.{operation}.{call.outcome}")
+
+
+def record_retry(operation: str, requests: int = 1) -> None:
+    RETRIES.labels(operation).inc(requests)
+    _count(f"retries.{operation}", requests)
+
+
+def record_email(outcome: str, messages: int = 1) -> None:
+    EMAILS.labels(outcome).inc(messages)
+    _count(f"email.{outcome}", messages)
+
+
+def observe_http(method: str, route: str, status: int, seconds: float) -> None:
+    HTTP_SECONDS.labels(method, route, str(status)).observe(seconds)
+
+
+def latest_metrics() -> Tuple[bytes, str]:
+    """The default registry in Prometheus text format, with its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: Optional[int]) -> None:
+    """Serve ``/metrics`` from a background thread for processes without the web app."""
+    if not port:
+        return
+    start_http_server(port)
+    logger.info(f"Prometheus metrics on :{port}/metrics")
@@ -0,0 +1,246 @@
+"""Read-only JSON API over editions, newsletter items and analyzed posts.
+
+Every list endpoint is keyset-paginated (see ``newsletter.web.pagination``) and
+returns ``{"items": [...], "next_cursor": "..."}``; pass ``next_cursor`` back as
+``cursor`` for the following page. ``fields`` takes a comma-separated subset of
+the resource's keys.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import String, cast
+from sqlalchemy.orm import Session, contains_eager
+
+from newsletter.models import Newsletter, NewsletterItem, Post, PostAnalysis
+from newsletter.search import search_posts
+from newsletter.web.dependencies import get_db
+from newsletter.web.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+    parse_fields,
+)
+
+router = APIRouter(prefix="/api", tags=["api"])
+
+NEWSLETTER_FIELDS = (
+    "id", "edition_title", "frequency", "post_count", "created_at", "url",
+)
+ITEM_FIELDS = (
+    "id", "newsletter_id", "section", "display_order", "headline", "blurb",
+    "post_id", "subreddit", "title", "permalink", "link", "score", "num_comments",
+    "category", "tool_tags",
+)
+POST_FIELDS = (
+    "id", "reddit_id", "subreddit", "title", "url", "permalink", "author",
+    "score", "num_comments", "created_utc", "category", "relevance_score",
+    "quality_score", "tool_tags", "summary", "key_insight",
+)
+SEARCH_FIELDS = POST_FIELDS + ("rank", "snippet")
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _project(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return record
+    return {key: record[key] for key in fields}
+
+
+def _newsletter_dict(newsletter: Newsletter) -> Dict[str, Any]:
+    return {
+        "id": newsletter.id,
+        "edition_title": newsletter.edition_title,
+        "frequency": newsletter.frequency,
+        "post_count": newsletter.post_count,
+        "created_at": _isoformat(newsletter.created_at),
+        "url": f"/newsletter/{newsletter.id}",
+    }
+
+
+def _item_dict(item: NewsletterItem) -> Dict[str, Any]:
+    post = item.post
+    analysis = post.analysis if post else None
+    return {
+        "id": item.id,
+        "newsletter_id": item.newsletter_id,
+        "section": item.section,
+        "display_order": item.display_order,
+        "headline": item.headline,
+        "blurb": item.blurb,
+        "post_id": item.post_id,
+        "subreddit": post.subreddit if post else None,
+        "title": post.title if post else None,
+        "permalink": post.permalink if post else None,
+        "link": post.url if post else None,
+        "score": post.score if post else None,
+        "num_comments": post.num_comments if post else None,
+        "category": analysis.category if analysis else None,
+        "tool_tags": (analysis.tool_tags or []) if analysis else [],
+    }
+
+
+def _post_dict(post: Post) -> Dict[str, Any]:
+    analysis = post.analysis
+    return {
+        "id": post.id,
+        "reddit_id": post.reddit_id,
+        "subreddit": post.subreddit,
+        "title": post.title,
+        "url": post.url,
+        "permalink": post.permalink,
+        "author": post.author,
+        "score": post.score,
+        "num_comments": post.num_comments,
+        "created_utc": _isoformat(post.created_utc),
+        "category": analysis.category if analysis else None,
+        "relevance_score": analysis.relevance_score if analysis else None,
+        "quality_score": analysis.quality_score if analysis else None,
+        "tool_tags": (analysis.tool_tags or []) if analysis else [],
+        "summary": analysis.summary if analysis else "",
+        "key_insight": analysis.key_insight if analysis else "",
+    }
+
+
+def _filter_analysis(query, subreddit, tool_tag, category):
+    if subreddit:
+        query = query.filter(Post.subreddit == subreddit)
+    if category:
+        query = query.filter(PostAnalysis.category == category)
+    if tool_tag:
+        # tool_tags is a JSON list; match the quoted tag in its serialized text
+        query = query.filter(
+            cast(PostAnalysis.tool_tags, String).contains(f'"{tool_tag}"', autoescape=True)
+        )
+    return query
+
+
+@router.get("/newsletters")
+def list_newsletters(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    frequency: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Editions, newest first."""
+    projection = parse_fields(fields, NEWSLETTER_FIELDS)
+    query = db.query(Newsletter)
+    if frequency:
+        query = query.filter(Newsletter.frequency == frequency)
+    if since:
+        query = query.filter(Newsletter.created_at >= since)
+    if until:
+        query = query.filter(Newsletter.created_at < until)
+
+    rows, next_cursor = paginate(query, Newsletter.created_at, Newsletter.id, cursor, limit)
+    return {
+        "items": [_project(_newsletter_dict(n), projection) for n in rows],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/newsletters/{newsletter_id}/items")
+def list_newsletter_items(
+    newsletter_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    section: Optional[str] = None,
+    subreddit: Optional[str] = None,
+    tool_tag: Optional[str] = None,
+    category: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Items of one edition in display order."""
+    projection = parse_fields(fields, ITEM_FIELDS)
+    if db.query(Newsletter.id).filter(Newsletter.id == newsletter_id).first() is None:
+        raise HTTPException(status_code=404, detail="Newsletter not found")
+
+    query = (
+        db.query(NewsletterItem)
+        .join(NewsletterItem.post)
+        .outerjoin(Post.analysis)
+        .options(contains_eager(NewsletterItem.post).contains_eager(Post.analysis))
+        .filter(NewsletterItem.newsletter_id == newsletter_id)
+    )
+    if section:
+        query = query.filter(NewsletterItem.section == section)
+    query = _filter_analysis(query, subreddit, tool_tag, category)
+
+    rows, next_cursor = paginate(
+        query,
+        NewsletterItem.display_order,
+        NewsletterItem.id,
+        cursor,
+        limit,
+        descending=False,
+        key_is_datetime=False,
+    )
+    return {
+        "items": [_project(_item_dict(item), projection) for item in rows],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/posts")
+def list_posts(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    subreddit: Optional[str] = None,
+    tool_tag: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Analyzed posts, newest Reddit submission first."""
+    projection = parse_fields(fields, POST_FIELDS)
+    query = (
+        db.query(Post)
+        .join(Post.analysis)
+        .options(contains_eager(Post.analysis))
+    )
+    query = _filter_analysis(query, subreddit, tool_tag, category)
+    if since:
+        query = query.filter(Post.created_utc >= since)
+    if until:
+        query = query.filter(Post.created_utc < until)
+
+    rows, next_cursor = paginate(query, Post.created_utc, Post.id, cursor, limit)
+    return {
+        "items": [_project(_post_dict(post), projection) for post in rows],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/search")
+def search(
+    q: str = Query(..., min_length=1),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    subreddit: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Full-text matches over posts and their analyses, best match first."""
+    projection = parse_fields(fields, SEARCH_FIELDS)
+    after = decode_cursor(cursor, key_is_datetime=False) if cursor else None
+    results, next_after = search_posts(db, q, limit=limit, after=after, subreddit=subreddit)
+    return {
+        "items": [
+            _project(
+                {**_post_dict(r.post), "rank": r.rank, "snippet": r.snippet}, projection
+            )
+            for r in results
+        ],
+        "next_cursor": encode_cursor(*next_after) if next_after else None,
+    }
@@ -1,78 +1,188 @@
 import logging
-from pathlib import Path
-from typing import Optional
+import time
+from typing import List, Optional
 
-from fastapi import FastAPI, Depends, Request, BackgroundTasks
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Depends, Query, Request, BackgroundTasks
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session, joinedload
-
+from sqlalchemy.orm import Session
+
+from newsletter.web.caching import (
+    EDITION_CACHE_CONTROL,
+    PAGE_CACHE_CONTROL,
+    is_not_modified,
+    last_modified,
+    make_etag,
+    newsletter_etag,
+    not_modified,
+    validator_headers,
+)
+from newsletter.web.api import router as api_router
 from newsletter.web.dependencies import get_db
-from newsletter.models import Newsletter, NewsletterItem, Post, PostAnalysis
-from newsletter.config import get_newsletter_config
+from newsletter.web.pagination import decode_cursor, encode_cursor, paginate
+from newsletter.web.render import TEMPLATES_DIR, EditionFilter, get_newsletter_html
+from newsletter.web.static import STATIC_DIR, FingerprintedStaticFiles, static_url
+from newsletter.models import Newsletter
+from newsletter.search import search_posts
+from newsletter.telemetry import latest_metrics, observe_http
 
 logger = logging.getLogger(__name__)
 
-TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
-STATIC_DIR = Path(__file__).parent.parent / "static"
+COMPRESSION_MIN_SIZE = 1024  # bytes; smaller responses are sent uncompressed
+ARCHIVE_PAGE_SIZE = 20
+SEARCH_PAGE_SIZE = 20
+
+
+def _add_compression(app: FastAPI) -> None:
+    """Brotli when brotli-asgi is installed (it falls back to gzip), plain gzip otherwise."""
+    try:
+        from brotli_asgi import BrotliMiddleware
+    except ImportError:
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+    else:
+        app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+
+def _add_request_metrics(app: FastAPI) -> None:
+    @app.middleware("http")
+    async def record_request(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        # Label by route template so /newsletter/{newsletter_id} is one series
+        route = request.scope.get("route")
+        observe_http(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            response.status_code,
+            time.perf_counter() - start,
+        )
+        return response
 
 
 def create_app() -> FastAPI:
     app = FastAPI(title="AI Coding Newsletter")
+    _add_request_metrics(app)
+    _add_compression(app)
 
     templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
-    app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+    templates.env.globals["static_url"] = static_url
+    app.mount("/static", FingerprintedStaticFiles(directory=str(STATIC_DIR)), name="static")
+    app.include_router(api_router)
 
     @app.get("/", response_class=HTMLResponse)
-    def index(request: Request, db: Session = Depends(get_db)):
-        """Show the latest newsletter."""
+    def index(
+        request: Request,
+        subreddit: List[str] = Query([]),
+        tool_tag: List[str] = Query([]),
+        db: Session = Depends(get_db),
+    ):
+        """Show the latest newsletter (only the given subreddits / tool tags, if any)."""
         newsletter = (
             db.query(Newsletter)
             .order_by(Newsletter.created_at.desc())
             .first()
         )
         if newsletter is None:
-            return templates.TemplateResponse("empty.html", {"request": request})
+            return templates.TemplateResponse(request, "empty.html")
 
-        return _render_newsletter(request, templates, db, newsletter)
+        edition_filter = EditionFilter.of(subreddit, tool_tag)
+        headers = validator_headers(
+            newsletter_etag(newsletter, "index", edition_filter),
+            PAGE_CACHE_CONTROL,
+            last_modified(newsletter),
+        )
+        if is_not_modified(request, headers["ETag"]):
+            return not_modified(headers)
+        return HTMLResponse(get_newsletter_html(db, newsletter, edition_filter), headers=headers)
 
     @app.get("/newsletter/{newsletter_id}", response_class=HTMLResponse)
     def view_newsletter(
-        request: Request, newsletter_id: int, db: Session = Depends(get_db)
+        request: Request,
+        newsletter_id: int,
+        subreddit: List[str] = Query([]),
+        tool_tag: List[str] = Query([]),
+        db: Session = Depends(get_db),
     ):
         newsletter = db.query(Newsletter).get(newsletter_id)
         if newsletter is None:
-            return templates.TemplateResponse(
-                "empty.html", {"request": request}, status_code=404
-            )
-        return _render_newsletter(request, templates, db, newsletter)
+            return templates.TemplateResponse(request, "empty.html", status_code=404)
+
+        edition_filter = EditionFilter.of(subreddit, tool_tag)
+        headers = validator_headers(
+            newsletter_etag(newsletter, "newsletter", edition_filter),
+            EDITION_CACHE_CONTROL,
+            last_modified(newsletter),
+        )
+        if is_not_modified(request, headers["ETag"]):
+            return not_modified(headers)
+        return HTMLResponse(get_newsletter_html(db, newsletter, edition_filter), headers=headers)
 
     @app.get("/archive", response_class=HTMLResponse)
     def archive(
         request: Request,
-        page: int = 1,
+        cursor: Optional[str] = None,
         db: Session = Depends(get_db),
     ):
-        per_page = 20
-        offset = (page - 1) * per_page
-        newsletters = (
+        latest = (
             db.query(Newsletter)
             .order_by(Newsletter.created_at.desc())
-            .offset(offset)
-            .limit(per_page + 1)
-            .all()
+            .first()
+        )
+        # The archive only changes when an edition is published
+        headers = validator_headers(
+            make_etag(
+                "archive",
+                cursor or "",
+                latest.id if latest else 0,
+                latest.created_at.isoformat() if latest else "",
+            ),
+            PAGE_CACHE_CONTROL,
+            last_modified(latest),
+        )
+        if is_not_modified(request, headers["ETag"]):
+            return not_modified(headers)
+
+        newsletters, next_cursor = paginate(
+            db.query(Newsletter),
+            Newsletter.created_at,
+            Newsletter.id,
+            cursor,
+            ARCHIVE_PAGE_SIZE,
         )
-        has_next = len(newsletters) > per_page
-        newsletters = newsletters[:per_page]
 
-        return templates.TemplateResponse("archive.html", {
-            "request": request,
+        return templates.TemplateResponse(request, "archive.html", {
             "newsletters": newsletters,
-            "page": page,
-            "has_next": has_next,
+            "is_first_page": not cursor,
+            "next_cursor": next_cursor,
+        }, headers=headers)
+
+    @app.get("/search", response_class=HTMLResponse)
+    def search_page(
+        request: Request,
+        q: str = "",
+        cursor: Optional[str] = None,
+        db: Session = Depends(get_db),
+    ):
+        results, next_after = [], None
+        if q.strip():
+            after = decode_cursor(cursor, key_is_datetime=False) if cursor else None
+            results, next_after = search_posts(
+                db, q, limit=SEARCH_PAGE_SIZE, after=after
+            )
+        return templates.TemplateResponse(request, "search.html", {
+            "query": q,
+            "results": results,
+            "is_first_page": not cursor,
+            "next_cursor": encode_cursor(*next_after) if next_after else None,
         })
 
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus scrape endpoint."""
+        body, content_type = latest_metrics()
+        return Response(body, media_type=content_type)
+
     @app.post("/api/pipeline/run")
     def trigger_pipeline(background_tasks: BackgroundTasks):
         from newsletter.database import get_session_factory
@@ -92,60 +202,3 @@ def create_app() -> FastAPI:
 
     return app
 
-
-def _render_newsletter(
-    request, templates, db: Session, newsletter: Newsletter
-):
-    nl_config = get_newsletter_config()
-    sections_config = {s["key"]: s for s in nl_config["sections"]}
-
-    items = (
-        db.query(NewsletterItem)
-        .filter(NewsletterItem.newsletter_id == newsletter.id)
-        .options(
-            joinedload(NewsletterItem.post).joinedload(Post.analysis)
-        )
-        .order_by(NewsletterItem.display_order)
-        .all()
-    )
-
-    # Group items by section
-    sections = {}
-    for item in items:
-        if item.section not in sections:
-            section_meta = sections_config.get(item.section, {})
-            section_intro = ""
-            meta = newsletter.metadata_json or {}
-            if "sections" in meta and item.section in meta["sections"]:
-                section_intro = meta["sections"][item.section].get("intro", "")
-            sections[item.section] = {
-                "key": item.section,
-                "title": section_meta.get("title", item.section),
-                "intro": section_intro,
-                "items": [],
-            }
-        sections[item.section]["items"].append(item)
-
-    # Maintain section order from config
-    ordered_sections = []
-    for sc in nl_config["sections"]:
-        if sc["key"] in sections:
-            ordered_sections.append(sections[sc["key"]])
-
-    # Collect all unique subreddits and tool tags for filter UI
-    all_subreddits = set()
-    all_tool_tags = set()
-    for item in items:
-        if item.post:
-            all_subreddits.add(item.post.subreddit)
-            if item.post.analysis:
-                for tag in (item.post.analysis.tool_tags or []):
-                    all_tool_tags.add(tag)
-
-    return templates.TemplateResponse("newsletter.html", {
-        "request": request,
-        "newsletter": newsletter,
-        "sections": ordered_sections,
-        "all_subreddits": sorted(all_subreddits),
-        "all_tool_tags": sorted(all_tool_tags),
-    })
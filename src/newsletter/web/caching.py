@@ -0,0 +1,66 @@
+"""HTTP validators for dashboard pages.
+
+ETags are derived from database metadata and the render version only, so a
+matching ``If-None-Match`` is answered with a 304 before any template runs.
+"""
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from newsletter.models import Newsletter
+from newsletter.web.render import template_version
+
+# Pages are revalidated on every view; the CDN still serves them on a 304
+PAGE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+# A published edition only changes when the templates do
+EDITION_CACHE_CONTROL = "public, max-age=300, must-revalidate"
+
+
+def make_etag(*parts: object) -> str:
+    """Weak ETag over the given parts plus the current render version.
+
+    Weak because the compression middleware may re-encode the body.
+    """
+    material = "|".join(str(part) for part in (*parts, template_version()))
+    return f'W/"{hashlib.sha256(material.encode()).hexdigest()[:20]}"'
+
+
+def newsletter_etag(newsletter: Newsletter, page: str = "newsletter", *parts: object) -> str:
+    return make_etag(page, newsletter.id, newsletter.created_at.isoformat(), *parts)
+
+
+def last_modified(newsletter: Optional[Newsletter]) -> Optional[str]:
+    if newsletter is None or newsletter.created_at is None:
+        return None
+    created = newsletter.created_at
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return format_datetime(created.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(
+    etag: str, cache_control: str, modified: Optional[str] = None
+) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if modified:
+        headers["Last-Modified"] = modified
+    return headers
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True when the client's If-None-Match already names this representation."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
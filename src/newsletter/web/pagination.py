@@ -0,0 +1,88 @@
+"""Keyset (cursor) pagination shared by the archive page and the JSON API.
+
+A cursor is the sort key and id of the last row on a page, encoded as an
+opaque URL-safe token. The next page is everything strictly after that pair,
+so each page costs an index range scan regardless of how deep it is.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(key: Any, row_id: int) -> str:
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    raw = json.dumps([key, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key_is_datetime: bool = True) -> Tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if key_is_datetime:
+            key = datetime.fromisoformat(key)
+        return key, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+def paginate(
+    query: Query,
+    key_column: Any,
+    id_column: Any,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True,
+    key_is_datetime: bool = True,
+) -> Tuple[List[Any], Optional[str]]:
+    """Return one page of ``query`` ordered by (key, id) and the cursor for the next page.
+
+    Rows must expose the key and id under the same attribute names as the columns.
+    """
+    if cursor:
+        key, row_id = decode_cursor(cursor, key_is_datetime)
+        if descending:
+            query = query.filter(
+                or_(key_column < key, and_(key_column == key, id_column < row_id))
+            )
+        else:
+            query = query.filter(
+                or_(key_column > key, and_(key_column == key, id_column > row_id))
+            )
+
+    if descending:
+        query = query.order_by(key_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(key_column.asc(), id_column.asc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, key_column.key), getattr(last, id_column.key)
+        )
+    return rows, next_cursor
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """Validate a comma-separated ``fields`` projection against the resource's keys."""
+    if not fields:
+        return None
+    wanted = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(wanted) - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return wanted
@@ -0,0 +1,306 @@
+"""Newsletter page rendering, shared by synthesis (pre-render) and the dashboard.
+
+Published editions never change, so the pipeline renders their HTML once and
+stores it in ``Newsletter.html_content`` together with the template version it
+was built from. The dashboard serves the stored copy; when the templates have
+changed since, it renders the page on demand without writing it back (``newsletter
+render`` refreshes the stored copies).
+
+Pages are assembled from fragments: every item and section header of an
+edition is rendered once and kept in an in-process cache. A personalized
+edition (``EditionFilter``) selects from those fragments instead of
+re-rendering them. Identical preferences share one cached page. Emails are
+built from the same fragments with their own template (``email.html``), which
+carries its styles and has no script.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+from sqlalchemy.orm import Session, joinedload
+
+from newsletter.config import get_newsletter_config
+from newsletter.models import Newsletter, NewsletterItem, Post
+from newsletter.web.static import STATIC_DIR, static_url
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+FRAGMENT_CACHE_EDITIONS = 16  # editions whose item and section fragments stay in memory
+PAGE_CACHE_SIZE = 256  # personalized pages (one per edition and filter combination)
+
+_env = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    autoescape=select_autoescape(["html"]),
+)
+_env.globals["static_url"] = static_url
+
+
+@lru_cache(maxsize=None)
+def template_version() -> str:
+    """Fingerprint of the templates and static assets, computed once per process.
+
+    Static files count because rendered pages embed their fingerprinted URLs.
+    After editing either in a running process, call ``reload_templates``
+    (``newsletter serve`` restarts on such edits instead).
+    """
+    digest = hashlib.sha256()
+    paths = sorted(TEMPLATES_DIR.glob("*.html"))
+    paths += sorted(p for p in STATIC_DIR.iterdir() if p.is_file())
+    for path in paths:
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+    return digest.hexdigest()[:16]
+
+
+class EditionFilter(NamedTuple):
+    """A subscriber's subreddit and tool-tag preferences; empty means everything.
+
+    Matches the dashboard's client-side chips: an item must come from one of
+    the subreddits and carry at least one of the tags. Build it with ``of`` so
+    equal preferences compare (and cache) equal.
+    """
+
+    subreddits: Tuple[str, ...] = ()
+    tool_tags: Tuple[str, ...] = ()
+
+    @classmethod
+    def of(
+        cls, subreddits: Optional[Iterable[str]] = None, tool_tags: Optional[Iterable[str]] = None
+    ) -> "EditionFilter":
+        return cls(
+            tuple(sorted({s.lower() for s in subreddits or ()})),
+            tuple(sorted(set(tool_tags or ()))),
+        )
+
+    def matches(self, item: "ItemFragment") -> bool:
+        if self.subreddits and not any(s.lower() in self.subreddits for s in item.subreddits):
+            return False
+        return not self.tool_tags or any(tag in self.tool_tags for tag in item.tool_tags)
+
+
+NO_FILTER = EditionFilter()
+
+
+@dataclass(frozen=True)
+class ItemFragment:
+    subreddits: Tuple[str, ...]  # the post's own first, then its duplicates
+    tool_tags: Tuple[str, ...]
+    html: Markup
+
+
+@dataclass(frozen=True)
+class SectionFragment:
+    key: str
+    head: Markup
+    items: Tuple[ItemFragment, ...]
+
+
+class _LRUCache:
+    """Small thread-safe LRU, shared by web request threads and the email sender."""
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Keyed by (newsletter id, template version[, filter, page template])
+_fragment_cache = _LRUCache(FRAGMENT_CACHE_EDITIONS)
+_page_cache = _LRUCache(PAGE_CACHE_SIZE)
+
+
+def reload_templates() -> None:
+    """Pick up edited templates and static files: new version, empty render caches."""
+    template_version.cache_clear()
+    _fragment_cache.clear()
+    _page_cache.clear()
+
+
+def _render_fragments(db: Session, newsletter: Newsletter) -> Tuple[SectionFragment, ...]:
+    nl_config = get_newsletter_config()
+    meta = (newsletter.metadata_json or {}).get("sections", {})
+
+    items = (
+        db.query(NewsletterItem)
+        .filter(NewsletterItem.newsletter_id == newsletter.id)
+        .options(
+            joinedload(NewsletterItem.post).joinedload(Post.analysis)
+        )
+        .order_by(NewsletterItem.display_order)
+        .all()
+    )
+
+    # Near-duplicates of the featured posts, linked from their representative's item
+    also_posted: Dict[int, Dict[str, str]] = defaultdict(dict)
+    for representative_id, subreddit, permalink in (
+        db.query(Post.duplicate_of_id, Post.subreddit, Post.permalink)
+        .filter(Post.duplicate_of_id.in_([item.post_id for item in items]))
+        .order_by(Post.created_utc, Post.id)
+    ):
+        also_posted[representative_id].setdefault(subreddit, permalink)
+
+    # Group items by section
+    grouped: Dict[str, List[ItemFragment]] = {}
+    item_template = _env.get_template("_item.html")
+    for item in items:
+        if item.post is None:
+            continue
+        analysis = item.post.analysis
+        duplicates = {
+            subreddit: permalink
+            for subreddit, permalink in also_posted[item.post_id].items()
+            if subreddit != item.post.subreddit
+        }
+        grouped.setdefault(item.section, []).append(ItemFragment(
+            subreddits=(item.post.subreddit, *duplicates),
+            tool_tags=tuple(analysis.tool_tags or ()) if analysis else (),
+            html=Markup(item_template.render(item=item, also_posted=duplicates)),
+        ))
+
+    # Maintain section order from config
+    head_template = _env.get_template("_section_head.html")
+    sections = []
+    for sc in nl_config["sections"]:
+        if sc["key"] not in grouped:
+            continue
+        section = {
+            "title": sc.get("title", sc["key"]),
+            "intro": meta.get(sc["key"], {}).get("intro", ""),
+        }
+        sections.append(SectionFragment(
+            key=sc["key"],
+            head=Markup(head_template.render(section=section)),
+            items=tuple(grouped[sc["key"]]),
+        ))
+    return tuple(sections)
+
+
+def edition_fragments(db: Session, newsletter: Newsletter) -> Tuple[SectionFragment, ...]:
+    """Rendered section headers and items of an edition, rendered once per template version."""
+    key = (newsletter.id, template_version())
+    fragments = _fragment_cache.get(key)
+    if fragments is None:
+        fragments = _render_fragments(db, newsletter)
+        _fragment_cache.put(key, fragments)
+    return fragments
+
+
+def filtered_item_count(db: Session, newsletter: Newsletter, edition_filter: EditionFilter) -> int:
+    return sum(
+        edition_filter.matches(item)
+        for section in edition_fragments(db, newsletter)
+        for item in section.items
+    )
+
+
+def build_newsletter_context(
+    db: Session, newsletter: Newsletter, edition_filter: EditionFilter = NO_FILTER
+) -> Dict[str, Any]:
+    sections = []
+    all_subreddits = set()
+    all_tool_tags = set()
+    post_count = 0
+    for section in edition_fragments(db, newsletter):
+        items = [item for item in section.items if edition_filter.matches(item)]
+        if not items:
+            continue
+        post_count += len(items)
+        sections.append({
+            "key": section.key,
+            "head": section.head,
+            "items": [item.html for item in items],
+        })
+        # Collect the subreddits and tool tags shown, for the filter UI
+        for item in items:
+            all_subreddits.update(item.subreddits)
+            all_tool_tags.update(item.tool_tags)
+
+    return {
+        "newsletter": newsletter,
+        "sections": sections,
+        "post_count": post_count,  # items shown, after the edition filter
+        "all_subreddits": sorted(all_subreddits),
+        "all_tool_tags": sorted(all_tool_tags),
+    }
+
+
+def _render_page(
+    db: Session, newsletter: Newsletter, template: str, edition_filter: EditionFilter
+) -> str:
+    key = (newsletter.id, template_version(), edition_filter, template)
+    html = _page_cache.get(key)
+    if html is None:
+        context = build_newsletter_context(db, newsletter, edition_filter)
+        html = _env.get_template(template).render(**context)
+        _page_cache.put(key, html)
+    return html
+
+
+def render_newsletter_html(
+    db: Session, newsletter: Newsletter, edition_filter: EditionFilter = NO_FILTER
+) -> str:
+    """The edition page, limited to ``edition_filter``, assembled from cached fragments.
+
+    Pages are cached per filter, so subscribers with the same preferences
+    share one render.
+    """
+    return _render_page(db, newsletter, "newsletter.html", edition_filter)
+
+
+def render_email_html(
+    db: Session, newsletter: Newsletter, edition_filter: EditionFilter = NO_FILTER
+) -> str:
+    """The edition as an email body: styles included, no script, no local asset links."""
+    return _render_page(db, newsletter, "email.html", edition_filter)
+
+
+def store_newsletter_html(db: Session, newsletter: Newsletter) -> str:
+    """Render the edition and persist the HTML with the current template version."""
+    html = render_newsletter_html(db, newsletter)
+    newsletter.html_content = html
+    newsletter.html_version = template_version()
+    db.commit()
+    logger.info(f"Rendered newsletter #{newsletter.id} ({len(html)} bytes)")
+    return html
+
+
+def get_newsletter_html(
+    db: Session, newsletter: Newsletter, edition_filter: EditionFilter = NO_FILTER
+) -> str:
+    """Stored HTML when it is current, otherwise a fresh render; never writes to ``db``.
+
+    A non-empty ``edition_filter`` gets the personalized page instead.
+    """
+    if (
+        edition_filter == NO_FILTER
+        and newsletter.html_content
+        and newsletter.html_version == template_version()
+    ):
+        return newsletter.html_content
+    return render_newsletter_html(db, newsletter, edition_filter)
@@ -0,0 +1,76 @@
+"""Fingerprinted static assets.
+
+Templates link assets through ``static_url("style.css")``, which yields
+``/static/style.<hash>.css``. The hash changes with the file content, so those
+URLs can be cached forever; ``FingerprintedStaticFiles`` maps them back onto the
+real file and marks them immutable.
+"""
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple
+
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+STATIC_DIR = Path(__file__).parent.parent / "static"
+STATIC_PREFIX = "/static"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=3600"
+
+_FINGERPRINT_RE = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{10})(?P<ext>\.[^./]+)$")
+
+
+@lru_cache(maxsize=256)
+def _content_hash(path: str, mtime_ns: int, size: int) -> str:
+    # Keyed on mtime and size so an edited file is re-hashed without a restart
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:10]
+
+
+def file_fingerprint(name: str) -> str:
+    path = STATIC_DIR / name
+    stat = path.stat()
+    return _content_hash(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def static_url(name: str) -> str:
+    """URL of a static asset with its content hash spliced into the filename."""
+    try:
+        digest = file_fingerprint(name)
+    except OSError:
+        return f"{STATIC_PREFIX}/{name}"
+    stem, dot, ext = name.rpartition(".")
+    if not dot:
+        return f"{STATIC_PREFIX}/{name}.{digest}"
+    return f"{STATIC_PREFIX}/{stem}.{digest}.{ext}"
+
+
+def _split_fingerprint(path: str) -> Tuple[str, bool]:
+    """Return the real asset path and whether the request carried a current fingerprint."""
+    directory, _, filename = path.rpartition("/")
+    match = _FINGERPRINT_RE.match(filename)
+    if match is None:
+        return path, False
+    real = f"{directory}/" if directory else ""
+    real += match.group("stem") + match.group("ext")
+    try:
+        current = file_fingerprint(real) == match.group("hash")
+    except OSError:
+        return path, False
+    return real, current
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """StaticFiles that serves ``name.<hash>.ext`` with far-future cache headers."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        real_path, fingerprinted = _split_fingerprint(path)
+        response = await super().get_response(real_path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = (
+                IMMUTABLE_CACHE_CONTROL if fingerprinted else REVALIDATE_CACHE_CONTROL
+            )
+        return response
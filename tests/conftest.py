@@ -0,0 +1,80 @@
+"""Shared fixtures: a fresh SQLite database per test and a fake Claude client."""
+from pathlib import Path
+
+import anthropic
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+
+from helpers import FakeClaude
+from newsletter import config, database
+from newsletter.web import render
+from newsletter.web.app import create_app
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _clear_caches() -> None:
+    config.get_settings.cache_clear()
+    database.get_engine.cache_clear()
+    database.get_session_factory.cache_clear()
+
+
+def _migrate(url: str) -> None:
+    # No ini file, so env.py leaves logging alone
+    alembic_config = Config()
+    alembic_config.set_main_option("script_location", str(ROOT / "alembic"))
+    alembic_config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(alembic_config, "head")
+
+
+@pytest.fixture
+def session(request, tmp_path, monkeypatch):
+    """A session on a fresh database, with Claude answered by ``FakeClaude``.
+
+    Tests marked ``migrated`` get the schema from the Alembic migrations, which
+    also create what the models don't describe (the search index).
+    """
+    url = f"sqlite:///{tmp_path / 'newsletter.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    _clear_caches()
+    if request.node.get_closest_marker("migrated"):
+        _migrate(url)
+    else:
+        database.Base.metadata.create_all(database.get_engine())
+
+    FakeClaude.reset()
+    monkeypatch.setattr(anthropic, "Anthropic", FakeClaude)
+    # Rendered editions are cached by newsletter id, which every fresh database reuses
+    monkeypatch.setattr(render, "_fragment_cache", render._LRUCache(render.FRAGMENT_CACHE_EDITIONS))
+    monkeypatch.setattr(render, "_page_cache", render._LRUCache(render.PAGE_CACHE_SIZE))
+
+    session = database.get_session_factory()()
+    yield session
+    session.close()
+    database.get_engine().dispose()
+    _clear_caches()
+
+
+@pytest.fixture
+def claude(session):
+    """The fake Claude client the session fixture installed, for tuning and inspection."""
+    return FakeClaude
+
+
+@pytest.fixture
+def client(session):
+    """The dashboard app, reading the session fixture's database."""
+    with TestClient(create_app()) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def newsletter_config(monkeypatch):
+    """The loaded newsletter.yaml; changes made by a test are undone afterwards."""
+    nl_config = config.get_newsletter_config()
+    for key, value in list(nl_config.items()):
+        if isinstance(value, dict):
+            monkeypatch.setitem(nl_config, key, dict(value))
+    return nl_config
@@ -0,0 +1,251 @@
+"""Test doubles for the Anthropic and Reddit clients, and factories for test data."""
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List
+
+from newsletter.models import Newsletter, NewsletterItem, Post, PostAnalysis
+
+WORDS = [
+    "agent", "prompt", "context", "token", "model", "cursor", "copilot", "claude", "mcp",
+    "server", "refactor", "test", "review", "diff", "commit", "editor", "plugin", "local",
+    "llama", "latency", "cache", "workflow", "config", "rules", "memory", "subagent",
+    "benchmark", "release", "pricing", "limit", "bug", "fix", "feature", "tool", "shell",
+]
+
+
+def words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def add_posts(session, count: int, start: int = 0, subreddit: str = "ClaudeAI") -> List[Post]:
+    """``count`` unrelated posts, committed; ``start`` keeps reddit ids unique across calls."""
+    now = datetime.now(timezone.utc)
+    posts = []
+    for i in range(start, start + count):
+        rng = random.Random(i)
+        posts.append(Post(
+            reddit_id=f"t{i}",
+            subreddit=subreddit,
+            title=words(rng, 10),
+            body=words(rng, 60),
+            score=rng.randint(1, 500),
+            num_comments=rng.randint(0, 50),
+            created_utc=now - timedelta(minutes=i),
+        ))
+    session.add_all(posts)
+    session.commit()
+    return posts
+
+
+def add_edition(session, subreddits: List[str], title: str = "Daily edition") -> Newsletter:
+    """An edition with one analyzed community item per entry in ``subreddits``."""
+    newsletter = Newsletter(edition_title=title, post_count=len(subreddits))
+    session.add(newsletter)
+    session.flush()
+    for i, subreddit in enumerate(subreddits):
+        post = Post(
+            reddit_id=f"n{newsletter.id}x{i}",
+            subreddit=subreddit,
+            title=f"Post {i}",
+            created_utc=datetime.now(timezone.utc) - timedelta(minutes=i),
+        )
+        session.add(post)
+        session.flush()
+        session.add(PostAnalysis(
+            post_id=post.id, category="community", relevance_score=0.5, quality_score=0.5,
+            tool_tags=["general"], summary="", key_insight="",
+        ))
+        session.add(NewsletterItem(
+            newsletter_id=newsletter.id, post_id=post.id, section="community", display_order=i
+        ))
+    session.commit()
+    return newsletter
+
+
+# --- Anthropic -------------------------------------------------------------
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, list):
+        return "".join(block.get("text", "") for block in content)
+    return content or ""
+
+
+class FakeClaude:
+    """Stands in for ``anthropic.Anthropic`` and answers categorization prompts.
+
+    State is class-level because the code under test builds its own clients.
+    ``requests`` records the reddit ids sent in each categorization request, and
+    ``truncate_after`` cuts the next responses short after that many items, the
+    way a response that hits max_tokens ends.
+    """
+
+    requests: List[List[str]] = []
+    truncate_after: List[int] = []
+    batch_status = "ended"
+    _batches: Dict[str, List[SimpleNamespace]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.messages = _Messages(self)
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.requests = []
+        cls.truncate_after = []
+        cls.batch_status = "ended"
+        cls._batches = {}
+
+    def respond(self, params: Dict[str, Any]) -> SimpleNamespace:
+        message = _text(params["messages"][0]["content"])
+        if "Posts:\n" not in message:
+            return self._message("{}", "end_turn")
+
+        posts = json.loads(message.split("Posts:\n", 1)[1])
+        ids = [post.get("id", post.get("reddit_id")) for post in posts]
+        with self._lock:
+            self.requests.append(ids)
+            limit = self.truncate_after.pop(0) if self.truncate_after else None
+
+        results = [
+            {
+                "reddit_id": reddit_id,
+                "category": "news",
+                "relevance_score": 0.8,
+                "quality_score": 0.7,
+                "tool_tags": ["claude_code"],
+                "summary": f"Summary of {reddit_id}",
+                "key_insight": f"Insight from {reddit_id}",
+            }
+            for reddit_id in ids
+        ]
+        if limit is None:
+            return self._message(json.dumps(results), "end_turn")
+        # Complete items, then the start of the one max_tokens cut off
+        text = json.dumps(results[:limit])[:-1] + ', {"reddit_id": "'
+        return self._message(text, "max_tokens")
+
+    @staticmethod
+    def _message(text: str, stop_reason: str) -> SimpleNamespace:
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=text)],
+            stop_reason=stop_reason,
+            usage=SimpleNamespace(
+                input_tokens=0,
+                output_tokens=len(text) // 4,
+                cache_read_input_tokens=0,
+                cache_creation_input_tokens=0,
+            ),
+        )
+
+
+class _Messages:
+    def __init__(self, client: FakeClaude) -> None:
+        self._client = client
+        self.batches = _Batches(client)
+
+    def create(self, **params: Any) -> SimpleNamespace:
+        return self._client.respond(params)
+
+    def stream(self, **params: Any) -> "_Stream":
+        return _Stream(self._client.respond(params))
+
+
+class _Stream:
+    CHUNK = 64
+
+    def __init__(self, message: SimpleNamespace) -> None:
+        self._message = message
+
+    def __enter__(self) -> "_Stream":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+    @property
+    def text_stream(self) -> Iterator[str]:
+        text = self._message.content[0].text
+        for i in range(0, len(text), self.CHUNK):
+            yield text[i : i + self.CHUNK]
+
+    def get_final_message(self) -> SimpleNamespace:
+        return self._message
+
+
+class _Batches:
+    """``messages.batches``: requests are answered when the batch is created.
+
+    ``FakeClaude.batch_status`` is what ``retrieve`` reports, so a test can hold
+    a batch "in_progress" and release it later.
+    """
+
+    def __init__(self, client: FakeClaude) -> None:
+        self._client = client
+
+    def create(self, requests: List[Dict[str, Any]]) -> SimpleNamespace:
+        entries = [
+            SimpleNamespace(
+                custom_id=request["custom_id"],
+                result=SimpleNamespace(
+                    type="succeeded", message=self._client.respond(request["params"])
+                ),
+            )
+            for request in requests
+        ]
+        batch_id = f"msgbatch_{len(FakeClaude._batches) + 1:04d}"
+        FakeClaude._batches[batch_id] = entries
+        return self.retrieve(batch_id)
+
+    def retrieve(self, batch_id: str) -> SimpleNamespace:
+        return SimpleNamespace(id=batch_id, processing_status=FakeClaude.batch_status)
+
+    def results(self, batch_id: str) -> Iterator[SimpleNamespace]:
+        if FakeClaude.batch_status != "ended":
+            raise RuntimeError(f"Message batch {batch_id} has not ended")
+        return iter(FakeClaude._batches[batch_id])
+
+
+# --- Reddit ----------------------------------------------------------------
+
+
+class _Comments(list):
+    def replace_more(self, limit: int = 0) -> None:
+        pass
+
+
+class FakeReddit:
+    """Stands in for ``praw.Reddit``: ``posts_per_subreddit`` fresh posts in every listing."""
+
+    def __init__(self, posts_per_subreddit: int) -> None:
+        self.posts_per_subreddit = posts_per_subreddit
+
+    def subreddit(self, name: str) -> SimpleNamespace:
+        def listing(limit: int, **kwargs: Any) -> List[SimpleNamespace]:
+            count = min(limit, self.posts_per_subreddit)
+            return [self._submission(name, i) for i in range(count)]
+
+        return SimpleNamespace(hot=listing, top=listing)
+
+    @staticmethod
+    def _submission(subreddit: str, index: int) -> SimpleNamespace:
+        rng = random.Random(f"{subreddit}:{index}")
+        reddit_id = f"{subreddit.lower()}x{index}"
+        return SimpleNamespace(
+            id=reddit_id,
+            stickied=False,
+            title=words(rng, 10),
+            selftext=words(rng, 60),
+            url=f"https://example.com/{subreddit}/{index}",
+            permalink=f"/r/{subreddit}/comments/{reddit_id}/",
+            author="poster",
+            score=rng.randrange(1, 500),
+            num_comments=1,
+            created_utc=time.time() - index * 60,
+            comments=_Comments([SimpleNamespace(body=words(rng, 20), author="commenter", score=1)]),
+        )
+
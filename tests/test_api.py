@@ -0,0 +1,69 @@
+import base64
+import re
+
+import pytest
+
+from helpers import add_edition, add_posts
+from newsletter.models import Post, PostAnalysis
+from newsletter.web import app
+
+
+def _analyze(session, posts):
+    session.add_all(
+        PostAnalysis(post_id=post.id, category="news", tool_tags=["general"]) for post in posts
+    )
+    session.commit()
+
+
+def _pages(client, url, **params):
+    """Every page of a keyset-paginated list endpoint, following next_cursor."""
+    pages, cursor = [], None
+    while True:
+        body = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        pages.append([item["id"] for item in body["items"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_posts_are_paged_newest_first(session, client):
+    posts = add_posts(session, 5)  # each one a minute older than the last
+    _analyze(session, posts)
+
+    assert _pages(client, "/api/posts", limit=2) == [
+        [posts[0].id, posts[1].id], [posts[2].id, posts[3].id], [posts[4].id]
+    ]
+
+
+def test_rows_sharing_a_sort_key_are_neither_skipped_nor_repeated(session, client):
+    posts = add_posts(session, 5)
+    session.query(Post).update({"created_utc": posts[0].created_utc})
+    session.commit()
+    _analyze(session, posts)
+
+    pages = _pages(client, "/api/posts", limit=2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sum(pages, []) == sorted((p.id for p in posts), reverse=True)
+
+
+def test_archive_pages_link_to_the_next_one(session, client, monkeypatch):
+    monkeypatch.setattr(app, "ARCHIVE_PAGE_SIZE", 2)
+    for i in range(3):
+        add_edition(session, ["ClaudeAI"], title=f"Edition {i}")
+
+    first = client.get("/archive")
+    assert "Edition 2" in first.text and "Edition 0" not in first.text
+    cursor = re.search(r'href="/archive\?cursor=([\w-]+)"', first.text).group(1)
+    second = client.get("/archive", params={"cursor": cursor})
+    assert "Edition 0" in second.text and "Edition 2" not in second.text
+    assert "/archive?cursor=" not in second.text
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b'{"key": 1}').decode(),
+    base64.urlsafe_b64encode(b'["yesterday", 3]').decode(),
+])
+@pytest.mark.parametrize("url", ["/api/posts", "/api/newsletters", "/archive"])
+def test_malformed_cursor_is_a_400(client, url, cursor):
+    assert client.get(url, params={"cursor": cursor}).status_code == 400
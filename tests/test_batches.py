@@ -0,0 +1,68 @@
+import logging
+
+from helpers import add_posts
+from newsletter.analyzer.batches import (
+    collect_categorization_batches,
+    submit_categorization_batches,
+)
+from newsletter.analyzer.categorizer import _find_unanalyzed_posts, categorize_unanalyzed_posts
+from newsletter.models import CategorizationBatch, PostAnalysis
+
+
+def _analyzed_ids(session):
+    return {post_id for (post_id,) in session.query(PostAnalysis.post_id)}
+
+
+def test_submit_collect_and_recollect(session, claude):
+    posts = add_posts(session, 12)
+
+    assert submit_categorization_batches(session) == 12
+    rows = session.query(CategorizationBatch).all()
+    assert rows and {row.status for row in rows} == {"submitted"}
+    assert sorted(i for row in rows for i in row.post_ids) == sorted(p.id for p in posts)
+    assert _analyzed_ids(session) == set()
+
+    # Nothing is stored while the batch is still processing
+    claude.batch_status = "in_progress"
+    assert collect_categorization_batches(session) == 0
+    assert {row.status for row in session.query(CategorizationBatch)} == {"submitted"}
+
+    claude.batch_status = "ended"
+    assert collect_categorization_batches(session) == 12
+    assert _analyzed_ids(session) == {p.id for p in posts}
+    assert {row.status for row in session.query(CategorizationBatch)} == {"collected"}
+
+    # Collecting again is a no-op
+    assert collect_categorization_batches(session) == 0
+    assert session.query(PostAnalysis).count() == 12
+
+
+def test_sync_run_skips_posts_waiting_in_a_batch(session, claude):
+    submitted = add_posts(session, 8)
+    claude.batch_status = "in_progress"
+    assert submit_categorization_batches(session) == 8
+
+    fresh = add_posts(session, 5, start=100)
+    assert categorize_unanalyzed_posts(session) == 5
+    assert _analyzed_ids(session) == {p.id for p in fresh}
+
+    claude.batch_status = "ended"
+    assert collect_categorization_batches(session) == 8
+    assert _analyzed_ids(session) == {p.id for p in submitted + fresh}
+
+
+def test_truncated_result_returns_missing_posts_to_the_queue(session, claude, caplog):
+    posts = add_posts(session, 12)
+    claude.truncate_after = [5]
+    submit_categorization_batches(session)
+
+    with caplog.at_level(logging.WARNING, logger="newsletter.analyzer.batches"):
+        saved = collect_categorization_batches(session)
+
+    assert saved == 5
+    missing = {p.id for p in posts} - _analyzed_ids(session)
+    assert {p.id for p in _find_unanalyzed_posts(session)} == missing
+    rows = session.query(CategorizationBatch).all()
+    assert {row.status for row in rows} == {"collected"}
+    assert any("missing from results" in row.error for row in rows)
+    assert "returning them to the queue" in caplog.text
@@ -0,0 +1,27 @@
+from helpers import add_posts
+from newsletter.analyzer.cache import post_fingerprint, store_results
+from newsletter.analyzer.categorizer import categorize_unanalyzed_posts
+from newsletter.models import PostAnalysis
+
+
+def test_cache_hit_is_copied_without_calling_claude(session, claude):
+    (post,) = add_posts(session, 1)
+    store_results(session, {post_fingerprint(post): {
+        "reddit_id": "an-earlier-copy",
+        "category": "best_practices",
+        "relevance_score": 0.9,
+        "quality_score": 0.6,
+        "tool_tags": ["cursor"],
+        "summary": "Cached summary",
+        "key_insight": "Cached insight",
+    }})
+    session.commit()
+
+    assert categorize_unanalyzed_posts(session) == 1
+
+    assert claude.requests == []
+    analysis = session.query(PostAnalysis).one()
+    assert analysis.post_id == post.id
+    assert (analysis.category, analysis.tool_tags, analysis.summary) == (
+        "best_practices", ["cursor"], "Cached summary"
+    )
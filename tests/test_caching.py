@@ -0,0 +1,31 @@
+from helpers import add_edition
+from newsletter.web.caching import EDITION_CACHE_CONTROL
+
+
+def test_unchanged_edition_is_answered_with_304(session, client):
+    newsletter = add_edition(session, ["ClaudeAI", "cursor"])
+    url = f"/newsletter/{newsletter.id}"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == EDITION_CACHE_CONTROL
+    etag = first.headers["etag"]
+
+    again = client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    # A filtered view is a different representation
+    filtered = client.get(url, params={"subreddit": "cursor"}, headers={"If-None-Match": etag})
+    assert filtered.status_code == 200
+    assert filtered.headers["etag"] != etag
+
+
+def test_index_revalidates_against_the_latest_edition(session, client):
+    add_edition(session, ["ClaudeAI"])
+    etag = client.get("/").headers["etag"]
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+
+    add_edition(session, ["cursor"], title="Next edition")
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,17 @@
+from helpers import add_posts
+from newsletter.analyzer.categorizer import categorize_unanalyzed_posts
+from newsletter.models import PostAnalysis
+
+
+def test_truncated_batch_resends_only_the_missing_posts(session, claude):
+    posts = add_posts(session, 6)
+    claude.truncate_after = [2]
+
+    assert categorize_unanalyzed_posts(session) == 6
+
+    first, *retries = claude.requests
+    assert sorted(first) == sorted(p.reddit_id for p in posts)
+    # The two complete items are kept; the rest go out again, split in halves
+    assert [len(retry) for retry in retries] == [2, 2]
+    assert sorted(i for retry in retries for i in retry) == sorted(first[2:])
+    assert session.query(PostAnalysis).count() == 6
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+from newsletter.analyzer.categorizer import categorize_unanalyzed_posts
+from newsletter.analyzer.dedup import assign_duplicate_clusters
+from newsletter.models import Newsletter, NewsletterItem, Post
+from newsletter.web.render import EditionFilter, build_newsletter_context, edition_fragments
+
+TITLE = "Claude Code now supports hooks for running linters after every edit"
+BODY = (
+    "The latest release adds pre and post tool hooks configured in settings json so you can "
+    "run formatters tests or custom scripts whenever the agent edits a file in your repo"
+)
+
+
+def _post(session, reddit_id, subreddit, age_hours, title=TITLE, body=BODY):
+    post = Post(
+        reddit_id=reddit_id,
+        subreddit=subreddit,
+        title=title,
+        body=body,
+        permalink=f"https://reddit.com/r/{subreddit}/comments/{reddit_id}",
+        created_utc=datetime.now(timezone.utc) - timedelta(hours=age_hours),
+    )
+    session.add(post)
+    session.commit()
+    return post
+
+
+def test_near_duplicates_share_one_analysis(session, claude):
+    first = _post(session, "c1", "ClaudeAI", age_hours=2)
+    crosspost = _post(session, "c2", "ChatGPTCoding", age_hours=1)
+    other = _post(
+        session, "c3", "cursor", age_hours=1,
+        title="Cursor pricing changes for teams", body="Seats now include more requests",
+    )
+
+    categorize_unanalyzed_posts(session)
+
+    assert sorted(sum(claude.requests, [])) == ["c1", "c3"]
+    for post in (first, crosspost, other):
+        session.refresh(post)
+    assert crosspost.duplicate_of_id == first.id
+    assert other.duplicate_of_id is None
+    assert crosspost.analysis.summary == first.analysis.summary == "Summary of c1"
+
+
+def test_older_copy_scraped_later_becomes_representative(session):
+    first = _post(session, "a1", "ClaudeAI", age_hours=2)
+    member = _post(session, "a2", "ChatGPTCoding", age_hours=1)
+    assert assign_duplicate_clusters(session) == 1
+    session.refresh(member)
+    assert member.duplicate_of_id == first.id
+
+    older = _post(session, "a3", "cursor", age_hours=5)
+    assert assign_duplicate_clusters(session) == 1
+    for post in (first, member, older):
+        session.refresh(post)
+    assert older.duplicate_of_id is None
+    assert first.duplicate_of_id == older.id
+    assert member.duplicate_of_id == older.id
+
+
+def test_representative_item_links_its_duplicates(session):
+    representative = _post(session, "b1", "ClaudeAI", age_hours=3)
+    crosspost = _post(session, "b2", "ChatGPTCoding", age_hours=2)
+    _post(session, "b3", "ClaudeAI", age_hours=1)  # same subreddit, not listed again
+    assign_duplicate_clusters(session)
+
+    newsletter = Newsletter(edition_title="Test")
+    session.add(newsletter)
+    session.flush()
+    session.add(NewsletterItem(
+        newsletter_id=newsletter.id, post_id=representative.id, section="top_story"
+    ))
+    session.commit()
+
+    (section,) = edition_fragments(session, newsletter)
+    (item,) = section.items
+    assert item.subreddits == ("ClaudeAI", "ChatGPTCoding")
+    assert crosspost.permalink in item.html
+    assert item.html.count(">r/ClaudeAI<") == 1
+
+    # A subscriber following only the crosspost's subreddit still gets the story
+    context = build_newsletter_context(session, newsletter, EditionFilter.of(["chatgptcoding"]))
+    assert [s["key"] for s in context["sections"]] == ["top_story"]
+
+
+
+def test_new_representative_keeps_the_cluster_analysis(session):
+    first = _post(session, "d1", "ClaudeAI", age_hours=2)
+    categorize_unanalyzed_posts(session)
+
+    older = _post(session, "d2", "cursor", age_hours=5)
+    assign_duplicate_clusters(session)
+
+    for post in (first, older):
+        session.refresh(post)
+    assert first.duplicate_of_id == older.id
+    assert older.analysis.summary == first.analysis.summary == "Summary of d1"
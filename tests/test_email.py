@@ -0,0 +1,200 @@
+import socket
+from datetime import datetime, timedelta, timezone
+from email import message_from_bytes
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from newsletter import config
+from newsletter.delivery.email import deliver_newsletter, enqueue_newsletter, send_pending
+from newsletter.models import (
+    EmailDelivery,
+    Newsletter,
+    NewsletterItem,
+    Post,
+    PostAnalysis,
+    Subscriber,
+)
+
+
+class _Mailbox:
+    """aiosmtpd handler: 450 for greylisted addresses on first try, 550 for unknown ones."""
+
+    def __init__(self):
+        self.messages = []
+        self.greylisted = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        local = address.partition("@")[0]
+        if local == "unknown":
+            return "550 5.1.1 No such user"
+        if local == "greylisted" and address not in self.greylisted:
+            self.greylisted.add(address)
+            return "450 4.2.0 Greylisted, try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, message_from_bytes(envelope.content)))
+        return "250 Message accepted"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def mailbox(session, newsletter_config, monkeypatch):
+    handler = _Mailbox()
+    port = _free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setenv("SMTP_HOST", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(port))
+    monkeypatch.setenv("SMTP_STARTTLS", "false")
+    monkeypatch.setenv("EMAIL_FROM", "newsletter@example.com")
+    config.get_settings.cache_clear()
+    newsletter_config["delivery"].update(messages_per_minute=0, retry_backoff_seconds=60)
+    yield handler
+    controller.stop()
+    config.get_settings.cache_clear()
+
+
+def _edition(session):
+    post = Post(
+        reddit_id="e1",
+        subreddit="ClaudeAI",
+        title="Hooks landed in Claude Code",
+        permalink="https://reddit.com/r/ClaudeAI/comments/e1",
+        created_utc=datetime.now(timezone.utc),
+    )
+    session.add(post)
+    session.flush()
+    session.add(PostAnalysis(
+        post_id=post.id, category="news", relevance_score=0.9, quality_score=0.8,
+        tool_tags=["claude_code"], summary="", key_insight="",
+    ))
+    newsletter = Newsletter(edition_title="Daily edition", post_count=1)
+    session.add(newsletter)
+    session.flush()
+    session.add(NewsletterItem(newsletter_id=newsletter.id, post_id=post.id, section="top_story"))
+    session.commit()
+    return newsletter
+
+
+def _subscribe(session, *emails, **preferences):
+    session.add_all(Subscriber(email=email, **preferences) for email in emails)
+    session.commit()
+
+
+def _delivery(session, email):
+    return session.query(EmailDelivery).filter_by(email=email).one()
+
+
+def test_each_recipient_gets_their_own_message(session, mailbox):
+    newsletter = _edition(session)
+    _subscribe(session, "all@example.com", "claude@example.com")
+    session.query(Subscriber).filter_by(email="claude@example.com").update(
+        {"subreddits": ["claudeai"]}
+    )
+    _subscribe(session, "cursor@example.com", subreddits=["cursor"])
+
+    totals = deliver_newsletter(session, newsletter)
+
+    assert totals == {"sent": 2, "skipped": 1, "retry": 0, "failed": 0}
+    assert sorted(rcpt for rcpt, _ in mailbox.messages) == [
+        ["all@example.com"], ["claude@example.com"]
+    ]
+    for rcpt, message in mailbox.messages:
+        assert message["To"] == rcpt[0]
+        assert message["Subject"] == "Daily edition"
+        assert "Hooks landed in Claude Code" in message.get_payload(decode=True).decode()
+    assert _delivery(session, "cursor@example.com").status == "skipped"
+
+
+def test_transient_refusal_is_retried_after_backoff(session, mailbox):
+    newsletter = _edition(session)
+    _subscribe(session, "greylisted@example.com")
+
+    before = datetime.now(timezone.utc)
+    assert deliver_newsletter(session, newsletter, wait=False)["retry"] == 1
+    delivery = _delivery(session, "greylisted@example.com")
+    assert (delivery.status, delivery.attempts) == ("pending", 1)
+    assert "450" in delivery.last_error
+    retry_at = delivery.next_attempt_at.replace(tzinfo=timezone.utc)
+    assert retry_at >= before + timedelta(seconds=60)
+
+    # Not due yet: nothing is attempted
+    assert send_pending(session, wait=False)["sent"] == 0
+
+    delivery.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    session.commit()
+    assert send_pending(session, wait=False)["sent"] == 1
+    session.refresh(delivery)
+    assert (delivery.status, delivery.attempts, delivery.last_error) == ("sent", 2, "")
+    assert [rcpt for rcpt, _ in mailbox.messages] == [["greylisted@example.com"]]
+
+
+def test_permanent_refusal_fails_without_retry(session, mailbox):
+    newsletter = _edition(session)
+    _subscribe(session, "unknown@example.com", "ok@example.com")
+
+    totals = deliver_newsletter(session, newsletter)
+
+    assert totals == {"sent": 1, "skipped": 0, "retry": 0, "failed": 1}
+    delivery = _delivery(session, "unknown@example.com")
+    assert (delivery.status, delivery.attempts) == ("failed", 1)
+    assert "550" in delivery.last_error
+
+
+def test_expired_claims_are_reclaimed(session, mailbox):
+    newsletter = _edition(session)
+    _subscribe(session, "crashed@example.com", "fresh@example.com")
+    enqueue_newsletter(session, newsletter)
+    # One row was claimed by a sender that died long ago, the other by one still running
+    session.query(EmailDelivery).filter_by(email="crashed@example.com").update(
+        {"status": "sending", "claimed_at": datetime.now(timezone.utc) - timedelta(hours=1)}
+    )
+    session.query(EmailDelivery).filter_by(email="fresh@example.com").update(
+        {"status": "sending", "claimed_at": datetime.now(timezone.utc)}
+    )
+    session.commit()
+
+    assert send_pending(session)["sent"] == 1
+    assert [rcpt for rcpt, _ in mailbox.messages] == [["crashed@example.com"]]
+    assert _delivery(session, "crashed@example.com").status == "sent"
+    assert _delivery(session, "fresh@example.com").status == "sending"
+
+
+def test_message_is_self_contained(session, mailbox):
+    newsletter = _edition(session)
+    _subscribe(session, "all@example.com")
+
+    deliver_newsletter(session, newsletter)
+
+    ((_, message),) = mailbox.messages
+    body = message.get_payload(decode=True).decode()
+    assert "<style>" in body
+    assert "<script" not in body and "/static/" not in body
+
+
+def test_row_for_a_deleted_edition_fails_without_stopping_the_queue(session, mailbox):
+    gone = _edition(session)
+    newsletter = Newsletter(edition_title="Next edition", post_count=0)
+    session.add(newsletter)
+    _subscribe(session, "reader@example.com")
+    enqueue_newsletter(session, gone)
+    enqueue_newsletter(session, newsletter)
+    session.query(NewsletterItem).filter_by(newsletter_id=gone.id).delete()
+    session.query(Newsletter).filter_by(id=gone.id).delete()
+    session.commit()
+    session.expunge_all()
+
+    totals = send_pending(session)
+
+    assert totals == {"sent": 1, "skipped": 0, "retry": 0, "failed": 1}
+    failed = session.query(EmailDelivery).filter_by(newsletter_id=gone.id).one()
+    assert failed.status == "failed"
+    assert "not found" in failed.last_error
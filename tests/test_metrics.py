@@ -0,0 +1,46 @@
+from prometheus_client.parser import text_string_to_metric_families
+
+from helpers import add_edition, add_posts
+from newsletter.analyzer.categorizer import categorize_unanalyzed_posts
+from newsletter.telemetry import collect
+
+CLAUDE_OK = ("newsletter_claude_requests_total", {"operation": "categorize", "outcome": "ok"})
+
+
+def _sample(client, name, labels):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            if sample.name == name and sample.labels == labels:
+                return sample.value
+    return 0.0
+
+
+def test_metrics_endpoint_counts_claude_requests(session, client, claude):
+    add_posts(session, 4)
+    before = _sample(client, *CLAUDE_OK)
+
+    categorize_unanalyzed_posts(session)
+
+    assert claude.requests
+    assert _sample(client, *CLAUDE_OK) - before == len(claude.requests)
+
+
+def test_requests_are_labelled_by_route_template(session, client):
+    newsletter = add_edition(session, ["ClaudeAI"])
+    client.get(f"/newsletter/{newsletter.id}")
+
+    labels = {"method": "GET", "route": "/newsletter/{newsletter_id}", "status": "200"}
+    assert _sample(client, "newsletter_http_request_duration_seconds_count", labels) >= 1
+
+
+def test_run_summary_matches_what_was_sent(session, claude):
+    add_posts(session, 4)
+
+    with collect() as metrics:
+        categorize_unanalyzed_posts(session)
+
+    counts = metrics.snapshot()["counts"]
+    assert counts["claude.categorize.requests"] == len(claude.requests)
+    assert counts["claude.categorize.output_tokens"] > 0
@@ -0,0 +1,70 @@
+import pytest
+
+from newsletter.models import Newsletter, PipelineRun, ScrapeRun
+from newsletter.pipeline import orchestrator
+from newsletter.pipeline.orchestrator import PipelineError, run_pipeline, stage_status
+from newsletter.web.render import template_version
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    """Stand-ins for the three stages; records each call, synthesis fails once."""
+    calls = []
+    failures = [RuntimeError("overloaded")]
+
+    def scrape(session):
+        calls.append("scrape")
+        scrape_run = ScrapeRun(total_posts=3, new_posts=3, status="completed")
+        session.add(scrape_run)
+        session.commit()
+        return scrape_run
+
+    def categorize(session):
+        calls.append("categorize")
+        return 3
+
+    def synthesize(session, frequency):
+        calls.append("synthesize")
+        if failures:
+            raise failures.pop()
+        newsletter = Newsletter(edition_title="Resumed edition", frequency=frequency, post_count=3)
+        session.add(newsletter)
+        session.commit()
+        return newsletter
+
+    monkeypatch.setattr(orchestrator, "run_scrape", scrape)
+    monkeypatch.setattr(orchestrator, "categorize_unanalyzed_posts", categorize)
+    monkeypatch.setattr(orchestrator, "synthesize_newsletter", synthesize)
+    return calls
+
+
+def test_resume_runs_only_the_failed_stage(session, stages):
+    with pytest.raises(PipelineError) as failure:
+        run_pipeline(session)
+    run = failure.value.run
+    assert run.status == "failed"
+    assert "overloaded" in run.error
+    assert [stage_status(run, s) for s in orchestrator.STAGES] == [
+        "completed", "completed", "failed"
+    ]
+
+    newsletter = run_pipeline(session, resume=True)
+
+    assert stages == ["scrape", "categorize", "synthesize", "synthesize"]
+    assert newsletter.edition_title == "Resumed edition"
+    session.refresh(run)
+    assert (run.status, run.newsletter_id) == ("completed", newsletter.id)
+    assert session.query(PipelineRun).count() == 1
+    # The pipeline stores the rendered page for the dashboard
+    assert newsletter.html_version == template_version()
+
+
+def test_resume_after_a_completed_run_starts_a_new_one(session, stages):
+    with pytest.raises(PipelineError):
+        run_pipeline(session)
+    run_pipeline(session, resume=True)
+
+    run_pipeline(session, resume=True)  # nothing is left unfinished
+
+    assert session.query(PipelineRun).count() == 2
+    assert stages.count("scrape") == 2
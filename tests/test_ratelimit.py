@@ -0,0 +1,28 @@
+from newsletter import ratelimit
+from newsletter.ratelimit import RateLimiter
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_multi_request_acquire_waits_for_its_last_slot(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(ratelimit.time, "sleep", clock.sleep)
+    limiter = RateLimiter(60)  # one request a second
+
+    limiter.acquire(3)  # slots at 0, 1 and 2
+    assert clock.now == 2.0
+    limiter.acquire()  # the next free slot is 3
+    assert clock.now == 3.0
+    assert clock.sleeps == [2.0, 1.0]
@@ -0,0 +1,39 @@
+import re
+
+from helpers import add_edition
+from newsletter.web.render import EditionFilter, get_newsletter_html, render_newsletter_html
+
+
+def _header_count(html):
+    return int(re.search(r"<span>(\d+) posts</span>", html).group(1))
+
+
+def test_filter_keeps_only_matching_items(session):
+    newsletter = add_edition(session, ["ClaudeAI", "ClaudeAI", "cursor"])
+
+    full = render_newsletter_html(session, newsletter)
+    assert all(f"Post {i}" in full for i in range(3))
+
+    personalized = render_newsletter_html(session, newsletter, EditionFilter.of(["cursor"]))
+    assert "Post 2" in personalized and "Post 0" not in personalized
+    # Subreddit names match regardless of case
+    assert render_newsletter_html(session, newsletter, EditionFilter.of(["CURSOR"])) == personalized
+
+
+def test_header_counts_the_items_shown(session):
+    newsletter = add_edition(session, ["ClaudeAI", "ClaudeAI", "cursor"])
+
+    assert _header_count(render_newsletter_html(session, newsletter)) == 3
+    personalized = render_newsletter_html(session, newsletter, EditionFilter.of(["cursor"]))
+    assert _header_count(personalized) == 1
+
+
+def test_stale_stored_page_is_rendered_without_writing_back(session):
+    newsletter = add_edition(session, ["ClaudeAI"])
+    newsletter.html_content, newsletter.html_version = "stale", "old"
+    session.commit()
+
+    assert "Post 0" in get_newsletter_html(session, newsletter)
+    assert newsletter.html_version == "old"
+    session.refresh(newsletter)
+    assert newsletter.html_content == "stale"
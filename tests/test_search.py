@@ -0,0 +1,51 @@
+import pytest
+
+from helpers import add_posts
+from newsletter.models import PostAnalysis
+from newsletter.search import search_posts
+
+pytestmark = pytest.mark.migrated  # the post_search index only exists in the migrations
+
+
+@pytest.fixture
+def posts(session):
+    posts = add_posts(session, 8)
+    for post in posts[:5]:
+        post.title = f"Running linters from hooks {post.reddit_id}"
+    session.commit()
+    return posts
+
+
+def test_search_pages_through_every_match_once(session, posts):
+    seen, after = [], None
+    while True:
+        results, after = search_posts(session, "linters hooks", limit=2, after=after)
+        seen.append([r.post.id for r in results])
+        if after is None:
+            break
+
+    assert [len(page) for page in seen] == [2, 2, 1]
+    assert sorted(sum(seen, [])) == sorted(p.id for p in posts[:5])
+
+
+def test_analysis_text_is_searchable(session, posts):
+    session.add(PostAnalysis(
+        post_id=posts[7].id, category="news", summary="Explains subagent delegation"
+    ))
+    session.commit()
+
+    results, _ = search_posts(session, "delegation")
+    assert [r.post.id for r in results] == [posts[7].id]
+
+
+def test_search_api_follows_the_cursor(session, client, posts):
+    ids, cursor = [], None
+    while True:
+        params = {"q": "hooks", "limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/search", params=params).json()
+        ids += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(ids) == sorted(p.id for p in posts[:5])
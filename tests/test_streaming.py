@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+from helpers import FakeReddit, add_posts
+from newsletter import config
+from newsletter.analyzer.categorizer import OUTPUT_HEADROOM
+from newsletter.models import Post, PostAnalysis
+from newsletter.pipeline.streaming import scrape_and_categorize
+from newsletter.scraper import reddit
+
+SUBREDDITS = 4
+POSTS_PER_SUBREDDIT = 30
+
+
+@pytest.fixture
+def stream_config(newsletter_config, monkeypatch):
+    sub_config = config.get_subreddit_config()
+    monkeypatch.setitem(sub_config, "subreddits", [
+        {"name": f"stream{i}", "fetch_limit": POSTS_PER_SUBREDDIT, "sort": "hot"}
+        for i in range(SUBREDDITS)
+    ])
+    monkeypatch.setitem(sub_config, "scrape", {"requests_per_minute": 0})
+    monkeypatch.setattr(reddit, "_get_reddit_client", lambda: FakeReddit(POSTS_PER_SUBREDDIT))
+    newsletter_config["dedup"]["enabled"] = False
+    newsletter_config["categorization_cache"]["enabled"] = False
+    return newsletter_config
+
+
+def test_every_scraped_post_is_categorized(session, stream_config):
+    stream_config["pipeline"].update(stream_batch_size=25, flush_seconds=0.05)
+
+    scrape_run, analyzed = scrape_and_categorize(session)
+
+    posts = SUBREDDITS * POSTS_PER_SUBREDDIT
+    assert scrape_run.new_posts == posts
+    assert analyzed == posts
+    assert session.query(PostAnalysis).count() == session.query(Post).count() == posts
+
+
+def test_streamed_chunks_share_full_batches(session, claude, stream_config):
+    # Chunks much smaller than a batch, so every chunk ends in a partial one
+    stream_config["pipeline"].update(stream_batch_size=7, flush_seconds=30)
+
+    scrape_run, analyzed = scrape_and_categorize(session)
+
+    posts = SUBREDDITS * POSTS_PER_SUBREDDIT
+    assert analyzed == posts
+    claude_config = stream_config["claude"]
+    per_batch = int(
+        claude_config["max_tokens_categorization"] * OUTPUT_HEADROOM
+        // claude_config["categorization_output_tokens_per_post"]
+    )
+    assert len(claude.requests) == math.ceil(posts / per_batch)
+
+
+def test_final_sweep_leaves_earlier_posts_alone(session, claude, stream_config):
+    stream_config["pipeline"].update(stream_batch_size=25, flush_seconds=0.05)
+    earlier = add_posts(session, 3)
+
+    scrape_run, analyzed = scrape_and_categorize(session)
+
+    assert analyzed == SUBREDDITS * POSTS_PER_SUBREDDIT
+    sent = {reddit_id for request in claude.requests for reddit_id in request}
+    assert sent.isdisjoint(post.reddit_id for post in earlier)
+    assert session.query(PostAnalysis).filter(
+        PostAnalysis.post_id.in_([post.id for post in earlier])
+    ).count() == 0